@@ -42,18 +42,30 @@ import fileCommit
 import re
 import os
 import bisect
+import csv
 import ctags
 import tempfile
 import sourceAnalysis
 import shutil
+from multiprocessing.pool import ThreadPool
+from threading import Lock
 from fileCommit import FileDict
 from progressbar import ProgressBar, Percentage, Bar, ETA
 from ctags import CTags, TagEntry
 from logging import getLogger
 from codeface.linktype import LinkType
+from codeface.extraction import ExtractionPlan
+from codeface.catfile import GitCatFile, blob_id
+from codeface.commitindex import CommitIndex
+from codeface.cache import DiskCache
+from codeface.snapshot import RevisionSnapshot, link_file
+from codeface.subsys import SubsysTrie, parse_numstat_path, unquote_path
+from codeface.ownership import (LineOwnership, LINE_OWNERSHIP_MODES,
+                                 replay_command)
 
 log = getLogger(__name__)
-from .util import execute_command
+from .util import (execute_command, execute_command_stream,
+                   CommandExecutor)
 
 class Error(Exception):
     """Base class for exceptions in this module."""
@@ -124,6 +136,11 @@ class VCS:
         #file names to include in analysis(non-taged based)
         self._fileNames = None
 
+        #Dictionary with key = filename and value = list of (commit id,
+        #added lines, deleted lines) tuples of the commits that touched
+        #the file (see _prepareFileTouchList)
+        self._fileTouch_dict = None
+
         self.subsys_description = {}
 
     def getCommitDict(self):
@@ -141,6 +158,9 @@ class VCS:
     def getFileCommitDict(self):
         return self._fileCommit_dict
 
+    def getFileTouchDict(self):
+        return self._fileTouch_dict
+
     def setFileNames(self, fileNames):
         self._fileNames = fileNames
 
@@ -261,7 +281,17 @@ def parse_feature_line(sep, line):
     :param line: the line to parse
     :return: start_line, end_line, line_type, feature_list, feature_expression
     """
-    parsed_line = parse_line(sep, line)
+    return parse_feature_row(parse_line(sep, line), line)
+
+
+def parse_feature_row(parsed_line, line):
+    """
+    same as parse_feature_line, but for a line that has already been
+    split into its (stripped) values
+    :param parsed_line: the list of values of the line
+    :param line: the original line (only used for error messages)
+    :return: start_line, end_line, line_type, feature_list, feature_expression
+    """
     # FILENAME,LINE_START,LINE_END,TYPE,EXPRESSION,CONSTANTS
     try:
         start_line = int(parsed_line[1])
@@ -288,6 +318,32 @@ def parse_feature_line(sep, line):
             .format(line), 'CSVFile')
 
 
+def parse_feature_locations(results_file):
+    """
+    parses the featurelocations csv output of cppstats, which may cover
+    several files, with the csv module
+    :param results_file: an iterator over the lines of the csv file
+    :return: dictionary mapping the FILENAME column to the list of
+    (start_line, end_line, line_type, feature_list, feature_expression)
+    tuples of the file, in the order of the csv file
+    """
+    sep = parse_sep_line(next(results_file))
+    reader = csv.reader(results_file, delimiter=sep, quotechar='"',
+                        doublequote=True)
+    # skip the headlines
+    next(reader)
+
+    features = {}
+    for row in reader:
+        if not row:
+            continue
+        parsed_line = [value.strip() for value in row]
+        features.setdefault(parsed_line[0], []).append(
+            parse_feature_row(parsed_line, sep.join(row)))
+
+    return features
+
+
 def get_feature_lines(parsed_lines, filename):
     """
     calculates dictionaries representing the feature sets and the feature expressions
@@ -490,12 +546,12 @@ def get_feature_lines_from_file(file_layout_src, filename):
         #execute_command(cmd, direct_io=True)
         execute_command(cmd)
 
-        results_file = open(featurefile.name, 'r')
-        sep = parse_sep_line(next(results_file))
-        headlines = parse_line(sep, next(results_file))
+        with open(featurefile.name, 'r') as results_file:
+            features = parse_feature_locations(results_file)
         (feature_lines, fexpr_lines) = \
             get_feature_lines(
-                [parse_feature_line(sep, line) for line in results_file],
+                [feature for file_features in features.values()
+                 for feature in file_features],
                 filename)
 
         # clean up temporary files
@@ -519,6 +575,105 @@ def get_feature_lines_from_file(file_layout_src, filename):
     # return resulting FileDict instances for feature sets and feature expressions
     return (feature_lines, fexpr_lines)
 
+
+def get_feature_lines_from_files(src_files, scratch_dir=None):
+    """
+    same as get_feature_lines_from_file, but analyses a list of files
+    with a single cppstats run
+    """
+    '''
+    - Input -
+    src_files: list of (src_file, filename) tuples, where src_file is
+        the path of a copy of the file filename (e.g., in a
+        RevisionSnapshot); the file names must be unique
+    scratch_dir: directory for the temporary cppstats project, should
+        be on the same file system as the source files
+
+    - Description -
+    All files are linked into the source directory of a temporary
+    cppstats project, which is analysed with cppstats --list. The
+    featurelocations csv file of the project is then split by file
+    name. If the batch analysis fails, every file is analysed on its
+    own (see get_feature_lines_from_file).
+    Returns a dictionary that maps the file names to tuples of
+    FileDict instances for the feature sets and feature expressions.
+    '''
+    res = {}
+    if not src_files:
+        return res
+
+    project_dir = tempfile.mkdtemp(suffix="_cppstats", dir=scratch_dir)
+    source_dir = os.path.join(project_dir, "source")
+    try:
+        for (src_file, filename) in src_files:
+            link_file(src_file, os.path.join(source_dir, filename))
+
+        list_file = os.path.join(project_dir, "projects.txt")
+        with open(list_file, "w") as f:
+            f.write(project_dir + "\n")
+
+        # run cppstats analysis on the project to get the feature locations
+        cmd = "/usr/bin/env cppstats --kind featurelocations --list {0}"\
+            .format(list_file).split()
+        execute_command(cmd)
+
+        with open(os.path.join(project_dir, "cppstats_featurelocations.csv"),
+                  'r') as results_file:
+            features = parse_feature_locations(results_file)
+
+        # cppstats reports the srcML files it generated from the
+        # sources, map them back to the original file names
+        filenames = set(filename for (_, filename) in src_files)
+        file_features = {}
+        for (location, rows) in features.iteritems():
+            filename = _feature_location_filename(location, project_dir,
+                                                  filenames)
+            if filename is None:
+                raise ParseError("cannot map feature location {0} to a "
+                                 "source file".format(location), 'CSVFile')
+            file_features.setdefault(filename, []).extend(rows)
+
+        for (_, filename) in src_files:
+            res[filename] = get_feature_lines(file_features.get(filename, []),
+                                              filename)
+    except (Exception, IOError):
+        import sys
+        error_type, error_value, traceback = sys.exc_info()
+        log.warning("cppstats batch analysis failed ({0}, {1}), "
+                    "analysing {2} files separately"
+                    .format(error_type, error_value, len(src_files)))
+        log.debug("Trace of previous error: {0}".format(traceback))
+        for (src_file, filename) in src_files:
+            with open(src_file, "r") as f:
+                res[filename] = get_feature_lines_from_file(f.readlines(),
+                                                            filename)
+    finally:
+        shutil.rmtree(project_dir)
+
+    return res
+
+
+def _feature_location_filename(location, project_dir, filenames):
+    """
+    maps the FILENAME column of the cppstats output of a project to the
+    name of the analysed file relative to the source directory of the
+    project, or None if the location does not belong to any file.
+    """
+    if os.path.isabs(location):
+        location = os.path.relpath(location, project_dir)
+    location = location.replace(os.sep, "/")
+
+    for prefix in ("_cppstats_featurelocations/", "_cppstats/", "source/"):
+        if location.startswith(prefix):
+            location = location[len(prefix):]
+            break
+
+    if location in filenames:
+        return location
+    if location.endswith(".xml") and location[:-4] in filenames:
+        return location[:-4]
+    return None
+
 class gitVCS (VCS):
     def __init__(self):
         VCS.__init__(self) # Python OOP braindamage
@@ -534,23 +689,217 @@ class gitVCS (VCS):
         self.diffStatFilesPattern = re.compile(r'(\d*?) file(|s) changed')
         self.diffStatInsertPattern = re.compile(r' (\d*?) insertion')
         self.diffStatDeletePattern = re.compile(r' (\d*?) deletion')
-        # Commit Sign-off patterns
-        sign_off_prefix = ("CC:", "Signed-off-by:", "Acked-by:", "Reviewed-by:",
-                           "Reported-by:", "Tested-by:", "LKML-Reference:", "Patch:")
-        sign_off_prefix = ["("+s+")(\s*)(.*)$" for s in sign_off_prefix]
-        self.signOffPatterns = [re.compile(prefix, re.I) for prefix in sign_off_prefix]
+        # Options for git blame: ignore whitespace changes, find copied
+        # code and moved code (attribute to original). A blame policy
+        # (see codeface.blame) selects the options per file instead.
+        self.blameOptions = ["-w", "-C", "-M"]
+        self.blame_policy = None
+        # Source of the line ownership of the blamed files (see
+        # codeface.ownership): "blame" runs git blame for every file,
+        # "replay" replays the diffs of the revision range once
+        self.line_ownership = "blame"
+        # Selection of the files of the file based analysis by path and
+        # blob size (see codeface.pathfilter), None analyses all files
+        self.path_filter = None
+        self.numStatPattern = re.compile(r'^(?:\d+|-)\t(?:\d+|-)\t(.*)$',
+                                         re.M)
+        # Commit Sign-off tags. git (>= 2.22) extracts them from the
+        # trailers of the commit messages and lists them (with
+        # continuation lines unfolded) below the Commit: line of the log
+        # and show output. With older versions, the description is
+        # scanned for sign-off lines.
+        self.signOffTags = ("CC", "Signed-off-by", "Acked-by", "Reviewed-by",
+                            "Reported-by", "Tested-by", "LKML-Reference",
+                            "Patch")
+        self.signOffPattern = re.compile(
+            r'^[ \t]*({0}):[ \t]*(.*)$'.format("|".join(self.signOffTags)),
+            re.I | re.M)
+
+        # Obtain the diff statistics and commit messages with one
+        # streamed git log call per diff variant instead of one
+        # git show call per commit and variant
+        self.stream_extraction = True
+
+        # Persistent git cat-file client for commit, tree and blob
+        # lookups, started on first use
+        self._cat_file = None
+
+        # Guards the creation of the object server, the caches and the
+        # commit index, which may be requested by several blame workers
+        self._lazy_lock = Lock()
+
+        # Cache for the file lists of revisions (see _getTreeFiles)
+        self._tree_files = {}
+
+        # Number of files that are analysed concurrently during the
+        # blame analysis
+        self.blame_jobs = 1
+
+        # Directory for persistent caches of intermediate results
+        # (None disables caching)
+        self.cache_dir = None
+        self._blame_cache = None
+        self._structure_cache = None
+
+        # Version strings of the external structure analysis tools
+        self._tool_versions = {}
+
+        # Index of the commit graph, built on first use
+        self._commit_index = None
+
+        # Scratch copy of the files whose structure is analysed
+        # (see _prepareFileCommitList)
+        self._snapshot = None
+
+        # Artefacts computed by extractCommitData (None: derive the
+        # plan from the link type, with all diff variants)
+        self.extraction_plan = None
+
+        # Line ownership replayed for the blame analysis of a range
+        # (see _replayOwnership)
+        self._ownership = None
+
+    def __getstate__(self):
+        # The object server and the cached file lists must not be
+        # serialised with the analysis results
+        state = self.__dict__.copy()
+        state["_cat_file"] = None
+        state["_tree_files"] = {}
+        state["_blame_cache"] = None
+        state["_structure_cache"] = None
+        state["_snapshot"] = None
+        state["_commit_index"] = None
+        state["_ownership"] = None
+        state["_lazy_lock"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lazy_lock = Lock()
+
+    def _getCatFile(self):
+        with self._lazy_lock:
+            if self._cat_file is None:
+                self._cat_file = GitCatFile(self.repo)
+            return self._cat_file
+
+    def _getCommitIndex(self):
+        with self._lazy_lock:
+            if self._commit_index is None:
+                cache = None
+                if self.cache_dir is not None:
+                    cache = DiskCache(self.cache_dir, "commitindex")
+                self._commit_index = CommitIndex.load(self.repo, cache)
+            return self._commit_index
+
+    def _resolveCommit(self, rev):
+        """Return the id of the commit that rev refers to, or None."""
+        info = self._getCatFile().info("{0}^{{commit}}".format(rev))
+        if info is None:
+            return None
+        return info[0]
+
+    def closeObjectServer(self):
+        """Terminate the git cat-file processes used for object lookups."""
+        with self._lazy_lock:
+            if self._cat_file is not None:
+                self._cat_file.close()
+                self._cat_file = None
+        self._tree_files = {}
+
+    # Diff variants in the order in which they are stored in
+    # commit.Commit.diff_info: regular/patience diff, each with
+    # and without whitespace sensitivity
+    DIFF_VARIANTS = (("", ""), ("", "--ignore-space-change"),
+                     ("--patience", ""),
+                     ("--patience", "--ignore-space-change"))
+
+    # Version of the structure analysis (function and feature lines),
+    # part of the keys of the structure cache. Increment whenever the
+    # analysis or the layout of the cached results changes.
+    STRUCTURE_CACHE_VERSION = 1
+
+    # Extensions of the implementation files of the file based analysis
+    IMPLEMENTATION_FILE_EXT = (
+        ".c", ".cc", ".cpp", ".cxx", ".cs", ".asmx", ".m", ".mm",
+        ".js", ".java", ".j", ".jav", ".php",".py", ".sh", ".rb",
+        '.d', '.php4', '.php5', '.inc', '.phtml', '.m', '.mm',
+        '.f', '.for', '.f90', '.idl', '.ddl', '.odl', '.tcl')
+
+    # Version of the replayed line ownership, part of the keys of the
+    # ownership cache
+    OWNERSHIP_CACHE_VERSION = 1
+
+    def setStreamExtraction(self, stream_extraction):
+        self.stream_extraction = stream_extraction
+
+    def setExtractionPlan(self, extraction_plan):
+        self.extraction_plan = extraction_plan
+
+    def setBlamePolicy(self, blame_policy):
+        self.blame_policy = blame_policy
+
+    def setPathFilter(self, path_filter):
+        self.path_filter = path_filter
+
+    def setLineOwnership(self, line_ownership):
+        if line_ownership not in LINE_OWNERSHIP_MODES:
+            raise ValueError("Unknown line ownership mode '{0}'".
+                             format(line_ownership))
+        self.line_ownership = line_ownership
+
+    def _getDiffVariants(self):
+        """Return the diff variants that are computed for every commit."""
+        if self.extraction_plan is None:
+            return self.DIFF_VARIANTS
+        return self.DIFF_VARIANTS[:self.extraction_plan.diff_variants]
+
+    def setBlameJobs(self, blame_jobs):
+        self.blame_jobs = max(1, int(blame_jobs))
+
+    def setCacheDir(self, cache_dir):
+        self.cache_dir = cache_dir
+        self._blame_cache = None
+        self._structure_cache = None
+        self._commit_index = None
+
+    def _getBlameCache(self):
+        with self._lazy_lock:
+            if self._blame_cache is None and self.cache_dir is not None:
+                # The namespace differs from that of earlier versions,
+                # which also stored the source lines
+                self._blame_cache = DiskCache(self.cache_dir, "blame-owners")
+            return self._blame_cache
 
     def getDiffVariations(self):
         # We support diffs formed of 2x2 combinations:
         # with and without whitespace sensitivity,
-        # and regular/patience diff.
-        return 4
+        # and regular/patience diff. The extraction plan
+        # may restrict the analysis to some of them.
+        return len(self._getDiffVariants())
 
     def _getRevDate(self, rev):
-         cmd_base = 'git --git-dir={0} log --no-merges --format=%ct -1'.format(self.repo).split()
-         cmd = cmd_base + [rev]
-         date = execute_command(cmd)
-         return date.strip()
+        # For regular commits, the date can be taken from the commit
+        # header. Merges require the most recent non-merge commit,
+        # which is looked up in the commit index if it has already been
+        # built. Building it just for this lookup would cost more than
+        # the history walk of git log.
+        cmt_info = self._getCatFile().commit(rev)
+        if cmt_info is not None and len(cmt_info["parents"]) <= 1:
+            return cmt_info["committer_time"]
+
+        index = self._commit_index
+        if index is not None and cmt_info is not None and \
+                cmt_info["id"] in index:
+            cmt_id = index.latest_non_merge(cmt_info["id"])
+            if cmt_id is not None:
+                return str(index.commit_date(cmt_id))
+
+        cmd_base = 'git --git-dir={0} log --no-merges --format=%ct -1'.\
+            format(self.repo).split()
+        cmd = cmd_base + [rev]
+        date = execute_command(cmd)
+        return date.strip()
 
     def _prepareCommitLists(self):
         """Gets the hash values (or whatever is used to identify
@@ -575,8 +924,15 @@ class gitVCS (VCS):
 
         # .. and proceed with the subsystems. We "recycle" the already
         # created commit instances by placing them on subsystem specific
-        # lists.
-        for subsys in self.subsys_description.keys():
+        # lists. When the commits are extracted from a streamed log,
+        # the subsystems are determined from the paths touched by the
+        # commits instead (see _buildSubsysCommitLists)
+        if self.stream_extraction:
+            subsys_list = []
+        else:
+            subsys_list = self.subsys_description.keys()
+
+        for subsys in subsys_list:
             clist = self._getCommitIDsLL(self.rev_start, self.rev_end,
                                          self.subsys_description[subsys])
 
@@ -590,8 +946,7 @@ class gitVCS (VCS):
             # that are required for the subsystem identification
             # pass (NOTE: There are some optimisation opportunities here)
             self._commit_id_list_dict[subsys] = \
-                [self._Logstring2ID(logstring)
-                 for logstring in reversed(clist)]
+                set(self._Logstring2ID(logstring) for logstring in clist)
 
         # Finally, we also create commit ID lists for ranges of
         # interest (currently, only to decide whether a commit is in
@@ -613,20 +968,19 @@ class gitVCS (VCS):
             clist - list of strings representing commits that can be parsed with
                     _Logstring2ID()
         """
-        if self.range_by_date:
-            start_date = self._getRevDate(rev_start)
-            end_date = self._getRevDate(rev_end)
-            rev_range = ['--since=' + start_date,
-                         '--before=' + end_date]
+        # Ranges of the complete project are answered by the commit index
+        if dir_list is None:
+            clist = self._getCommitIDsIndexed(rev_start, rev_end)
+            if clist is not None:
+                return clist
 
-        else:
-            rev_range = ['{0}..{1}'.format(rev_start, rev_end)]
+        rev_range = self._getRevRangeArgs(rev_start, rev_end)
 
         # TODO: Check the effect that -M and -C (to detect copies and
         # renames) have on the output. Is there anything we need
         # to take into account?
         # First, get the output for the complete revision
-        # range (TODO: cache this)
+        # range
         # NOTE: %H prints the hash value of the commit, %ct denotes
         # the comitter date (it's important to use comitter and not
         # author date; this guarantees monotonically increasing time
@@ -643,7 +997,7 @@ class gitVCS (VCS):
             cmd.append("--")
             cmd.extend(dir_list)
 
-        clist = execute_command(cmd).splitlines()
+        clist = list(execute_command_stream(cmd))
 
         # Remember the comment about monotonically increasing time sequences
         # above? True in principle, but unfortunately, a very small number
@@ -654,6 +1008,48 @@ class gitVCS (VCS):
 
         return clist
 
+    def _getCommitIDsIndexed(self, rev_start, rev_end):
+        """Same as _getCommitIDsLL for the complete project, but computed
+        from the commit index. Returns None if the revisions are not part
+        of the index.
+        """
+        index = self._getCommitIndex()
+        if self.range_by_date:
+            # git log --since --before without revisions walks from HEAD
+            head = self._resolveCommit("HEAD")
+            if head not in index:
+                return None
+            cmt_ids = index.date_range(head, int(self._getRevDate(rev_start)),
+                                       int(self._getRevDate(rev_end)))
+        else:
+            start = self._resolveCommit(rev_start)
+            end = self._resolveCommit(rev_end)
+            if start not in index or end not in index:
+                return None
+            cmt_ids = index.range(end, start)
+
+        clist = [index.logstring(cmt_id) for cmt_id in cmt_ids
+                 if not index.is_merge(cmt_id)]
+
+        # Sort as the log output, see _getCommitIDsLL
+        clist.sort(reverse=True)
+
+        return clist
+
+    def _getRevRangeArgs(self, rev_start, rev_end):
+        """Return the git log arguments that select a revision range.
+
+        Depending on range_by_date, the range is either given by the
+        commit dates of the two revisions, or by the commits reachable
+        from rev_end, but not from rev_start.
+        """
+        if self.range_by_date:
+            start_date = self._getRevDate(rev_start)
+            end_date = self._getRevDate(rev_end)
+            return ['--since=' + start_date, '--before=' + end_date]
+
+        return ['{0}..{1}'.format(rev_start, rev_end)]
+
     def _getSingleCommitInfo(self, cmtHash):
         #produces the git log output for a single commit hash
 
@@ -697,7 +1093,7 @@ class gitVCS (VCS):
 
 
         #submit query command
-        clist = execute_command(cmd).splitlines()
+        clist = list(execute_command_stream(cmd))
 
         # Remember the comment about monotonically increasing time sequences
         # above? True in principle, but unfortunately, a very small number
@@ -710,6 +1106,58 @@ class gitVCS (VCS):
         # and extract the desired subrange
         return clist
 
+    def _buildFileCommitIndex(self, rev_start, rev_end):
+        """Map every file changed in a revision range to its commits.
+
+        Returns a dictionary with file names as keys and lists of
+        commit.Commit instances as values. The lists contain the same
+        commits in the same order as getFileCommits() returns for the
+        file, but are computed from a single git log for all files.
+        (Only the history simplification of path limited git log calls
+        may hide commits on side branches that getFileCommits() does
+        not report.) Commit instances are shared between the lists.
+        """
+        # The NUL character marks the commit lines in the output, the
+        # remaining lines are the name-status lines of the commits
+        cmd = 'git --git-dir={0} log --no-merges -M -C'.format(self.repo).split()
+        cmd.append("--name-status")
+        cmd.append("--pretty=format:%x00%ct %H %at %ai")
+        cmd.append("{0}..{1}".format(rev_start, rev_end))
+
+        file_logs = {}
+        logstring = None
+        for line in execute_command_stream(cmd):
+            if line.startswith("\0"):
+                logstring = line[1:]
+                continue
+            if not line:
+                continue
+
+            # Renames list the old and the new name, both of which a path
+            # limited log reports. Copies only change the new file.
+            fields = line.split("\t")
+            if fields[0].startswith("C"):
+                paths = fields[2:]
+            else:
+                paths = fields[1:]
+
+            for path in paths:
+                logs = file_logs.setdefault(unquote_path(path), [])
+                if not logs or logs[-1] != logstring:
+                    logs.append(logstring)
+
+        cmt_objs = {}
+        file_cmts = {}
+        for (fname, logs) in file_logs.iteritems():
+            # Sort as _getFileCommitInfo does
+            logs.sort(reverse=True)
+            for logstring in logs:
+                if logstring not in cmt_objs:
+                    cmt_objs[logstring] = self._Logstring2Commit(logstring)
+            file_cmts[fname] = [cmt_objs[logstring] for logstring in logs]
+
+        return file_cmts
+
     def _prepareGlobalCommitList(self):
         """Prepare the list of all commits for the complete project.
 
@@ -808,13 +1256,23 @@ class gitVCS (VCS):
 
         cmt.diff_info.append((int(files), int(insertions), int(deletions)))
 
-    def _parseCommit(self, cmt):
+    def _classifyCommit(self, cmt, subsystems=None):
+        """Determine the subsystems touched by a commit, and whether
+        the commit falls into a release candidate phase.
+
+        subsystems is the set of subsystems touched by the commit if it
+        is already known, otherwise it is determined from the commit
+        lists of the subsystems."""
         # First, determine which subsystems are touched by the commit
+        if subsystems is None:
+            subsystems = set(subsys for subsys in self.subsys_description
+                             if cmt.id in self._commit_id_list_dict[subsys])
+
         cmt_subsystems = cmt.getSubsystemsTouched()
         touched_subsys = False
 
         for subsys in self.subsys_description.keys():
-            if cmt.id in self._commit_id_list_dict[subsys]:
+            if subsys in subsystems:
                 cmt_subsystems[subsys] = 1
                 touched_subsys = True
             else:
@@ -836,44 +1294,196 @@ class gitVCS (VCS):
             else:
                 cmt.setInRC(False)
 
+    def _analyseDiffVariant(self, msg, cmt):
+        """Analyse the diffstat of one diff variant of a commit.
+
+        Commits that cannot be analysed are recorded with an empty
+        diffstat so that the diff variants stay aligned in diff_info.
+        """
+        try:
+            self._analyseDiffStat(msg, cmt)
+        except UnicodeDecodeError:
+            # Since we work in utf8 (which git returns and
+            # Python is supposed to work with), this exception
+            # seems to stem from a faulty encoding. Just
+            # ignore the commit
+            cmt.diff_info.append((0,0,0))
+            log.warning("Ignoring commit {} due to unicode error.".
+                    format(cmt.id))
+        except ParseError as pe:
+            # Since the diff format is very easy to parse,
+            # this most likely stems from a malformed diff
+            # that can be ignored. Nevertheless, report the
+            # line and the commit id
+            log.error("Could not parse diffstat for {0}!".
+                  format(pe.id))
+            log.error("{0}".format(pe.line))
+            cmt.diff_info.append((0,0,0))
+
+    def _parseCommit(self, cmt):
+        self._classifyCommit(cmt)
+        self._parseCommitDiffs(cmt)
+
+    def _getCommitDiffCmds(self, cmt_id):
+        """Return the git show commands for the diff variants of a commit."""
+        cmds = []
+        for (difftype, whitespace) in self._getDiffVariants():
+            cmd = ("git --git-dir={0} show --shortstat --numstat {1} {2} "
+                   "{3}".format(self.repo, difftype, whitespace,
+                                cmt_id)).split()
+            cmd.insert(3, self._getLogFormat())
+            cmds.append(cmd)
+        return cmds
+
+    def _parseCommitDiffs(self, cmt, msgs=None):
+        """Analyse the diff content and commit message of a single commit.
+
+        msgs are the outputs of the commands of _getCommitDiffCmds, which
+        are run here unless given.
+        """
         # Third, analyse the diff content
         # TODO: Using a list of entries in diff_info is suboptimal.
         # This should be replaced with a hash indexed by parameter
         # combination
-        for difftype in ("", "--patience"):
-            for whitespace in ("", "--ignore-space-change"):
-                cmd = ("git --git-dir={0} show --format=full --shortstat "
-                       "--numstat {1} {2} {3}".format(self.repo, difftype,
-                                                      whitespace, cmt.id)).split()
-                try:
-                    # print("About to call " + " ".join(cmd))
-                    msg = execute_command(cmd)
-                    self._analyseDiffStat(msg, cmt)
-                except UnicodeDecodeError:
-                    # Since we work in utf8 (which git returns and
-                    # Python is supposed to work with), this exception
-                    # seems to stem from a faulty encoding. Just
-                    # ignore the commit
-                    cmt.diff_info.append((0,0,0))
-                    log.warning("Ignoring commit {} due to unicode error.".
-                            format(pe.id))
-                except ParseError as pe:
-                    # Since the diff format is very easy to parse,
-                    # this most likely stems from a malformed diff
-                    # that can be ignored. Nevertheless, report the
-                    # line and the commit id
-                    log.error("Could not parse diffstat for {0}!".
-                          format(pe.id))
-                    log.error("{0}".format(pe.line))
-                    cmt.diff_info.append((0,0,0))
-                except OSError:
-                    log.exception("Could not spawn git")
-                    raise
+        if msgs is None:
+            try:
+                msgs = [execute_command(cmd)
+                        for cmd in self._getCommitDiffCmds(cmt.id)]
+            except OSError:
+                log.exception("Could not spawn git")
+                raise
+
+        for msg in msgs:
+            self._analyseDiffVariant(msg, cmt)
 
         # The commit message is independent of the diff type, so we
         # can re-use the information in msg
         self._analyseCommitMsg(msg, cmt)
 
+    def _iterLogRecords(self, lines):
+        """Split the lines of a git log output in _getLogFormat() into
+        per-commit messages.
+
+        Every message has the same format as the output of git show
+        for the commit. Since the commit description is indented, only
+        the headers of the commits start with "commit ".
+        """
+        record = []
+        for line in lines:
+            if line.startswith("commit ") and record:
+                yield self._joinLogRecord(record)
+                record = []
+            record.append(line)
+
+        if record:
+            yield self._joinLogRecord(record)
+
+    def _joinLogRecord(self, record):
+        # Commits are separated by an empty line in the log output
+        while record and record[-1] == "":
+            record.pop()
+        return "\n".join(record) + "\n"
+
+    def _parseCommitsStreamed(self):
+        """Analyse the diffs and commit messages of all commits in the
+        revision range.
+
+        Instead of calling git show for every commit and diff variant,
+        one git log over the whole revision range is run per diff
+        variant, and its output is parsed commit by commit.
+        """
+        rev_range = self._getRevRangeArgs(self.rev_start, self.rev_end)
+        subsys_trie = SubsysTrie(self.subsys_description)
+
+        diff_variants = self._getDiffVariants()
+        for (i, (difftype, whitespace)) in enumerate(diff_variants):
+            cmd = 'git --git-dir={0} log'.format(self.repo).split()
+            cmd.append('--no-merges')
+            cmd.append('--no-decorate')
+            cmd.append(self._getLogFormat())
+            cmd.append('--shortstat')
+            cmd.append('--numstat')
+            cmd.extend([opt for opt in (difftype, whitespace) if opt])
+            cmd.extend(rev_range)
+
+            count = 0
+            widgets = ['Pass 1/2 ({0}/{1}): '.format(i+1,
+                                                     len(diff_variants)),
+                       Percentage(), ' ', Bar(), ' ', ETA()]
+            pbar = ProgressBar(widgets=widgets,
+                               maxval=len(self._commit_dict)).start()
+
+            seen = set()
+            for msg in self._iterLogRecords(execute_command_stream(cmd)):
+                cmt_id = msg.split("\n", 1)[0].split()[1]
+                cmt = self._commit_dict.get(cmt_id)
+                if cmt is None or cmt_id in seen:
+                    continue
+                if i > 0 and cmt_id not in streamed:
+                    continue
+                seen.add(cmt_id)
+
+                count += 1
+                if count % 20 == 0:
+                    pbar.update(count)
+
+                self._analyseDiffVariant(msg, cmt)
+
+                # The commit message and the touched subsystems are
+                # independent of the diff type, so it suffices to
+                # analyse them in the first pass
+                if i == 0:
+                    self._analyseCommitMsg(msg, cmt)
+                    self._classifyCommit(cmt, subsys_trie.classify(
+                        self._getNumstatPaths(msg)))
+
+            pbar.finish()
+
+            if i == 0:
+                streamed = seen
+                continue
+
+            # Keep the diff variants aligned for commits that did
+            # not show up in the log output
+            for cmt_id in streamed - seen:
+                log.warning("Commit {0} missing in log output for diff "
+                            "variant {1}".format(cmt_id, i))
+                self._commit_dict[cmt_id].diff_info.append((0,0,0))
+
+        # Commits outside the revision range (e.g., commits that were
+        # collected from the file histories) are analysed individually,
+        # with up to blame_jobs git commands at the same time. They are
+        # not part of any subsystem commit list.
+        others = [cmt for cmt in self._commit_dict.values()
+                  if cmt.id not in streamed]
+        with CommandExecutor(self.blame_jobs) as executor:
+            msgs = executor.imap([cmd for cmt in others
+                                  for cmd in self._getCommitDiffCmds(cmt.id)])
+            for cmt in others:
+                self._classifyCommit(cmt, set())
+                self._parseCommitDiffs(cmt, [next(msgs)
+                                             for _ in diff_variants])
+
+        self._buildSubsysCommitLists()
+
+    def _getNumstatPaths(self, msg):
+        """Return all file names listed in the numstat part of a commit
+        message."""
+        paths = []
+        for path in self.numStatPattern.findall(msg):
+            paths.extend(parse_numstat_path(path))
+        return paths
+
+    def _buildSubsysCommitLists(self):
+        """Distribute the commits of the revision range onto the
+        subsystem commit lists, based on the subsystems they touch."""
+        for subsys in self.subsys_description.keys():
+            self._commit_list_dict[subsys] = \
+                [cmt for cmt in self._commit_list_dict["__main__"]
+                 if cmt.getSubsystemsTouched().get(subsys) == 1]
+            self._commit_id_list_dict[subsys] = \
+                set(cmt.id for cmt in self._commit_list_dict[subsys])
+
 
 
     def _analyseCommitMsg(self, msg, cmt):
@@ -924,8 +1534,10 @@ class gitVCS (VCS):
         commit_index = i
         descr_index = i+1
 
-        # Determine author and committer
-        for line in parts[commit_index].split("\n"):
+        # Determine author and committer. The remaining header lines
+        # are the sign-off trailers, if git reports them.
+        header = parts[commit_index].split("\n")
+        for (j, line) in enumerate(header):
             match = self.authorPattern.search(line)
             if (match):
                 cmt.author = match.group(1)
@@ -933,6 +1545,7 @@ class gitVCS (VCS):
             match = self.committerPattern.search(line)
             if (match):
                 cmt.committer = match.group(1)
+                break
 
         descr = parts[descr_index].split("\n")
 
@@ -942,23 +1555,22 @@ class gitVCS (VCS):
         # Add commit description to commit object
         cmt.setDescription(descr)
 
-        # Ensure that there are actually sign off tags in the commit message
-        found = False
-        i = 0
-        for line in descr:
-            line = line.lstrip()
-            found = any([prefix.match(line) for prefix in self.signOffPatterns])
-            if found:
-                break
-            i+=1
-
-        if found:
+        # The commit message proper ends before the first sign-off line
+        match = self.signOffPattern.search(parts[descr_index])
+        if match:
+            i = parts[descr_index].count("\n", 0, match.start())
             descr_message = "\n".join(parts[descr_index].
                                       split("\n \n ")[0:i-1])
-            self._analyseSignedOffs(descr[i:], cmt)
         else:
             descr_message = parts[descr_index]
 
+        if self._hasTrailerKeys():
+            self._analyseSignedOffs(header[j+1:], cmt)
+        elif match:
+            # Without trailer support in git, all lines from the first
+            # sign-off line on are taken as sign-offs
+            self._analyseSignedOffs(descr[i:], cmt)
+
         # Normalise the commit message
         final_message = ""
         for line in descr_message.split("\n"):
@@ -968,22 +1580,15 @@ class gitVCS (VCS):
         cmt.commit_msg_info = (len(final_message.split("\n")),
                                len(final_message))
 
-    def _analyseSignedOffs(self, msg, cmt):
-        """Analyse the Signed-off-part of a commit message."""
+    def _analyseSignedOffs(self, trailers, cmt):
+        """Analyse the sign-off trailers of a commit message."""
 
         tag_names_list = cmt.getTagNames()
-        for entry in msg:
-            entry = entry.lstrip()
-            matches = [tag.search(entry) for tag in self.signOffPatterns
-                       if tag.search(entry)!=None]
-            if (matches):
-                match = matches[0]
-                key = match.group(1).replace(" ", "").replace(":", "")
-                value = match.group(3)
-                if key in tag_names_list.keys():
-                    tag_names_list[key].append(value)
-                else:
-                    tag_names_list[key] = [value]
+        for entry in trailers:
+            match = self.signOffPattern.match(entry)
+            if (match):
+                tag_names_list.setdefault(match.group(1), []).append(
+                    match.group(2))
             else:
                 log.debug("Could not parse Signed-off like line:")
                 log.debug('{0}'.format(entry))
@@ -1009,6 +1614,13 @@ class gitVCS (VCS):
         # in the subsystem description
         if subsys=="__main__":
             clist = self._getCommitIDsLL(revrange[0], revrange[1])
+        elif self.stream_extraction:
+            # The subsystems touched by the commits are already known
+            clist = self._getCommitIDsLL(revrange[0], revrange[1])
+            cmts = [self._commit_dict[self._Logstring2ID(logstring)]
+                    for logstring in reversed(clist)]
+            return [cmt for cmt in cmts
+                    if cmt.getSubsystemsTouched().get(subsys) == 1]
         else:
             clist = self._getCommitIDsLL(revrange[0], revrange[1],
                                          self.subsys_description[subsys])
@@ -1029,18 +1641,39 @@ class gitVCS (VCS):
             log.devinfo("Using cached data to extract commit information")
             return self._commit_list_dict[subsys]
 
+        if self.extraction_plan is None:
+            self.extraction_plan = ExtractionPlan.for_link_type(link_type)
+        plan = self.extraction_plan
+        plan.report(link_type)
+
         self._prepareCommitLists()
 
-        if link_type in (LinkType.proximity, LinkType.file,
-                         LinkType.feature, LinkType.feature_file):
+        if plan.blame:
+            # The blame analysis locates the code structure that is
+            # required by the plan; without any, files are blamed as
+            # for the file link type
+            if plan.function_structure:
+                blame_type = LinkType.proximity
+            elif plan.feature_structure:
+                blame_type = LinkType.feature
+            else:
+                blame_type = LinkType.file
             self.addFiles4Analysis(self._commit_dict.keys())
-            self._prepareFileCommitList(self._fileNames, link_type=link_type)
+            self._prepareFileCommitList(self._fileNames, link_type=blame_type)
+        if plan.file_touches:
+            self._prepareFileTouchList()
 
         # _commit_list_dict as computed by _prepareCommitLists() already
         # provides a decomposition of the commit list into subsystems:
         # It suffices to analyse the commits in the global commit list
         # __main__, the subsystem information follows automatically
         # from this.
+        if self.stream_extraction:
+            self._parseCommitsStreamed()
+            self.closeObjectServer()
+
+            return self._commit_list_dict[subsys]
+
         count = 0
         widgets = ['Pass 1/2: ', Percentage(), ' ', Bar(), ' ', ETA()]
         pbar = ProgressBar(widgets=widgets,
@@ -1058,6 +1691,7 @@ class gitVCS (VCS):
             self._parseCommit(cmt)
 
         pbar.finish()
+        self.closeObjectServer()
         # For the subsystems, we need not re-analyse the commits again,
         # but can just pick the results from the global analysis.
         # Which was already done by _prepareCommitLists() ;-)
@@ -1065,51 +1699,251 @@ class gitVCS (VCS):
         return self._commit_list_dict[subsys]
 
 
-    def _getBlameMsg(self, fileName, rev):
+    def _getBlameOptions(self, fileName, rev):
+        '''Return the git blame options for file fileName at rev'''
+        if self.blame_policy is None:
+            return self.blameOptions
+        if not self.blame_policy.depends_on_size():
+            return self.blame_policy.options()
+
+        info = self._getCatFile().info("{0}:{1}".format(rev, fileName))
+        return self.blame_policy.options(info[2] if info else None)
+
+    def _getBlameMsg(self, fileName, rev, options=None):
         '''provided with a filename and revision the function returns
-        the blame message'''
+        the blame message as an iterator over its lines, which are read
+        while git blame is running. The blame options default to those
+        of _getBlameOptions.'''
+
+        if options is None:
+            options = self._getBlameOptions(fileName, rev)
 
         #build command string
         cmd = 'git --git-dir={0} blame'.format(self.repo).split()
         cmd.append("-p") #format for machine consumption
-        cmd.append("-w") #ignore whitespace changes
-        cmd.append("-C") #find copied code (attribute to original)
-        cmd.append("-M") #find moved code (attribute to original)
+        cmd.extend(options)
         cmd.append(rev)
         cmd.append("--")
         cmd.append(fileName)
 
         #query git repository
-        blameMsg = execute_command(cmd).splitlines()
+        return execute_command_stream(cmd)
 
-        return blameMsg
 
+    def _iterBlameEntries(self, msg):
+        '''
+        Generator over the lines of a porcelain blame message
 
-    def _parseBlameMsg(self, msg):
-        '''input a blame msg and the commitID under examination the
-        output contains code line numbers and corresponding commitID'''
+        Yields a tuple (line number, commit hash, source line) for every
+        line of the blamed file. Line numbers start at 0, and source
+        lines are terminated by a newline. The message is consumed line
+        by line, so it need not be held in memory completely.
+        '''
+        lineNum = None
+        commitHash = None
 
-        #variable declarations
-        commitLineDict = {} #dictionary, key is line number, value is commit ID
-        codeLines      = [] # list of source code lines
+        for line in msg:
+            # check for line of code, signaled by a tab character
+            if line.startswith('\t'):
+                yield (lineNum, commitHash, line[1:] + '\n')
+                continue
 
-        while msg:
+            #the header lines of a source line start with a commit hash,
+            #followed by the original and the final line number
+            fields = line.split(" ", 3)
+            if self.cmtHashPattern.match(fields[0]):
+                commitHash = fields[0]
+                lineNum = int(fields[2]) - 1
 
-            line = msg.pop(0).split(" ")
+    def _getBlame(self, fileName, rev):
+        '''
+        Return the parsed blame data (see _parseBlameMsg) of a file at
+        revision rev, from the blame cache if possible
+        '''
+        if self._ownership is not None:
+            res = self._getReplayedBlame(fileName, rev)
+            if res is not None:
+                return res
+
+        options = self._getBlameOptions(fileName, rev)
+        cache = self._getBlameCache()
+        if cache is None:
+            return self._parseBlameMsg(self._getBlameMsg(fileName, rev,
+                                                         options))
+
+        # The blame data are fully determined by the commit, the file
+        # name and the blame options
+        cmt_info = self._getCatFile().info("{0}^{{commit}}".format(rev))
+        if cmt_info is None:
+            return self._parseBlameMsg(self._getBlameMsg(fileName, rev,
+                                                         options))
+        key = (cmt_info[0], fileName, tuple(options))
+
+        # Entries only store the owners of the lines, as a table of the
+        # commits and the index of the owning commit for every line. The
+        # source lines are read from the file in the repository.
+        entry = cache.get(key)
+        if entry is not None:
+            (commits, owners) = entry
+            src_lines = self._getBlameLines(cmt_info[0], fileName)
+            if src_lines is not None and len(src_lines) == len(owners):
+                cmt_lines = dict((str(line_num), commits[idx])
+                                 for (line_num, idx) in enumerate(owners))
+                return (cmt_lines, src_lines)
+
+        (cmt_lines, src_lines) = \
+            self._parseBlameMsg(self._getBlameMsg(fileName, rev, options))
+        commits = []
+        commit_index = {}
+        owners = []
+        for line_num in range(len(cmt_lines)):
+            cmt_id = cmt_lines[str(line_num)]
+            if cmt_id not in commit_index:
+                commit_index[cmt_id] = len(commits)
+                commits.append(cmt_id)
+            owners.append(commit_index[cmt_id])
+        cache.put(key, (commits, owners))
+
+        return (cmt_lines, src_lines)
+
+    def _getBlameLines(self, rev, fileName):
+        '''
+        Return the source lines of a file at revision rev as git blame
+        reports them (every line terminated by a newline), or None if
+        the file does not exist at rev
+        '''
+        content = self._getCatFile().blob(rev, fileName)
+        if content is None:
+            return None
+        src_lines = self._splitLines(content)
+        # git blame also terminates a last line without newline
+        if src_lines and not src_lines[-1].endswith("\n"):
+            src_lines[-1] += "\n"
+        return src_lines
+
+    def _getReplayedBlame(self, fileName, rev):
+        '''
+        Return the blame data (see _parseBlameMsg) of a file at revision
+        rev from the replayed line ownership, or None if the ownership
+        of the file at rev is not known
+        '''
+        owners = self._ownership.owners_at(self._resolveCommit(rev), fileName)
+        if owners is None:
+            return None
+
+        content = self._getCatFile().blob(rev, fileName)
+        if content is None:
+            return None
+        src_lines = self._splitLines(content)
+        if len(src_lines) != len(owners):
+            log.warning("Replayed ownership of {0} at {1} does not match "
+                        "the file, using git blame".format(fileName, rev))
+            return None
+
+        cmt_lines = dict((str(line_num), cmt_id) for (line_num, cmt_id)
+                         in enumerate(owners))
+        return (cmt_lines, src_lines)
+
+    def _getOwnershipCache(self):
+        if self.cache_dir is None:
+            return None
+        return DiskCache(self.cache_dir, "ownership")
+
+    def _replayOwnership(self, fnameList, keep_history=False):
+        '''
+        Compute the line ownership of the files in fnameList at the end
+        of the revision range by replaying the diffs of the range, so
+        that _getBlame need not run git blame for them.
+
+        The replay follows the first-parent history of the range and
+        ignores whitespace changes, like git blame -w without move and
+        copy detection; other blame tiers are rejected. Lines that merges add to the first parent are
+        attributed by git blame on the merge, and files that are not
+        known at the start of the range are seeded with git blame. The
+        ownership at the end of the range is stored in the ownership
+        cache, where the analysis of the following range finds it.
+        '''
+        # The replay has no move and copy detection, so its result
+        # only equals git blame for the plain tier
+        if self.blame_policy is None:
+            plain = self.blameOptions == ["-w"]
+        else:
+            plain = not self.blame_policy.depends_on_size() and \
+                self.blame_policy.options() == ["-w"]
+        if not plain:
+            raise ValueError("Replayed line ownership requires the plain "
+                             "blame tier (git blame -w) for all files")
+
+        start = None
+        if self.rev_start is not None:
+            start = self._resolveCommit(self.rev_start)
+        end = self._resolveCommit(self.rev_end)
+
+        # The seeded ownership depends on the blame options
+        if self.blame_policy is None:
+            seed_options = tuple(self.blameOptions)
+        else:
+            seed_options = repr(self.blame_policy)
+
+        cache = self._getOwnershipCache()
+        ownership = None
+        if cache is not None and start is not None:
+            ownership = cache.get((start, self.OWNERSHIP_CACHE_VERSION,
+                                   seed_options))
+        if ownership is None:
+            ownership = LineOwnership(start)
+        log.devinfo("Replaying line ownership of {0} files from {1} known "
+                    "files".format(len(fnameList), len(ownership)))
+
+        tracked = set(fnameList)
+
+        def seed(fileName, cmt_id):
+            (cmt_lines, _) = self._getBlame(fileName, cmt_id)
+            return [cmt_lines[str(line_num)]
+                    for line_num in range(len(cmt_lines))]
+
+        def blame_merge(cmt_id, fileName, ranges):
+            cmd = 'git --git-dir={0} blame'.format(self.repo).split()
+            cmd.append("-p")
+            cmd.extend(self._getBlameOptions(fileName, cmt_id))
+            for (start_line, count) in ranges:
+                cmd.append("-L{0},+{1}".format(start_line, count))
+            cmd.append(cmt_id)
+            cmd.append("--")
+            cmd.append(fileName)
+            return dict((line_num, owner) for (line_num, owner, _) in
+                        self._iterBlameEntries(execute_command_stream(cmd)))
 
-            #the lines we want to match start with a commit hash
-            if(self.cmtHashPattern.match( line[0] ) ):
+        ownership.replay(
+            execute_command_stream(replay_command(self.repo, start, end)),
+            tracked.__contains__, seed, blame_merge, keep_history)
 
-               lineNum    = str(int(line[2]) - 1)
-               commitHash = line[0]
+        if cache is not None and ownership.rev == end:
+            cache.put((end, self.OWNERSHIP_CACHE_VERSION, seed_options),
+                      ownership)
+        self._ownership = ownership
 
-               commitLineDict[lineNum] = commitHash
+    def getBlameCommits(self, fileName, rev, options):
+        '''
+        Return the ids of the commits to which git blame with the given
+        options attributes the lines of file fileName at revision rev
+        (one id per line, bypassing the blame cache)
+        '''
+        return [cmt_id for (_, cmt_id, _) in
+                self._iterBlameEntries(self._getBlameMsg(fileName, rev,
+                                                         options))]
 
-            # check for line of code, signaled by a tab character
-            elif line[0].startswith('\t'):
-               line[0] = line[0][1:] # remove tab character
-               codeLines.append(' '.join(line) + '\n')
+    def _parseBlameMsg(self, msg):
+        '''input a blame msg and the commitID under examination the
+        output contains code line numbers and corresponding commitID'''
 
+        #variable declarations
+        commitLineDict = {} #dictionary, key is line number, value is commit ID
+        codeLines      = [] # list of source code lines
+
+        for (lineNum, commitHash, srcLine) in self._iterBlameEntries(msg):
+            commitLineDict[str(lineNum)] = commitHash
+            codeLines.append(srcLine)
 
         return (commitLineDict, codeLines)
 
@@ -1144,6 +1978,7 @@ class gitVCS (VCS):
             self._fileCommit_dict = {}
 
         blameMsgCmtIds = set() #stores all commit Ids seen from blame messages
+        src_snapshots = [] #file contents for the code structure analysis
 
         if self._commit_dict is None:
             self._commit_dict = {}
@@ -1151,78 +1986,98 @@ class gitVCS (VCS):
         if len(fnameList) == 0:
             return
 
+        #commits of all files within the revision range
+        file_cmts = self._buildFileCommitIndex(self.rev_start, self.rev_end)
+
+        #Determine the revisions that git blame will be called on
+        if self.range_by_date:
+            #the revision where the last change was applied to each file
+            #up until the end of the analysis time window
+            blame_revs = self._buildCutoffIndex(fnameList, self.rev_end_date,
+                                                self.rev_start_date)
+        else:
+            #the final commit of the specified revision range
+            blame_revs = None
+
+        if self.line_ownership == "replay":
+            self._replayOwnership(fnameList, keep_history=not singleBlame)
+
+        def analyse(fname):
+            if blame_revs is None:
+                rev = self.rev_end
+            else:
+                rev = blame_revs.get(fname)
+            return self._analyseFile(fname, file_cmts.get(fname, []),
+                                     link_type, singleBlame, rev)
+
+        # Blame and structure analysis of a file are independent of all
+        # other files and mostly wait for subprocesses, so several files
+        # are analysed concurrently by a pool of threads. The results are
+        # merged in the order of fnameList.
+        if self.blame_jobs > 1:
+            log.devinfo("Analysing {0} files with {1} parallel blame jobs".
+                        format(len(fnameList), self.blame_jobs))
+            pool = ThreadPool(self.blame_jobs)
+            results = pool.imap(analyse, fnameList)
+        else:
+            pool = None
+            results = itertools.imap(analyse, fnameList)
+
         count = 0
         widgets = ['Blame Analysis: ', Percentage(), ' ', Bar(), ' ', ETA()]
         pbar = ProgressBar(widgets=widgets,
                            maxval=len(fnameList)).start()
 
-        for fname in fnameList:
-            count += 1
-            if count % 20 == 0:
-                pbar.update(count)
-
-            #create fileCommit object, one per filename to be
-            #stored in _fileCommit_dict
-            file_commit = fileCommit.FileCommit()
-            file_commit.filename = fname
-
-            #get commit objects for the given file within revision range
-            cmtList  = []
-            cmtList  = self.getFileCommits(fname, self.rev_start, self.rev_end)
-
-            #store commit hash in fileCommit object, store only the hash
-            #and then reference the commit db to get the object
-            file_commit.setCommitList([cmt.id for cmt in cmtList])
-
-            #store the commit object to the committerDB, the justification
-            #for splitting this way is to avoid redundant commit info
-            #since a commit can touch many files, we use the commit
-            #hash to reference the commit object (author, date etc)
-            self._commit_dict.update({cmt.id:cmt for cmt in cmtList
-             if cmt.id not in self._commit_dict})
-
-            #Determine the revision that git blame will be called on
-            if self.range_by_date:
-                #Find the revision where the last change was applied up until the
-                #the end of the analysis time window specified by a date
-                cmd = 'git --git-dir={0} log'.format(self.repo).split()
-                cmd.append("--until={0}".format(self.rev_end_date))
-                cmd.append("--format=%H")
-                cmd.append("--follow")
-                cmd.append("--diff-filter=ACMRTB")
-                cmd.append("-1")
-                cmd.append("--")
-                cmd.append(file_commit.filename)
-                rev = execute_command(cmd).strip()
-            else:
-                #Use revision that represents the final commit for the specified
-                #revision range
-                rev = self.rev_end
-
-            # Check if file has been deleted
-            cmd = "git --git-dir={0} ls-tree".format(self.repo).split()
-            cmd.append("--name-only")
-            cmd.append("--full-tree")
-            cmd.append("-r")
-            cmd.append(rev)
-            existing_files = execute_command(cmd).split()
-            if file_commit.filename in existing_files:
-                # retrieve blame data
-                if singleBlame: #only one set of blame data per file
-                    self._addBlameRev(rev, file_commit,
-                                      blameMsgCmtIds, link_type)
-                else: # get one set of blame data for every commit made
-                    # this option is computationally intensive thus the alternative
-                    # singleBlame option is possible when speed is a higher
-                    # priority than precision
-                    [self._addBlameRev(cmt.id, file_commit,
-                                       blameMsgCmtIds, link_type) for cmt in cmtList]
-
-                #store fileCommit object to dictionary
-                self._fileCommit_dict[fname] = file_commit
+        try:
+            for (fname, (file_commit, blame_ids, snapshots)) in \
+                    itertools.izip(fnameList, results):
+                count += 1
+                if count % 20 == 0:
+                    pbar.update(count)
+
+                #store the commit object to the committerDB, the
+                #justification for splitting this way is to avoid
+                #redundant commit info since a commit can touch many
+                #files, we use the commit hash to reference the commit
+                #object (author, date etc)
+                self._commit_dict.update({cmt.id:cmt for cmt
+                                          in file_cmts.get(fname, [])
+                                          if cmt.id not in self._commit_dict})
+
+                if file_commit is not None:
+                    #store fileCommit object to dictionary
+                    self._fileCommit_dict[fname] = file_commit
+                    blameMsgCmtIds.update(blame_ids)
+                    src_snapshots.extend(snapshots)
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+            self._ownership = None
 
         #end for fnameList
         pbar.finish()
+        self._tree_files = {}
+
+        if self._getBlameCache() is not None:
+            log.info(self._blame_cache.stats())
+
+        # locate the functions or features of all files with one ctags
+        # or cppstats run instead of one run per file. The analysers
+        # share one snapshot of the files at the end of the range.
+        if src_snapshots:
+            self._snapshot = RevisionSnapshot(
+                self.repo, None if self.range_by_date else self.rev_end,
+                [file_commit.filename for (_, file_commit, _)
+                 in src_snapshots])
+            try:
+                if link_type == LinkType.proximity:
+                    self._getFunctionLinesBatch(src_snapshots)
+                else:
+                    self._getFeatureLinesBatch(src_snapshots)
+            finally:
+                self._snapshot.cleanup()
+                self._snapshot = None
 
         #-------------------------------
         #capture old commits
@@ -1261,7 +2116,143 @@ class gitVCS (VCS):
 
                 pbar.finish()
 
-    def _addBlameRev(self, rev, file_commit, blame_cmt_ids, link_type):
+    def _analyseFile(self, fname, cmtList, link_type, singleBlame, rev):
+        """Compute the blame data and code structure of a single file
+        at revision rev (None if the file has no such revision).
+
+        Returns a tuple of the fileCommit instance (None if the file does
+        not exist at the end of the revision range), the set of commit
+        ids found in the blame data and a list of source snapshots whose
+        code structure remains to be analysed (see _addBlameRev).
+        """
+        blame_cmt_ids = set()
+        src_snapshots = []
+
+        #create fileCommit object, one per filename to be
+        #stored in _fileCommit_dict
+        file_commit = fileCommit.FileCommit()
+        file_commit.filename = fname
+
+        #store commit hash in fileCommit object, store only the hash
+        #and then reference the commit db to get the object
+        file_commit.setCommitList([cmt.id for cmt in cmtList])
+
+        # Check if file has been deleted
+        if rev is None or file_commit.filename not in self._getTreeFiles(rev):
+            return (None, blame_cmt_ids, src_snapshots)
+
+        # retrieve blame data
+        if singleBlame: #only one set of blame data per file
+            self._addBlameRev(rev, file_commit, blame_cmt_ids, link_type,
+                              src_snapshots)
+        else: # get one set of blame data for every commit made
+            # this option is computationally intensive thus the alternative
+            # singleBlame option is possible when speed is a higher
+            # priority than precision
+            [self._addBlameRev(cmt.id, file_commit, blame_cmt_ids,
+                               link_type, src_snapshots) for cmt in cmtList]
+
+        return (file_commit, blame_cmt_ids, src_snapshots)
+
+    def _buildCutoffIndex(self, fnameList, date, since=None):
+        """Map the files in fnameList to the last commit until date that
+        added or changed them.
+
+        The result is the same as that of one git log --until=<date>
+        --follow --diff-filter=ACMRTB -1 call per file. The files are
+        first looked up in a single git log pass over the commits between
+        since (usually the start of the analysed range) and date, which
+        stops as soon as all files are found. Since --until also keeps
+        --follow from tracking renames after date, only the name a file
+        has at date is matched; earlier renames need not be followed, as
+        the rename itself is the last commit that adds the name. Files
+        that are not found in this pass, for instance because they were
+        only deleted within the range, are looked up with --follow one by
+        one. (Only the history simplification of path limited git log
+        calls may hide commits on side branches that the single pass
+        reports.) Files without such a commit are not contained in the
+        result.
+        """
+        cmd = 'git --git-dir={0} log -M --name-status'.format(self.repo).split()
+        cmd.append("--until={0}".format(date))
+        if since is not None:
+            cmd.append("--since={0}".format(since))
+        cmd.append("--diff-filter=ACMRTB")
+        cmd.append("--format=%x00%H")
+
+        missing = set(fnameList)
+        res = {}
+        cmt_id = None
+        output = execute_command_stream(cmd)
+        try:
+            for line in output:
+                if line.startswith("\0"):
+                    cmt_id = line[1:]
+                    continue
+                if not line:
+                    continue
+
+                # For renames, only the new name is changed: --follow
+                # reports the rename as deletion of the old name
+                path = unquote_path(line.split("\t")[-1])
+                if path in missing:
+                    missing.remove(path)
+                    res[path] = cmt_id
+                    if not missing:
+                        break
+        finally:
+            output.close()
+
+        if since is not None and missing:
+            log.devinfo("Following {0} files beyond {1}".
+                        format(len(missing), since))
+            missing = sorted(missing)
+            cmds = []
+            for fname in missing:
+                cmd = 'git --git-dir={0} log'.format(self.repo).split()
+                cmd.append("--until={0}".format(date))
+                cmd.append("--format=%H")
+                cmd.append("--follow")
+                cmd.append("--diff-filter=ACMRTB")
+                cmd.append("-1")
+                cmd.append("--")
+                cmd.append(fname)
+                cmds.append(cmd)
+            with CommandExecutor(self.blame_jobs) as executor:
+                for (fname, rev) in zip(missing, executor.imap(cmds)):
+                    rev = rev.strip()
+                    if rev:
+                        res[fname] = rev
+
+        log.devinfo("Found the last commits until {0} of {1} of {2} files".
+                    format(date, len(res), len(fnameList)))
+        return res
+
+    def _getTreeFiles(self, rev):
+        """Return the set of all file names in revision rev.
+
+        The file lists are cached per revision, so that the tree needs
+        to be read only once for all files of a revision range.
+        """
+        if rev not in self._tree_files:
+            entries = self._getCatFile().tree(rev)
+            if entries is None:
+                log.warning("Revision {0} has no tree".format(rev))
+                entries = []
+            self._tree_files[rev] = set(path for (_, _, _, path) in entries)
+
+        return self._tree_files[rev]
+
+    def _splitLines(self, content):
+        '''Split file content into lines as git blame does.'''
+        # git only breaks lines at newline characters
+        src_lines = [line + "\n" for line in content.split("\n")]
+        if content.endswith("\n") or not content:
+            src_lines.pop()
+        return src_lines
+
+    def _addBlameRev(self, rev, file_commit, blame_cmt_ids, link_type,
+                     src_snapshots=None):
         '''
         saves the git blame output of a revision for a particular file
         '''
@@ -1271,28 +2262,47 @@ class gitVCS (VCS):
         fname: string of a filename to call git blame on
         file_commit: a fileCommit object to store the resulting blame data
         blame_cmt_ids: a list to keep track of all commit ids seen in the blame
+        src_snapshots: if given, the source code of the file is appended as
+                       (rev, file_commit, src_lines) to this list instead of
+                       computing the function lines of the file right away,
+                       so that the structure of all files can be analysed
+                       in one go (see _getFunctionLinesBatch and
+                       _getFeatureLinesBatch)
         '''
 
-        #query git reppository for blame message
-        blameMsg = self._getBlameMsg(file_commit.filename, rev)
-
-        #parse the blame message, this extracts the line number
-        #and corresponding commit hash, returns a dictionary
+        #query git reppository for blame message and parse it, this
+        #extracts the line number and corresponding commit hash,
+        #returns a dictionary
         #Key = line number, value = commit hash
         #basically a snapshot of what the file looked like
         #at the time of the commit
-        (cmt_lines, src_lines) = self._parseBlameMsg(blameMsg)
+        (cmt_lines, src_lines) = self._getBlame(file_commit.filename, rev)
 
         #store the dictionary to the fileCommit Object
         file_commit.addFileSnapShot(rev, cmt_lines)
 
+        #the structure analysers work on the file content as stored in
+        #the repository instead of the content reconstructed from blame
+        if link_type in (LinkType.proximity, LinkType.feature_file,
+                         LinkType.feature):
+            content = self._getCatFile().blob(rev, file_commit.filename)
+            if content is not None:
+                src_lines = self._splitLines(content)
+
         # locate all function lines in the file
         if link_type == LinkType.proximity:
             # separate the file commits into code structures
-            self._getFunctionLines(src_lines, file_commit)
+            if src_snapshots is None:
+                self._getFunctionLines(src_lines, file_commit)
+            else:
+                src_snapshots.append((rev, file_commit, src_lines))
         elif link_type in (LinkType.feature_file, LinkType.feature):
-            file_commit.set_feature_infos(
-                get_feature_lines_from_file(src_lines, file_commit.filename))
+            if src_snapshots is None:
+                file_commit.set_feature_infos(
+                    get_feature_lines_from_file(src_lines,
+                                                file_commit.filename))
+            else:
+                src_snapshots.append((rev, file_commit, src_lines))
 
         # else: do not separate file commits into code structures,
         #       this will result in all commits to a single file seen as
@@ -1301,54 +2311,53 @@ class gitVCS (VCS):
         blame_cmt_ids.update( cmt_lines.values() )
 
     def _parseSrcFileDoxygen(self, src_file):
-        log.debug("Running Doxygen analysis")
+        return self._parseSrcFilesDoxygen([src_file])[src_file]
+
+    def _parseSrcFilesDoxygen(self, src_files):
+        '''
+        runs doxygen once on a list of source files and returns a dictionary
+        that maps each file name to a tuple of its function lines and
+        its list of source code elements
+        '''
+        log.debug("Running Doxygen analysis on {0} files".
+                  format(len(src_files)))
         curr_dir = os.path.dirname(os.path.abspath(__file__))
         conf_file = os.path.join(curr_dir, 'doxygen.conf')
         tmp_outdir = tempfile.mkdtemp()
-        file_analysis = sourceAnalysis.FileAnalysis(src_file,
-                                                    conf_file,
-                                                    tmp_outdir)
+        batch_analysis = sourceAnalysis.BatchAnalysis(src_files,
+                                                      conf_file,
+                                                      tmp_outdir)
 
         try:
-            file_analysis.run_analysis()
+            batch_analysis.run_analysis()
         except Exception, e:
             log.critical("doxygen analysis error{0} - defaulting to Ctags".format(e))
-            return {}, []
-
-        # Delete tmp directory storing doxygen files
-        shutil.rmtree(tmp_outdir)
-
-        # Get src element bounds
-        func_lines = {}
-        for elem in file_analysis.src_elem_list:
-            # Doxygen analysis index starts at 1
-            start = int(elem['bodystart']) - 1
-            end = int(elem['bodyend']) - 1
-            name = elem['name']
-            f_lines = {line_num:name  for line_num in range(start, end+1)}
-            func_lines.update(f_lines)
-
-        return func_lines, file_analysis.src_elem_list
-
-    def _parseSrcFileCtags(self, src_file):
-        # temporary file where we write transient data needed for ctags
-        tag_file = tempfile.NamedTemporaryFile()
-
-        # run ctags analysis on the file to create a tags file
-        cmd = "ctags-exuberant -f {0} --fields=nk {1}".format(tag_file.name,
-                                                              src_file).split()
-        output = execute_command(cmd).splitlines()
-
-        # parse ctags
-        try:
-            tags = CTags(tag_file.name)
-        except:
-            log.critical("failure to load ctags file")
-            raise Error("failure to load ctags file")
-
-        # locate line numbers and structure names
-        entry = TagEntry()
-        func_lines = {}
+            return {src_file:({}, []) for src_file in src_files}
+        finally:
+            # Delete tmp directory storing doxygen files
+            shutil.rmtree(tmp_outdir)
+
+        res = {}
+        for src_file in src_files:
+            # Get src element bounds
+            func_lines = {}
+            src_elem_list = batch_analysis.src_elems[src_file]
+            for elem in src_elem_list:
+                # Doxygen analysis index starts at 1
+                start = int(elem['bodystart']) - 1
+                end = int(elem['bodyend']) - 1
+                name = elem['name']
+                f_lines = {line_num:name  for line_num in range(start, end+1)}
+                func_lines.update(f_lines)
+            res[src_file] = (func_lines, src_elem_list)
+
+        return res
+
+    def _ctagsStructures(self, src_file):
+        '''
+        returns the ctags kinds of the language structures that are
+        identified in the given source file
+        '''
         # select the language structures we are interested in identifying
         # f = functions, s = structs, c = classes, n = namespace
         # p = function prototype, g = enum, d = macro, t= typedef, u = union
@@ -1367,8 +2376,51 @@ class gitVCS (VCS):
         elif fileExt in (".py"):
             structures.append("m") # class members
 
+        return structures
+
+    def _parseSrcFileCtags(self, src_file):
+        return self._parseSrcFilesCtags([src_file]).get(src_file, {})
+
+    def _parseSrcFilesCtags(self, src_files):
+        '''
+        runs ctags once on a list of source files and returns a dictionary
+        that maps each file name to its function lines (a dictionary with
+        key = line number and value = structure name)
+        '''
+        func_lines = {src_file:{} for src_file in src_files}
+        if not src_files:
+            return func_lines
+
+        # temporary files where we write transient data needed for ctags
+        tag_file = tempfile.NamedTemporaryFile()
+        list_file = tempfile.NamedTemporaryFile()
+        for src_file in src_files:
+            list_file.write(src_file + "\n")
+        list_file.flush()
+
+        # run ctags analysis on all files to create one tags file
+        cmd = "ctags-exuberant -f {0} --fields=nk -L {1}".format(
+            tag_file.name, list_file.name).split()
+        output = execute_command(cmd).splitlines()
+
+        # parse ctags
+        try:
+            tags = CTags(tag_file.name)
+        except:
+            log.critical("failure to load ctags file")
+            raise Error("failure to load ctags file")
+
+        # locate line numbers and structure names
+        entry = TagEntry()
+        structures = {src_file:self._ctagsStructures(src_file)
+                      for src_file in src_files}
+
         while(tags.next(entry)):
-            if entry['kind'] in structures:
+            src_file = entry['file']
+            if src_file not in func_lines:
+                continue
+
+            if entry['kind'] in structures[src_file]:
                 ## Ctags indexes starting at 1
                 line_num = int(entry['lineNumber']) - 1
 
@@ -1376,10 +2428,11 @@ class gitVCS (VCS):
                 if line_num < 0:
                     line_num = 0
 
-                func_lines[line_num] = entry['name']
+                func_lines[src_file][line_num] = entry['name']
 
         # clean up temporary files
         tag_file.close()
+        list_file.close()
 
         return func_lines
 
@@ -1393,52 +2446,263 @@ class gitVCS (VCS):
                     programming language (ie. file.c is a c-language file)
         file_layout_scr: dictionary with key=line number value = line of code
         file_commit: fileCommit instance where the results will be stored
+        '''
+        self._getFunctionLinesBatch([(None, file_commit, file_layout_src)])
 
-        - Description -
-        The file_layout is used to construct a source code file that can be
-        parsed by ctags to generate a ctags file. The ctags file is then
-        accessed to extract the function tags and line numbers to be save in
-        the fileCommit object
+    def _getFunctionLinesBatch(self, src_snapshots):
+        '''
+        computes the line numbers of each function for a list of files
         '''
+        '''
+        - Input -
+        src_snapshots: list of tuples (rev, file_commit, file_layout_src),
+                       where file_layout_src is the list of source code
+                       lines of the file file_commit.filename at revision
+                       rev. The results are stored in file_commit.
 
-        # grab the file extension to determine the language of the file
-        fileExt = os.path.splitext(file_commit.filename)[1].lower()
-
-        # setup temp file
-        # generate a source code file from the file_layout_src dictionary
-        # and save it to a temporary location
-        srcFile = tempfile.NamedTemporaryFile(suffix=fileExt)
-        for line in file_layout_src:
-            srcFile.write(line)
-        srcFile.flush()
-
-        # For certain programming languages we can use doxygen for a more
-        # precise analysis
-        func_lines = {}
-        if (fileExt in ['.java', '.cs', '.d', '.php', '.php4', '.php5',
-                        '.inc', '.phtml', '.m', '.mm', '.py', '.f',
-                        '.for', '.f90', '.idl', '.ddl', '.odl', '.tcl',
-                        '.cpp', '.cxx', '.c', '.cc']):
-            func_lines, src_elems = self._parseSrcFileDoxygen(srcFile.name)
-            file_commit.setSrcElems(src_elems)
-            file_commit.doxygen_analysis = True
-
-        if not func_lines: # for everything else use Ctags
-            func_lines = self._parseSrcFileCtags(srcFile.name)
-            file_commit.doxygen_analysis = False
-
-        # clean up src temp file
-        srcFile.close()
+        - Description -
+        The structures of files whose content has already been analysed
+        are taken from the structure cache (if enabled). The remaining
+        files are analysed by _analyseFunctionStructures, and the
+        function tags, line numbers and implementations are then saved
+        in the fileCommit objects.
+        '''
+        structures = self._getCachedStructures("functions", src_snapshots,
+                                               ["ctags-exuberant", "doxygen"])
+        missing = [i for (i, structure) in enumerate(structures)
+                   if structure is None]
+        if missing:
+            analysed = self._analyseFunctionStructures(
+                [src_snapshots[i] for i in missing])
+            for (i, structure) in itertools.izip(missing, analysed):
+                structures[i] = structure
+            self._putCachedStructures("functions",
+                                      [src_snapshots[i] for i in missing],
+                                      analysed, ["ctags-exuberant", "doxygen"])
+
+        for (structure, (_, file_commit, _)) in \
+                itertools.izip(structures, src_snapshots):
+            if structure["src_elems"] is not None:
+                file_commit.setSrcElems(structure["src_elems"])
+            file_commit.doxygen_analysis = structure["doxygen_analysis"]
+
+            # save result to the file commit instance
+            file_commit.setFunctionLines(structure["func_lines"])
+            file_commit.setFuncImpl(structure["func_impl"])
+
+    def _analyseFunctionStructures(self, src_snapshots):
+        '''
+        analyses the function structure of a list of files and returns a
+        list of dictionaries with the function lines, source elements,
+        doxygen flag and function implementations of each file
+        '''
+        '''
+        - Input -
+        src_snapshots: list of tuples (rev, file_commit, file_layout_src),
+                       see _getFunctionLinesBatch
 
-        # save result to the file commit instance
-        file_commit.setFunctionLines(func_lines)
+        - Description -
+        The analysers read the files from the revision snapshot of the
+        analysed range (see _prepareFileCommitList), or from a temporary
+        snapshot if there is none. Files of languages supported by
+        doxygen are analysed with one doxygen run per revision, all other
+        files (and the files for which doxygen did not find any
+        structures) are parsed by a single ctags run.
+        '''
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = RevisionSnapshot(self.repo, None, ())
 
-        # save the implementation for each function
+        try:
+            src_files = [snapshot.path(rev, file_commit.filename,
+                                       "".join(file_layout_src))
+                         for (rev, file_commit, file_layout_src)
+                         in src_snapshots]
+
+            # For certain programming languages we can use doxygen for a more
+            # precise analysis
+            doxygen_files = {}
+            for (src_file, (rev, file_commit, _)) in zip(src_files,
+                                                         src_snapshots):
+                fileExt = os.path.splitext(file_commit.filename)[1].lower()
+                if (fileExt in ['.java', '.cs', '.d', '.php', '.php4', '.php5',
+                                '.inc', '.phtml', '.m', '.mm', '.py', '.f',
+                                '.for', '.f90', '.idl', '.ddl', '.odl', '.tcl',
+                                '.cpp', '.cxx', '.c', '.cc']):
+                    doxygen_files.setdefault(rev, []).append(src_file)
+
+            doxygen_res = {}
+            for rev_files in doxygen_files.itervalues():
+                doxygen_res.update(self._parseSrcFilesDoxygen(rev_files))
+
+            func_lines = []
+            src_elems = []
+            for src_file in src_files:
+                (lines, elems) = doxygen_res.get(src_file, ({}, None))
+                func_lines.append(lines)
+                src_elems.append(elems)
+
+            # for everything else use Ctags
+            ctags_files = [src_file for (src_file, lines)
+                           in zip(src_files, func_lines) if not lines]
+            ctags_lines = self._parseSrcFilesCtags(ctags_files)
+        finally:
+            if snapshot is not self._snapshot:
+                snapshot.cleanup()
+
+        structures = []
         rmv_char = '[.{}();:\[\]]'
-        for line_num, src_line in enumerate(file_layout_src):
-            src_line_rmv = re.sub(rmv_char, ' ', src_line.strip())
-            file_commit.addFuncImplLine(line_num, src_line_rmv)
+        for (src_file, lines, elems, (_, file_commit, file_layout_src)) in \
+                zip(src_files, func_lines, src_elems, src_snapshots):
+            doxygen_analysis = elems is not None
+            if not lines:
+                lines = ctags_lines[src_file]
+                doxygen_analysis = False
+
+            # compute the implementation for each function
+            file_structure = fileCommit.FileCommit()
+            file_structure.doxygen_analysis = doxygen_analysis
+            file_structure.setFunctionLines(lines)
+            for line_num, src_line in enumerate(file_layout_src):
+                src_line_rmv = re.sub(rmv_char, ' ', src_line.strip())
+                file_structure.addFuncImplLine(line_num, src_line_rmv)
+
+            structures.append({"func_lines": lines,
+                               "src_elems": elems,
+                               "doxygen_analysis": doxygen_analysis,
+                               "func_impl": file_structure.functionImpl})
+
+        return structures
+
+    def _getFeatureLinesBatch(self, src_snapshots):
+        '''
+        computes the feature sets and feature expressions of each line
+        for a list of (rev, file_commit, file_layout_src) tuples (see
+        _getFunctionLinesBatch), with one cppstats run per revision
+        for all files that are not found in the structure cache
+        '''
+        structures = self._getCachedStructures("features", src_snapshots,
+                                               ["cppstats"])
+        missing = [i for (i, structure) in enumerate(structures)
+                   if structure is None]
 
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = RevisionSnapshot(self.repo, None, ())
+
+        feature_infos = {}
+        try:
+            rev_files = {}
+            for i in missing:
+                (rev, file_commit, file_layout_src) = src_snapshots[i]
+                src_file = snapshot.path(rev, file_commit.filename,
+                                         "".join(file_layout_src))
+                rev_files.setdefault(rev, []).append((src_file,
+                                                      file_commit.filename))
+
+            for (rev, src_files) in rev_files.iteritems():
+                log.devinfo("Running cppstats on {0} files of revision {1}".
+                            format(len(src_files), rev))
+                for (filename, infos) in get_feature_lines_from_files(
+                        src_files, snapshot.root).iteritems():
+                    feature_infos[(rev, filename)] = infos
+        finally:
+            if snapshot is not self._snapshot:
+                snapshot.cleanup()
+
+        if missing:
+            for i in missing:
+                (rev, file_commit, _) = src_snapshots[i]
+                structures[i] = feature_infos[(rev, file_commit.filename)]
+            self._putCachedStructures("features",
+                                      [src_snapshots[i] for i in missing],
+                                      [structures[i] for i in missing],
+                                      ["cppstats"])
+
+        for (structure, (_, file_commit, _)) in \
+                itertools.izip(structures, src_snapshots):
+            file_commit.set_feature_infos(structure)
+
+    def _getStructureCache(self):
+        with self._lazy_lock:
+            if self._structure_cache is None and self.cache_dir is not None:
+                self._structure_cache = DiskCache(self.cache_dir,
+                                                  "structure")
+            return self._structure_cache
+
+    def _hasTrailerKeys(self):
+        '''
+        returns True if git supports %(trailers:key=...), which needs
+        git 2.22 or newer
+        '''
+        match = re.search(r'(\d+)\.(\d+)', self._getToolVersion("git") or "")
+        return match is not None and \
+            (int(match.group(1)), int(match.group(2))) >= (2, 22)
+
+    def _getLogFormat(self):
+        '''
+        returns the --format argument of git log and git show: the same
+        as --format=full, plus the sign-off trailers if git supports them
+        '''
+        trailers = ""
+        if self._hasTrailerKeys():
+            trailers = "%+(trailers:{0},unfold,separator=%x0a)".format(
+                ",".join(["key=" + tag for tag in self.signOffTags]))
+        return ("--format=format:commit %H%nAuthor: %aN <%aE>%n"
+                "Commit: %cN <%cE>{0}%n%n%w(0,4,4)%B".format(trailers))
+
+    def _getToolVersion(self, tool):
+        '''
+        returns the version string reported by an external analysis tool
+        (None if the tool cannot be executed)
+        '''
+        if tool not in self._tool_versions:
+            try:
+                output = execute_command([tool, "--version"],
+                                         ignore_errors=True).strip()
+                version = output.splitlines()[0] if output else ""
+            except OSError:
+                version = None
+            self._tool_versions[tool] = version
+
+        return self._tool_versions[tool]
+
+    def _structureCacheKey(self, analyser, filename, file_layout_src, tools):
+        # The result of the analysis depends on the content of the file,
+        # the analysis tools and their versions, and on the language of
+        # the file, which is determined by its extension
+        return (blob_id("".join(file_layout_src)), analyser,
+                self.STRUCTURE_CACHE_VERSION,
+                tuple((tool, self._getToolVersion(tool)) for tool in tools),
+                os.path.splitext(filename)[1].lower())
+
+    def _getCachedStructures(self, analyser, src_snapshots, tools):
+        '''
+        returns a list with the cached structure of every snapshot in
+        src_snapshots, or None for snapshots that are not in the cache
+        '''
+        cache = self._getStructureCache()
+        if cache is None:
+            return [None] * len(src_snapshots)
+
+        structures = [cache.get(self._structureCacheKey(analyser,
+                                                        file_commit.filename,
+                                                        file_layout_src,
+                                                        tools))
+                      for (_, file_commit, file_layout_src) in src_snapshots]
+        log.info(cache.stats())
+        return structures
+
+    def _putCachedStructures(self, analyser, src_snapshots, structures, tools):
+        cache = self._getStructureCache()
+        if cache is None:
+            return
+
+        for (structure, (_, file_commit, file_layout_src)) in \
+                itertools.izip(structures, src_snapshots):
+            cache.put(self._structureCacheKey(analyser, file_commit.filename,
+                                              file_layout_src, tools),
+                      structure)
 
     def cmtHash2CmtObj(self, cmtHash):
         '''
@@ -1447,12 +2711,19 @@ class gitVCS (VCS):
         such as author, committer and date
         '''
 
-        #query git for log information on this particular cmtHash
-        logMsg = self._getSingleCommitInfo(cmtHash)
-
-        #create commit object from the log message
-        cmtObj = self._Logstring2Commit(logMsg[0])
+        #query the object server for the commit header
+        cmt_info = self._getCatFile().commit(cmtHash)
+        if cmt_info is None:
+            #fall back to git log, which reports unknown revisions
+            logMsg = self._getSingleCommitInfo(cmtHash)
+            return self._Logstring2Commit(logMsg[0])
 
+        #create commit object from the commit header
+        cmtObj = commit.Commit()
+        cmtObj.cdate = cmt_info["committer_time"]
+        cmtObj.id = cmt_info["id"]
+        cmtObj.adate = cmt_info["author_time"]
+        cmtObj.adate_tz = int(cmt_info["author_tz"])
 
         return cmtObj
 
@@ -1480,29 +2751,98 @@ class gitVCS (VCS):
         -- Input --
         directories - a list of paths to limit the search for filenames
         '''
-        cmd_base = 'git --git-dir={0} diff-tree'.format(self.repo).split()
-        cmd_base.append("--diff-filter=ACMRTB")
-        cmd_base.append("--no-commit-id")
-        cmd_base.append("--name-only")
-        cmd_base.append("-r")
-
-        #get all files touched by all commits
-        all_files = set()
-        for cmt_id in cmt_id_list:
-            cmd = cmd_base + [cmt_id]
-            cmt_files = execute_command(cmd).splitlines()
-            all_files.update(cmt_files)
-
-        #filter results to only get implementation files
-        fileExt = (".c", ".cc", ".cpp", ".cxx", ".cs", ".asmx", ".m", ".mm",
-                   ".js", ".java", ".j", ".jav", ".php",".py", ".sh", ".rb",
-                   '.d', '.php4', '.php5', '.inc', '.phtml', '.m', '.mm',
-                   '.f', '.for', '.f90', '.idl', '.ddl', '.odl', '.tcl')
-
-        fileNames = [fileName for fileName in all_files if
-                     fileName.lower().endswith(fileExt)]
-
-        self.setFileNames(fileNames)
+        #a single diff-tree process reads all commit ids from stdin
+        cmd = 'git --git-dir={0} diff-tree'.format(self.repo).split()
+        cmd.append("--stdin")
+        cmd.append("--diff-filter=ACMRTB")
+        cmd.append("--no-commit-id")
+        cmd.append("--name-only")
+        cmd.append("-r")
+        cmd.extend(self._getPathspecArgs())
+
+        #get all implementation files touched by all commits
+        fileNames = set()
+        if cmt_id_list:
+            output = execute_command_stream(
+                cmd, input_data="\n".join(cmt_id_list) + "\n")
+            for fileName in output:
+                if fileName.lower().endswith(self.IMPLEMENTATION_FILE_EXT):
+                    fileNames.add(fileName)
+
+        if self.path_filter is not None and \
+                self.path_filter.max_blob_size is not None:
+            fileNames = self._filterBlobSizes(fileNames)
+
+        self.setFileNames(sorted(fileNames))
+
+    def _getPathspecArgs(self):
+        '''Return the git arguments that apply the configured patterns.'''
+        if self.path_filter is None or not self.path_filter.pathspecs():
+            return []
+        return ["--"] + self.path_filter.pathspecs()
+
+    def _prepareFileTouchList(self):
+        '''
+        Record the implementation files that the commits of the revision
+        range touch, together with the number of changed lines, from a
+        single git log run. The file_touch link type uses them instead
+        of the blame data of the files.
+        '''
+        cmd = 'git --git-dir={0} log --no-merges -M --numstat'.\
+            format(self.repo).split()
+        cmd.append("--format=%x00%H")
+        cmd.extend(self._getRevRangeArgs(self.rev_start, self.rev_end))
+        cmd.extend(self._getPathspecArgs())
+
+        file_touches = {}
+        cmt_id = None
+        for line in execute_command_stream(cmd):
+            if line.startswith("\0"):
+                cmt_id = line[1:]
+                continue
+            if not line:
+                continue
+
+            # Binary files list "-" as line counts. Renamed files are
+            # recorded under their new name.
+            (added, deleted, path) = line.split("\t", 2)
+            fileName = parse_numstat_path(path)[-1]
+            if not fileName.lower().endswith(self.IMPLEMENTATION_FILE_EXT):
+                continue
+            file_touches.setdefault(fileName, []).append(
+                (cmt_id, int(added) if added != "-" else 0,
+                 int(deleted) if deleted != "-" else 0))
+
+        if self.path_filter is not None and \
+                self.path_filter.max_blob_size is not None:
+            for fileName in set(file_touches) - \
+                    self._filterBlobSizes(file_touches):
+                del file_touches[fileName]
+
+        log.devinfo("Commits of the range touch {0} implementation files".
+                    format(len(file_touches)))
+        self._fileTouch_dict = file_touches
+
+    def _filterBlobSizes(self, fileNames):
+        '''
+        Return the files whose blobs at the end of the revision range
+        do not exceed the maximum blob size of the path filter. Files
+        that do not exist at the end of the range are kept.
+        '''
+        rev = self.rev_end
+        res = set()
+        for fileName in fileNames:
+            info = self._getCatFile().info("{0}:{1}".format(rev, fileName))
+            if info is None or self.path_filter.size_ok(info[2]):
+                res.add(fileName)
+            else:
+                log.devinfo("Skipping {0} ({1} bytes)".format(fileName,
+                                                               info[2]))
+
+        if len(res) < len(fileNames):
+            log.info("Skipping {0} files larger than {1} bytes".format(
+                len(fileNames) - len(res), self.path_filter.max_blob_size))
+        return res
 
 
 
@@ -0,0 +1,155 @@
+## This file is part of Codeface. Codeface is free software: you can
+## redistribute it and/or modify it under the terms of the GNU General Public
+## License as published by the Free Software Foundation, version 2.
+##
+## This program is distributed in the hope that it will be useful, but WITHOUT
+## ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+## FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+## details.
+##
+## You should have received a copy of the GNU General Public License
+## along with this program; if not, write to the Free Software
+## Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+##
+## Copyright 2026 by agent <agent@local>
+## All Rights Reserved.
+'''
+Blame tiers that trade the fidelity of git blame for speed
+
+The move and copy detection of git blame (-M, -C) attributes code that
+was moved or copied to its original commit, but copy detection can make
+a blame an order of magnitude slower on large files. A BlamePolicy
+selects the tier for every file, by default for all files and optionally
+depending on the file size. compare_blame_tiers measures the cost and
+the attribution differences of two tiers on a sample of files.
+'''
+
+import logging; log = logging.getLogger(__name__)
+import random
+from collections import OrderedDict
+from time import time
+
+from codeface.configuration import ConfigurationError
+from codeface.VCS import gitVCS
+from codeface.util import execute_command
+
+# Options of git blame for every tier, in the order of increasing
+# fidelity (and cost). Whitespace changes are always ignored.
+BLAME_TIERS = OrderedDict((
+    ("plain", ["-w"]),
+    ("move", ["-w", "-M"]),
+    ("copy", ["-w", "-C", "-M"]),
+    ("deep-copy", ["-w", "-C", "-C", "-M"]),
+))
+
+# Tier used unless configured otherwise (the historic blame options)
+DEFAULT_BLAME_TIER = "copy"
+
+
+class BlamePolicy(object):
+    '''
+    Selection of the blame tier for every file
+
+    tier is the tier used for all files. size_tiers optionally maps file
+    sizes (in bytes) to tiers: files of at least this size are blamed
+    with the tier of the largest size that they reach.
+    '''
+
+    def __init__(self, tier=DEFAULT_BLAME_TIER, size_tiers=None):
+        self.tier = tier
+        self.size_tiers = sorted((size_tiers or {}).items())
+        for name in [tier] + [name for (_, name) in self.size_tiers]:
+            if name not in BLAME_TIERS:
+                raise ValueError("Unknown blame tier '{0}' (known tiers: "
+                                 "{1})".format(name, ", ".join(BLAME_TIERS)))
+
+    @classmethod
+    def from_conf(cls, conf):
+        '''
+        Return the policy of the configuration keys blame_tier and
+        blame_size_tiers, e.g.
+
+            blame_tier: copy
+            blame_size_tiers:
+                100000: move
+                1000000: plain
+        '''
+        try:
+            return cls(conf.get("blame_tier", DEFAULT_BLAME_TIER),
+                       dict((int(size), tier) for (size, tier) in
+                            (conf.get("blame_size_tiers") or {}).items()))
+        except ValueError as e:
+            log.critical("Invalid blame configuration: {0}".format(e))
+            raise ConfigurationError("Invalid blame configuration.")
+
+    def depends_on_size(self):
+        return bool(self.size_tiers)
+
+    def tier_for_size(self, size):
+        tier = self.tier
+        for (min_size, name) in self.size_tiers:
+            if size < min_size:
+                break
+            tier = name
+        return tier
+
+    def options(self, size=None):
+        '''Return the git blame options for a file of the given size.'''
+        if size is None:
+            return BLAME_TIERS[self.tier]
+        return BLAME_TIERS[self.tier_for_size(size)]
+
+    def __repr__(self):
+        return "BlamePolicy({0!r}, {1!r})".format(self.tier,
+                                                  dict(self.size_tiers))
+
+
+def compare_blame_tiers(repo, tier_a, tier_b, rev="HEAD", sample_size=20,
+                        seed=None):
+    '''
+    Blame a random sample of the files of revision rev in repo with two
+    tiers, and report the wall time of both tiers and the fraction of
+    lines that they attribute to different commits.
+
+    Returns a dictionary with the keys "files", "lines", "differing"
+    (the number of lines with differing attributions), "time_a" and
+    "time_b" (in seconds).
+    '''
+    git = gitVCS()
+    git.setRepository(repo)
+
+    cmd = 'git --git-dir={0} ls-tree -r -z'.format(repo).split()
+    cmd.append(rev)
+    filenames = []
+    for entry in execute_command(cmd).split("\0"):
+        if entry:
+            (info, path) = entry.split("\t", 1)
+            if info.split()[1] == "blob":
+                filenames.append(path)
+    sample = random.Random(seed).sample(sorted(filenames),
+                                        min(sample_size, len(filenames)))
+
+    res = {"files": len(sample), "lines": 0, "differing": 0,
+           "time_a": 0.0, "time_b": 0.0}
+    for filename in sample:
+        start = time()
+        cmts_a = git.getBlameCommits(filename, rev, BLAME_TIERS[tier_a])
+        res["time_a"] += time() - start
+
+        start = time()
+        cmts_b = git.getBlameCommits(filename, rev, BLAME_TIERS[tier_b])
+        res["time_b"] += time() - start
+
+        differing = sum(1 for (a, b) in zip(cmts_a, cmts_b) if a != b)
+        log.devinfo("{0}: {1} of {2} lines differ".format(
+            filename, differing, len(cmts_a)))
+        res["lines"] += len(cmts_a)
+        res["differing"] += differing
+
+    log.info("Blame tier {0}: {1:.2f}s, tier {2}: {3:.2f}s for {4} files".
+             format(tier_a, res["time_a"], tier_b, res["time_b"],
+                    res["files"]))
+    log.info("The tiers attribute {0} of {1} lines ({2:.2f}%) to different "
+             "commits".format(res["differing"], res["lines"],
+                              100.0 * res["differing"] / max(1, res["lines"])))
+    return res
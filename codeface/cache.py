@@ -0,0 +1,123 @@
+## This file is part of Codeface. Codeface is free software: you can
+## redistribute it and/or modify it under the terms of the GNU General Public
+## License as published by the Free Software Foundation, version 2.
+##
+## This program is distributed in the hope that it will be useful, but WITHOUT
+## ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+## FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+## details.
+##
+## You should have received a copy of the GNU General Public License
+## along with this program; if not, write to the Free Software
+## Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+##
+## Copyright 2026 by agent <agent@local>
+## All Rights Reserved.
+'''
+Persistent on-disk cache for intermediate analysis results
+
+Results are stored under a key that captures everything the result
+depends on (e.g., commit or blob hashes and analysis options), so
+entries never need to be invalidated and can be shared between runs.
+'''
+
+import logging; log = logging.getLogger(__name__)
+import errno
+import os
+import zlib
+from cPickle import dumps, loads, HIGHEST_PROTOCOL
+from hashlib import sha1
+from tempfile import NamedTemporaryFile
+from threading import Lock
+
+
+class DiskCache(object):
+    '''
+    Content-addressed key/value store in a directory
+
+    Every entry is stored as compressed pickle in a file named after the
+    SHA-1 hash of its key, below <cache_dir>/<namespace>. Entries are
+    written atomically, so several processes or threads may use the
+    same cache directory concurrently.
+    '''
+
+    def __init__(self, cache_dir, namespace):
+        self.directory = os.path.join(cache_dir, namespace)
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+        self._lock = Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = Lock()
+
+    def _path(self, key):
+        digest = sha1(repr(key)).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest[2:])
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key):
+        '''Return the value stored for key, or None if there is none.'''
+        try:
+            with open(self._path(key), "rb") as f:
+                (stored_key, value) = loads(zlib.decompress(f.read()))
+        except IOError as e:
+            if e.errno != errno.ENOENT:
+                log.warning("Could not read {0} cache entry: {1}".
+                            format(self.namespace, e))
+            self._count(False)
+            return None
+        except Exception as e:
+            log.warning("Ignoring corrupt {0} cache entry: {1}".
+                        format(self.namespace, e))
+            self._count(False)
+            return None
+
+        # Guard against hash collisions
+        if stored_key != key:
+            self._count(False)
+            return None
+
+        self._count(True)
+        return value
+
+    def put(self, key, value):
+        '''Store value under key.'''
+        path = self._path(key)
+        dirname = os.path.dirname(path)
+        try:
+            if not os.path.isdir(dirname):
+                os.makedirs(dirname)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                log.warning("Could not create cache directory {0}: {1}".
+                            format(dirname, e))
+                return
+
+        data = zlib.compress(dumps((key, value), HIGHEST_PROTOCOL))
+        try:
+            tmp = NamedTemporaryFile(dir=dirname, delete=False)
+            tmp.write(data)
+            tmp.close()
+            os.rename(tmp.name, path)
+        except (IOError, OSError) as e:
+            log.warning("Could not write {0} cache entry: {1}".
+                        format(self.namespace, e))
+
+    def stats(self):
+        '''Return a string describing the hits and misses so far.'''
+        return "{0} cache: {1} hits, {2} misses".format(self.namespace,
+                                                        self.hits,
+                                                        self.misses)
@@ -0,0 +1,218 @@
+## This file is part of Codeface. Codeface is free software: you can
+## redistribute it and/or modify it under the terms of the GNU General Public
+## License as published by the Free Software Foundation, version 2.
+##
+## This program is distributed in the hope that it will be useful, but WITHOUT
+## ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+## FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+## details.
+##
+## You should have received a copy of the GNU General Public License
+## along with this program; if not, write to the Free Software
+## Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+##
+## Copyright 2026 by agent <agent@local>
+## All Rights Reserved.
+'''
+Client for persistent git cat-file object servers
+
+Instead of spawning a new git process for every object that is looked
+up, one git cat-file --batch and one git cat-file --batch-check process
+are kept running per repository, and objects are requested through
+their standard input.
+'''
+
+import logging; log = logging.getLogger(__name__)
+from binascii import hexlify
+from hashlib import sha1
+from subprocess import Popen, PIPE
+from threading import Lock
+
+
+def blob_id(content):
+    '''
+    Return the object id that git assigns to a blob with the given
+    content, without storing the blob
+    '''
+    return sha1("blob {0}\0{1}".format(len(content), content)).hexdigest()
+
+
+class CatFileError(Exception):
+    '''Raised if the object server returns malformed output'''
+    pass
+
+
+class GitCatFile(object):
+    '''
+    Query commits, trees and blobs of a git repository through
+    long-lived git cat-file co-processes
+
+    The processes are started on first use and are terminated by close().
+    Lookups are serialised, so one instance can be shared between
+    threads.
+    '''
+
+    def __init__(self, repo):
+        self.repo = repo
+        self._batch = None
+        self._batch_check = None
+        self._lock = Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _start(self, option):
+        cmd = ['git', '--git-dir={0}'.format(self.repo), 'cat-file', option]
+        log.debug("Starting object server: {}".format(" ".join(cmd)))
+        try:
+            return Popen(cmd, stdin=PIPE, stdout=PIPE)
+        except OSError:
+            log.error("Error executing command {}!".format(" ".join(cmd)))
+            raise
+
+    def _query(self, proc, obj):
+        '''
+        Send an object name to a cat-file process and return the
+        parsed header line (None if the object does not exist)
+        '''
+        if "\n" in obj:
+            raise CatFileError("Invalid object name {0!r}".format(obj))
+        proc.stdin.write(obj + "\n")
+        proc.stdin.flush()
+        header = proc.stdout.readline()
+        if not header:
+            raise CatFileError("git cat-file terminated unexpectedly "
+                               "(exit code {0})".format(proc.poll()))
+
+        fields = header.split()
+        if fields[-1] in ("missing", "ambiguous"):
+            return None
+        if len(fields) != 3:
+            raise CatFileError("Cannot parse object header {0!r}".
+                               format(header))
+        return (fields[0], fields[1], int(fields[2]))
+
+    def info(self, obj):
+        '''
+        Return a tuple (sha, type, size) for the given object name,
+        or None if the object does not exist.
+        '''
+        with self._lock:
+            if self._batch_check is None:
+                self._batch_check = self._start("--batch-check")
+            return self._query(self._batch_check, obj)
+
+    def read(self, obj):
+        '''
+        Return a tuple (sha, type, content) for the given object name,
+        or None if the object does not exist.
+        '''
+        with self._lock:
+            if self._batch is None:
+                self._batch = self._start("--batch")
+            header = self._query(self._batch, obj)
+            if header is None:
+                return None
+
+            (sha, obj_type, size) = header
+            content = self._batch.stdout.read(size)
+            # Every object is terminated by a newline
+            self._batch.stdout.read(1)
+            if len(content) != size:
+                raise CatFileError("Short read for object {0}".format(sha))
+            return (sha, obj_type, content)
+
+    def commit(self, rev):
+        '''
+        Return the parsed header of a commit as dictionary with the keys
+        id, tree, parents, author, author_time, author_tz, committer,
+        committer_time, committer_tz and message, or None if the
+        revision does not exist. Tags are peeled to the commit they
+        reference.
+        '''
+        res = self.read("{0}^{{commit}}".format(rev))
+        if res is None:
+            return None
+
+        (sha, obj_type, content) = res
+        (header, _, message) = content.partition("\n\n")
+        cmt = {"id": sha, "tree": None, "parents": [], "message": message}
+        for line in header.split("\n"):
+            # Continuation lines (e.g., of gpgsig headers) start with
+            # a space
+            if line.startswith(" "):
+                continue
+            (key, _, value) = line.partition(" ")
+            if key == "tree":
+                cmt["tree"] = value
+            elif key == "parent":
+                cmt["parents"].append(value)
+            elif key in ("author", "committer"):
+                # Format: Name <email> timestamp timezone
+                (ident, timestamp, tz) = value.rsplit(" ", 2)
+                cmt[key] = ident
+                cmt[key + "_time"] = timestamp
+                cmt[key + "_tz"] = tz
+
+        return cmt
+
+    def tree(self, treeish, recursive=True):
+        '''
+        Return a list of tuples (mode, type, sha, path) for all entries
+        of a tree, like git ls-tree -r --full-tree does for recursive
+        listings. Returns None if the tree does not exist.
+        '''
+        res = self.read("{0}^{{tree}}".format(treeish))
+        if res is None:
+            return None
+
+        entries = []
+        self._parse_tree(res[2], "", recursive, entries)
+        return entries
+
+    def _parse_tree(self, content, prefix, recursive, entries):
+        # Binary tree format: a sequence of "<mode> <name>\0<20 byte sha>"
+        pos = 0
+        while pos < len(content):
+            space = content.index(" ", pos)
+            nul = content.index("\0", space)
+            mode = content[pos:space]
+            path = prefix + content[space+1:nul]
+            sha = hexlify(content[nul+1:nul+21])
+            pos = nul + 21
+
+            if mode == "40000":
+                if recursive:
+                    subtree = self.read(sha)
+                    self._parse_tree(subtree[2], path + "/", recursive,
+                                     entries)
+                    continue
+                obj_type = "tree"
+            elif mode == "160000":
+                obj_type = "commit"
+            else:
+                obj_type = "blob"
+            entries.append((mode, obj_type, sha, path))
+
+    def blob(self, rev, path):
+        '''
+        Return the content of file path at revision rev, or None if
+        the file does not exist.
+        '''
+        res = self.read("{0}:{1}".format(rev, path))
+        if res is None or res[1] != "blob":
+            return None
+        return res[2]
+
+    def close(self):
+        '''Terminate the object server processes'''
+        with self._lock:
+            for proc in (self._batch, self._batch_check):
+                if proc is not None:
+                    proc.stdin.close()
+                    proc.wait()
+            self._batch = None
+            self._batch_check = None
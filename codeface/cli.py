@@ -29,6 +29,7 @@ from glob import glob
 from codeface.logger import set_log_level, start_logfile, log
 from codeface.configuration import Configuration
 from codeface.util import execute_command
+from codeface.blame import BLAME_TIERS, compare_blame_tiers
 from codeface.project import project_analyse, mailinglist_analyse
 from codeface.bugtracker.bugtracker_dispatcher import bt_analyse
 
@@ -81,6 +82,32 @@ def get_parser():
         help="Re-use an already existing vcs-analysis.db file. "
              "This flag is useful to continue a previously failed analysis"
              " or for debugging purposes.")
+    run_parser.add_argument(
+        '--blame-jobs', default=1, type=int,
+        help="Number of files to blame and analyse (and of other git "
+             "commands to run) in parallel within one revision range "
+             "(independent of --jobs)")
+    run_parser.add_argument(
+        '--cache-dir',
+        help="Directory for cached intermediate results (default: "
+             "the 'cache' directory of the project in resdir)")
+    run_parser.add_argument(
+        '--no-cache', action="store_true",
+        help="Do not cache intermediate results (blame data, code "
+             "structure, commit index) on disk")
+    run_parser.add_argument(
+        '--prepare-repo', action="store_true",
+        help="Write a commit-graph with changed-path Bloom filters for the "
+             "repository before the analysis (speeds up path-limited "
+             "history queries)")
+    run_parser.add_argument(
+        '--repack', action="store_true",
+        help="Also repack the repository (implies --prepare-repo)")
+    run_parser.add_argument(
+        '--mirror-dir',
+        help="Prepare and analyse a mirror of the repository in this "
+             "directory instead of the repository itself (implies "
+             "--prepare-repo)")
 
     ml_parser = sub_parser.add_parser('ml', help='Run mailing list analysis')
     ml_parser.set_defaults(func=cmd_ml)
@@ -146,6 +173,19 @@ def get_parser():
         default = False
     )
 
+    blame_parser = sub_parser.add_parser(
+        'blame-tiers', help='Compare the cost and results of two blame tiers')
+    blame_parser.set_defaults(func=cmd_blame_tiers)
+    blame_parser.add_argument('repo', help="git directory of the repository")
+    blame_parser.add_argument('tiers', nargs=2, choices=BLAME_TIERS.keys(),
+                        help="Blame tiers to compare")
+    blame_parser.add_argument('-r', '--rev', default="HEAD",
+                        help="Revision whose files are blamed")
+    blame_parser.add_argument('-n', '--sample', type=int, default=20,
+                        help="Number of randomly chosen files to blame")
+    blame_parser.add_argument('--seed', type=int, default=None,
+                        help="Seed for the random choice of files")
+
     dyn_parser = sub_parser.add_parser('dynamic', help='Start R server for a dynamic graph')
     dyn_parser.set_defaults(func=cmd_dynamic)
     dyn_parser.add_argument('-c', '--config', help="Codeface configuration file",
@@ -164,9 +204,18 @@ def cmd_run(args):
     logfile = args.logfile
     if logfile:
         logfile = os.path.abspath(logfile)
+    cache_dir = args.cache_dir
+    if cache_dir:
+        cache_dir = os.path.abspath(cache_dir)
+    mirror_dir = args.mirror_dir
+    if mirror_dir:
+        mirror_dir = os.path.abspath(mirror_dir)
+    prepare_repo = args.prepare_repo or args.repack or bool(mirror_dir)
     project_analyse(resdir, gitdir, codeface_conf, project_conf,
                     args.no_report, args.loglevel, logfile, args.recreate,
-                    args.profile_r, args.jobs, args.tagging, args.reuse_db)
+                    args.profile_r, args.jobs, args.tagging, args.reuse_db,
+                    args.blame_jobs, cache_dir, prepare_repo, args.repack,
+                    mirror_dir, args.no_cache)
     return 0
 
 def cmd_ml(args):
@@ -181,6 +230,12 @@ def cmd_ml(args):
                         args.loglevel, logfile, args.jobs, args.mailinglist)
     return 0
 
+def cmd_blame_tiers(args):
+    '''Dispatch the ``blame-tiers`` command.'''
+    compare_blame_tiers(os.path.abspath(args.repo), args.tiers[0],
+                        args.tiers[1], args.rev, args.sample, args.seed)
+    return 0
+
 def cmd_dynamic(args):
     dyn_directory = resource_filename(__name__, "R/shiny/apps")
 
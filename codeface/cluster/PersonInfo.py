@@ -26,7 +26,7 @@ active_tag_types = ["Signed-off-by", "Acked-by", "Reviewed-by",
 all_link_types = \
     LinkType.get_tag_types() + \
     [LinkType.proximity, LinkType.file, LinkType.committer2author,
-     LinkType.feature, LinkType.feature_file]
+     LinkType.feature, LinkType.feature_file, LinkType.file_touch]
 
 
 # Readonly class
@@ -168,6 +168,10 @@ class PersonInfo:
         #a given ID
         self.file_links_recieved_by_id = {}
 
+        #count how many links based on the files touched by commits were
+        #received by a given ID
+        self.file_touch_links_recieved_by_id = {}
+
     def setID(self, ID):
         self.ID = ID
     def getID(self):
@@ -213,6 +217,9 @@ class PersonInfo:
             return self._getLinksReceivedByID(self.committer_links_recieved_by_id, ID)
         elif link_type == LinkType.file:
             return self._getLinksReceivedByID(self.file_links_recieved_by_id, ID)
+        elif link_type == LinkType.file_touch:
+            return self._getLinksReceivedByID(
+                self.file_touch_links_recieved_by_id, ID)
     def getAllTagsReceivedByID(self, ID):
         return self._getTagsReceivedByID(self.all_tags_received_by_id, ID)
 
@@ -350,6 +357,8 @@ class PersonInfo:
             LinkType.committer2author, self.committer_links_recieved_by_id)
         self._sum_relations(
             LinkType.file, self.file_links_recieved_by_id)
+        self._sum_relations(
+            LinkType.file_touch, self.file_touch_links_recieved_by_id)
 
     def getTagStats(self):
         return self.tag_fraction
@@ -41,13 +41,18 @@ from codeface.dbmanager import DBManager, tstamp_to_sql
 from .PersonInfo import PersonInfo
 from .idManager import idManager
 from codeface.linktype import LinkType
+from codeface.extraction import ExtractionPlan
+from codeface.blame import BlamePolicy
+from codeface.pathfilter import PathFilter
 
 #Global Constants
 SEED = 448
 
 
 def createDB(filename, git_repo, revrange, subsys_descr, link_type,
-             range_by_date, rcranges=None):
+             range_by_date, rcranges=None, blame_jobs=1, cache_dir=None,
+             extraction_plan=None, blame_policy=None,
+             line_ownership="blame", path_filter=None):
     #------------------
     #configuration
     #------------------
@@ -56,6 +61,12 @@ def createDB(filename, git_repo, revrange, subsys_descr, link_type,
     git.setRevisionRange(revrange[0], revrange[1])
     git.setSubsysDescription(subsys_descr)
     git.setRangeByDate(range_by_date)
+    git.setBlameJobs(blame_jobs)
+    git.setCacheDir(cache_dir)
+    git.setExtractionPlan(extraction_plan)
+    git.setBlamePolicy(blame_policy)
+    git.setLineOwnership(line_ownership)
+    git.setPathFilter(path_filter)
 
     if rcranges != None:
         git.setRCRanges(rcranges)
@@ -1378,7 +1389,8 @@ def populatePersonDB(cmtlist, id_mgr, link_type=None):
 
         if link_type in \
                 (LinkType.proximity, LinkType.committer2author,
-                 LinkType.file, LinkType.feature, LinkType.feature_file):
+                 LinkType.file, LinkType.feature, LinkType.feature_file,
+                 LinkType.file_touch):
             #create person for committer
             ID = id_mgr.getPersonID(cmt.getCommitterName())
             pi = id_mgr.getPI(ID)
@@ -1545,6 +1557,62 @@ def computeProximityLinks(fileCommitList, cmtList, id_mgr, link_type, \
                                     in fileCommit.getFileSnapShots().items()]
 
 
+def computeFileTouchLinks(fileTouchDict, cmtList, id_mgr, link_type):
+    '''
+    Constructs network based on the files touched by the commits
+    '''
+
+    '''
+    Two contributors are linked when they commit to the same file: the
+    author of a commit is linked to the authors of all commits that
+    changed the file before it within the revision range. The strength
+    of a relation is the number of lines that both commits added to the
+    file. Unlike computeProximityLinks, the network does not depend on
+    the blame data of the files, so it neither considers which lines
+    survive until the end of the range nor commits before the range.
+
+    The commits of a file are ordered as git log reports them, so
+    commits with the same date are linked in one direction only. The
+    earlier commits of an author are combined into a single relation,
+    with the weight of the individual commit pairs summed up.
+    '''
+    for touches in fileTouchDict.values():
+        # Earlier commits of the file by author: [lines, commit ids]
+        earlier = {}
+
+        # git log lists the most recent commits first
+        for (cmt_id, added, _) in reversed(touches):
+            if cmt_id not in cmtList:
+                continue
+            cmt = cmtList[cmt_id]
+            revPerson = id_mgr.getPI(cmt.getAuthorPI().getID())
+            for (personId, (lines, cmt_ids)) in earlier.iteritems():
+                weight = RelationWeight(added * len(cmt_ids) + lines,
+                                        'File_Level', [cmt.id], list(cmt_ids))
+                revPerson.addSendRelation(link_type, personId, cmt, weight)
+                id_mgr.getPI(personId).addReceiveRelation(
+                    link_type, revPerson.getID(), weight)
+
+            entry = earlier.setdefault(revPerson.getID(), [0, []])
+            entry[0] += added
+            entry[1].append(cmt.id)
+
+
+def computeFileTouchDepends(fileTouchDict, cmt_dict):
+    '''
+    Compute logical dependencies at file level from the files touched
+    by the commits of the revision range (see computeLogicalDepends)
+    '''
+    file_depends_count = {}
+    for (filename, touches) in fileTouchDict.iteritems():
+        for (cmt_id, added, _) in touches:
+            if cmt_id in cmt_dict and added:
+                file_depends_count.setdefault(cmt_id, []).append(
+                    ((filename, 'File_Level'), added))
+
+    return file_depends_count
+
+
 def compute_feature_proximity_links_per_file(
         file_commit_list, cmt_list, id_mgr, link_type, start_date=None,
         speed_up=True):
@@ -1820,14 +1888,22 @@ def computeSimilarity(cmtlist):
 ###########################################################################
 def performAnalysis(conf, dbm, dbfilename, git_repo, revrange, subsys_descr,
                     reuse_db, outdir, limit_history,
-                    range_by_date, rcranges=None):
+                    range_by_date, rcranges=None, blame_jobs=1,
+                    cache_dir=None):
     link_type = conf["tagging"]
 
     if not reuse_db or not os.path.isfile(dbfilename):
         log.devinfo("Creating data base for {0}..{1}".format(revrange[0],
                                                         revrange[1]))
+        # The statistics of the cluster analysis only use the diffstat of
+        # the regular diff (diff variant 0), and the time series stage
+        # only reads the commit dates from the data base
+        plan = ExtractionPlan.for_link_type(link_type, diff_variants=1)
         createDB(dbfilename, git_repo, revrange, subsys_descr, \
-                 link_type, range_by_date, rcranges)
+                 link_type, range_by_date, rcranges, blame_jobs, cache_dir,
+                 plan, BlamePolicy.from_conf(conf),
+                 conf.get("line_ownership", "blame"),
+                 PathFilter.from_conf(conf))
     else:
         log.warning("REUSING data base for {0}..{1} "
                     "(make sure it is up to date)"
@@ -1902,6 +1978,11 @@ def performAnalysis(conf, dbm, dbfilename, git_repo, revrange, subsys_descr,
             get_entity_source_code = get_source
             entity_type = ("Feature", "FeatureExpression")
 
+    elif link_type == LinkType.file_touch:
+        fileTouchDict = git.getFileTouchDict()
+        computeFileTouchLinks(fileTouchDict, cmtdict, id_mgr, link_type)
+        logical_depends = (computeFileTouchDepends(fileTouchDict, cmtdict), )
+
     #---------------------------------
     #compute statistical information
     #---------------------------------
@@ -1917,7 +1998,8 @@ def performAnalysis(conf, dbm, dbfilename, git_repo, revrange, subsys_descr,
 
 ##################################################################
 def doProjectAnalysis(conf, from_rev, to_rev, rc_start, outdir,
-                      git_repo, reuse_db, limit_history, range_by_date):
+                      git_repo, reuse_db, limit_history, range_by_date,
+                      blame_jobs=1, cache_dir=None):
     #--------------
     #folder setup
     #--------------
@@ -1941,7 +2023,7 @@ def doProjectAnalysis(conf, from_rev, to_rev, rc_start, outdir,
     dbm = DBManager(conf)
     performAnalysis(conf, dbm, filename, git_repo, [from_rev, to_rev],
                     None, reuse_db, outdir, limit_history, range_by_date,
-                    rc_range)
+                    rc_range, blame_jobs, cache_dir)
 
 #git_repo = "/Users/wolfgang/git-repos/linux/.git"
 #outbase = "/Users/wolfgang/papers/csd/cluster/res/"
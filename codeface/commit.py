@@ -18,11 +18,14 @@
 # Copyright 2010, 2011, 2012 by Wolfgang Mauerer <wm@linux-kernel.net>
 # All Rights Reserved.
 
+import re
+
 class Commit:
     # Keywords to identify corrective commits
     # Ref: A. Mockus and L. G. Votta, Identifying Reasons for Software
     #      Changes Using Historic Databases
     CORRECTIVE_KEYWORDS = ['bug', 'fix', 'error', 'fail']
+    CORRECTIVE_PATTERN = re.compile("|".join(CORRECTIVE_KEYWORDS), re.I)
 
     def __init__(self):
         # Base characteristics: uniqiue id (typically a hash value) and
@@ -157,13 +160,5 @@ class Commit:
     def checkIfCorrective(self, descr):
         # Check if commit description contains keywords that indicate a
         # corrective commit
-        for line in descr:
-            contains_keyword = [keyword in line.lower()
-                                for keyword in Commit.CORRECTIVE_KEYWORDS]
-            is_corrective = any(contains_keyword)
-
-            if is_corrective:
-               break
-        # End for line
-
-        self.is_corrective = is_corrective
\ No newline at end of file
+        self.is_corrective = \
+            Commit.CORRECTIVE_PATTERN.search("\n".join(descr)) is not None
\ No newline at end of file
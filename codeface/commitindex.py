@@ -0,0 +1,221 @@
+## This file is part of Codeface. Codeface is free software: you can
+## redistribute it and/or modify it under the terms of the GNU General Public
+## License as published by the Free Software Foundation, version 2.
+##
+## This program is distributed in the hope that it will be useful, but WITHOUT
+## ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+## FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+## details.
+##
+## You should have received a copy of the GNU General Public License
+## along with this program; if not, write to the Free Software
+## Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+##
+## Copyright 2026 by agent <agent@local>
+## All Rights Reserved.
+'''
+In-memory index of the commit graph of a repository
+
+The index stores the parents, timestamps and generation number of every
+commit that is reachable from a ref. It is built from a single git
+rev-list pass (and can be persisted in a DiskCache), and answers the
+revision range and date queries of the analysis without walking the
+history with git again.
+'''
+
+import logging; log = logging.getLogger(__name__)
+import heapq
+from hashlib import sha1
+
+from .util import execute_command, execute_command_stream
+
+# Flags for the commits reached from the end and the start of a range
+_END = 1
+_START = 2
+
+
+class CommitIndex(object):
+    '''
+    Parents, commit and author dates and generation numbers of all
+    commits reachable from the refs of a repository
+
+    The generation number of a commit is one more than the maximum
+    generation number of its parents (root commits have generation 1),
+    so every commit has a higher generation number than its ancestors.
+    '''
+
+    def __init__(self, commits):
+        '''
+        commits is a list of (id, parents, ct, at, ai) tuples with the
+        parents of every commit listed before the commit itself. ct is
+        the committer timestamp (an int), at and ai are the author
+        timestamp and the ISO author date as reported by git log.
+        '''
+        self._parents = {}
+        self._info = {}
+        self._gen = {}
+        for (cmt_id, parents, ct, at, ai) in commits:
+            self._parents[cmt_id] = parents
+            self._info[cmt_id] = (ct, at, ai)
+            self._gen[cmt_id] = 1 + max([self._gen[p] for p in parents] or
+                                        [0])
+
+    def __len__(self):
+        return len(self._parents)
+
+    def __contains__(self, cmt_id):
+        return cmt_id in self._parents
+
+    @staticmethod
+    def refs_state(repo):
+        '''
+        Return a digest of the refs of a repository, which identifies the
+        set of commits that an index of the repository contains
+        '''
+        cmd = 'git --git-dir={0} show-ref --head'.format(repo).split()
+        # show-ref fails for repositories without refs
+        return sha1(execute_command(cmd, ignore_errors=True)).hexdigest()
+
+    @classmethod
+    def build(cls, repo):
+        '''Build the index of all commits reachable from a ref of repo.'''
+        # Parents are listed before their children in reversed
+        # topological order
+        cmd = 'git --git-dir={0} rev-list --all --topo-order --reverse'.\
+            format(repo).split()
+        cmd.append('--parents')
+        cmd.append('--format=%ct %at %ai')
+        log.devinfo("Building commit index for {0}".format(repo))
+        output = execute_command_stream(cmd)
+
+        def commits():
+            for line in output:
+                # Format: commit <id> <parents>\n<ct> <at> <ai>
+                ids = line.split()[1:]
+                (ct, at, ai) = next(output).split(" ", 2)
+                yield (ids[0], tuple(ids[1:]), int(ct), at, ai)
+
+        index = cls(commits())
+
+        log.devinfo("Commit index contains {0} commits".format(len(index)))
+        return index
+
+    @classmethod
+    def load(cls, repo, cache=None):
+        '''
+        Return the index of repo, taken from cache (a DiskCache) if the
+        refs of the repository did not change since it was stored
+        '''
+        if cache is None:
+            return cls.build(repo)
+
+        key = (repo, cls.refs_state(repo))
+        index = cache.get(key)
+        if index is None:
+            index = cls.build(repo)
+            cache.put(key, index)
+        return index
+
+    def parents(self, cmt_id):
+        return self._parents[cmt_id]
+
+    def is_merge(self, cmt_id):
+        return len(self._parents[cmt_id]) > 1
+
+    def commit_date(self, cmt_id):
+        return self._info[cmt_id][0]
+
+    def generation(self, cmt_id):
+        return self._gen[cmt_id]
+
+    def logstring(self, cmt_id):
+        '''Return the commit in the format "%ct %H %at %ai" of git log'''
+        (ct, at, ai) = self._info[cmt_id]
+        return "{0} {1} {2} {3}".format(ct, cmt_id, at, ai)
+
+    def range(self, end, start=None):
+        '''
+        Return the ids of all commits that are reachable from end, but
+        not from start (i.e., the commits of start..end), in the order
+        of decreasing generation numbers
+        '''
+        # Walk down from both revisions in order of decreasing generation
+        # numbers, so that all children of a commit have been visited
+        # (and its flags are final) before the commit itself. The walk
+        # stops as soon as all pending commits are reachable from start.
+        flags = {}
+        queue = []
+        res = []
+
+        for (cmt_id, flag) in ((end, _END), (start, _START)):
+            if cmt_id is None:
+                continue
+            if cmt_id not in flags:
+                heapq.heappush(queue, (-self._gen[cmt_id], cmt_id))
+            flags[cmt_id] = flags.get(cmt_id, 0) | flag
+        pending = sum(1 for flag in flags.itervalues() if flag == _END)
+
+        while pending:
+            (_, cmt_id) = heapq.heappop(queue)
+            flag = flags[cmt_id]
+            if flag == _END:
+                pending -= 1
+                res.append(cmt_id)
+
+            for parent in self._parents[cmt_id]:
+                old = flags.get(parent, 0)
+                new = old | flag
+                if new == old:
+                    continue
+                if not old:
+                    heapq.heappush(queue, (-self._gen[parent], parent))
+                flags[parent] = new
+                pending += (new == _END) - (old == _END)
+
+        return res
+
+    def date_range(self, head, since, before):
+        '''
+        Return the ids of all commits reachable from head whose commit
+        date lies between since and before (inclusively), like git log
+        --since --before does
+
+        As git log, the walk does not continue to the parents of a commit
+        older than since, so that commits behind such a commit are not
+        contained in the result even if their (skewed) date lies within
+        the range.
+        '''
+        seen = set([head])
+        stack = [head]
+        res = []
+        while stack:
+            cmt_id = stack.pop()
+            date = self._info[cmt_id][0]
+            if date < since:
+                continue
+            if date <= before:
+                res.append(cmt_id)
+            for parent in self._parents[cmt_id]:
+                if parent not in seen:
+                    seen.add(parent)
+                    stack.append(parent)
+
+        return res
+
+    def latest_non_merge(self, head):
+        '''
+        Return the id of the most recent non-merge commit reachable from
+        head (i.e., the commit of git log --no-merges -1 head), or None
+        '''
+        seen = set([head])
+        queue = [(-self._info[head][0], head)]
+        while queue:
+            (_, cmt_id) = heapq.heappop(queue)
+            if not self.is_merge(cmt_id):
+                return cmt_id
+            for parent in self._parents[cmt_id]:
+                if parent not in seen:
+                    seen.add(parent)
+                    heapq.heappush(queue, (-self._info[parent][0], parent))
+
+        return None
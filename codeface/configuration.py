@@ -23,6 +23,7 @@ import yaml
 from collections import Mapping
 from logging import getLogger;
 from codeface.linktype import LinkType
+from codeface.ownership import LINE_OWNERSHIP_MODES
 
 log = getLogger(__name__)
 from tempfile import NamedTemporaryFile
@@ -46,7 +47,9 @@ class Configuration(Mapping):
                      'productAsProject', 'issueTrackerType',
                      'issueTrackerURL', 'understand', 'sloccount',
                      'bug_project_name', 'bugtracker_type', 'bugtracker_url',
-                     'project_id')
+                     'project_id', 'blame_tier', 'blame_size_tiers',
+                     'line_ownership', 'file_include', 'file_exclude',
+                     'max_blob_size', 'window_size', 'num_windows')
     ALL_KEYS = set(GLOBAL_KEYS + GLOBAL_OPTIONAL_KEYS + PROJECT_KEYS +
                    OPTIONAL_KEYS)
 
@@ -108,6 +111,12 @@ class Configuration(Mapping):
             ml.setdefault("type", "dev")
             ml.setdefault("source", "gmane")
 
+        # Analysis windows that are used if no revisions are given:
+        # window_size is the length of a window in months, num_windows
+        # the number of most recent windows (-1 for all)
+        self._conf["window_size"] = int(self._conf.get("window_size", 3))
+        self._conf["num_windows"] = int(self._conf.get("num_windows", -1))
+
         if "dbport" not in self:
             self._conf["dbport"] = 3306
         else:
@@ -136,9 +145,30 @@ class Configuration(Mapping):
             log.critical('Unsupported tagging mechanism specified!')
             raise ConfigurationError('Unsupported tagging mechanism.')
 
+        if self.get('line_ownership', 'blame') not in \
+                LINE_OWNERSHIP_MODES:
+            log.critical("Unsupported line ownership '{}' specified, use "
+                         "one of {}".format(self['line_ownership'],
+                                            ", ".join(LINE_OWNERSHIP_MODES)))
+            raise ConfigurationError('Unsupported line ownership.')
+
+        # The replay reproduces git blame -w only (see codeface.ownership)
+        if self.get('line_ownership') == 'replay' and \
+                (self.get('blame_tier') != 'plain' or
+                 self.get('blame_size_tiers')):
+            log.critical("line_ownership: replay requires blame_tier: plain "
+                         "and no blame_size_tiers")
+            raise ConfigurationError('Unsupported line ownership.')
+
+        if self["window_size"] < 1 or self["num_windows"] == 0 or \
+                self["num_windows"] < -1:
+            log.critical("Invalid analysis windows: window_size must be "
+                         "positive, num_windows positive or -1")
+            raise ConfigurationError('Invalid analysis windows.')
+
         if len(self["revisions"]) < 2:
             log.info("No revision range specified in configuration, analyzing history "
-                     "in 3 month increments")
+                     "in {} month increments".format(self["window_size"]))
 
         if len(self["revisions"]) != len(self["rcs"]):
             log.critical("Malformed configuration: revision and rcs list "
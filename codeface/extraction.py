@@ -0,0 +1,102 @@
+## This file is part of Codeface. Codeface is free software: you can
+## redistribute it and/or modify it under the terms of the GNU General Public
+## License as published by the Free Software Foundation, version 2.
+##
+## This program is distributed in the hope that it will be useful, but WITHOUT
+## ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+## FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+## details.
+##
+## You should have received a copy of the GNU General Public License
+## along with this program; if not, write to the Free Software
+## Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+##
+## Copyright 2026 by agent <agent@local>
+## All Rights Reserved.
+'''
+Declaration of the artefacts that the commit extraction has to compute
+
+Depending on the tagging (link type) and the outputs of an analysis,
+only some of the artefacts that gitVCS can extract are used later on.
+An ExtractionPlan states which ones are needed, so that the extraction
+can skip everything else.
+'''
+
+import logging; log = logging.getLogger(__name__)
+
+from codeface.linktype import LinkType
+
+# Number of diff variants that gitVCS can compute (see
+# gitVCS.DIFF_VARIANTS)
+ALL_DIFF_VARIANTS = 4
+
+
+class ExtractionPlan(object):
+    '''
+    Artefacts to extract from the repository
+
+    diff_variants: number of diff variants whose diffstats are computed
+                   (the first diff_variants entries of gitVCS.DIFF_VARIANTS)
+    blame: compute the blame data of the files touched in the range
+    function_structure: locate the functions of the blamed files
+    feature_structure: locate the features of the blamed files
+    file_touches: record the files that every commit touches (and the
+                  number of changed lines)
+    '''
+
+    def __init__(self, diff_variants=ALL_DIFF_VARIANTS, blame=False,
+                 function_structure=False, feature_structure=False,
+                 file_touches=False):
+        if not 1 <= diff_variants <= ALL_DIFF_VARIANTS:
+            raise ValueError("Invalid number of diff variants: {0}".
+                             format(diff_variants))
+        if (function_structure or feature_structure) and not blame:
+            raise ValueError("The code structure is only analysed for "
+                             "blamed files")
+        self.diff_variants = diff_variants
+        self.blame = blame
+        self.function_structure = function_structure
+        self.feature_structure = feature_structure
+        self.file_touches = file_touches
+
+    @classmethod
+    def for_link_type(cls, link_type, diff_variants=ALL_DIFF_VARIANTS):
+        '''
+        Return the plan for an analysis of the given link type that
+        uses diff_variants diff variants.
+        '''
+        if link_type == LinkType.file_touch:
+            return cls(diff_variants, file_touches=True)
+        blame = link_type in (LinkType.proximity, LinkType.file,
+                              LinkType.feature, LinkType.feature_file)
+        return cls(diff_variants, blame,
+                   function_structure=link_type == LinkType.proximity,
+                   feature_structure=link_type in (LinkType.feature,
+                                                   LinkType.feature_file))
+
+    def skipped(self):
+        '''Return a list of descriptions of the artefacts that are skipped'''
+        res = []
+        if self.diff_variants < ALL_DIFF_VARIANTS:
+            res.append("{0} of {1} diff variants".format(
+                ALL_DIFF_VARIANTS - self.diff_variants, ALL_DIFF_VARIANTS))
+        if not self.blame:
+            res.append("blame")
+        if not self.function_structure:
+            res.append("function structure")
+        if not self.feature_structure:
+            res.append("feature structure")
+        return res
+
+    def report(self, link_type=None):
+        '''Log the artefacts that the extraction skips'''
+        log.info("Extraction plan{0} skips {1}".format(
+            "" if link_type is None else " for {0}".format(link_type),
+            ", ".join(self.skipped()) or "nothing"))
+
+    def __repr__(self):
+        return ("ExtractionPlan(diff_variants={0}, blame={1}, "
+                "function_structure={2}, feature_structure={3}, "
+                "file_touches={4})".format(
+                    self.diff_variants, self.blame, self.function_structure,
+                    self.feature_structure, self.file_touches))
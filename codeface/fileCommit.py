@@ -151,6 +151,9 @@ class FileCommit:
             self.functionImpl.update({id:[]})
         self.functionLineNums.extend(sorted(self.functionIds.iterkeys()))
 
+    def setFuncImpl(self, functionImpl):
+        self.functionImpl.update(functionImpl)
+
     def setSrcElems(self, src_elem_list):
         self._src_elem_list.extend(src_elem_list)
 
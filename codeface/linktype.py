@@ -27,9 +27,11 @@ class LinkType:
     file = "file"
     feature = "feature"
     feature_file = "feature_file"
+    file_touch = "file_touch"
 
     _all_link_types = \
-        (tag, proximity, committer2author, file, feature, feature_file)
+        (tag, proximity, committer2author, file, feature, feature_file,
+         file_touch)
 
     @staticmethod
     def get_all_link_types():
@@ -0,0 +1,306 @@
+## This file is part of Codeface. Codeface is free software: you can
+## redistribute it and/or modify it under the terms of the GNU General Public
+## License as published by the Free Software Foundation, version 2.
+##
+## This program is distributed in the hope that it will be useful, but WITHOUT
+## ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+## FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+## details.
+##
+## You should have received a copy of the GNU General Public License
+## along with this program; if not, write to the Free Software
+## Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+##
+## Copyright 2026 by agent <agent@local>
+## All Rights Reserved.
+'''
+Line ownership computed by replaying diffs instead of blaming files
+
+A LineOwnership records the commit that last changed every line of a set
+of files at one revision. Replaying the first-parent history of a range
+(git log -p --first-parent -m -U0 --reverse) moves the ownership from
+the start to the end of the range, so the lines of all files are
+attributed with one pass over the diffs instead of one git blame run per
+file. The ownership at the end of a range can be stored and used as the
+start of the following range.
+'''
+
+import logging; log = logging.getLogger(__name__)
+import re
+
+from codeface.subsys import unquote_path
+
+# Sources of the line ownership of the blamed files: git blame per file,
+# or a replay of the diffs of the revision range
+LINE_OWNERSHIP_MODES = ("blame", "replay")
+
+_HUNK_PATTERN = re.compile(r'^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@')
+
+
+def replay_command(repo, rev_start, rev_end):
+    '''Return the git log command whose output LineOwnership.replay reads'''
+    cmd = 'git --git-dir={0} log'.format(repo).split()
+    cmd.extend(["--reverse", "--first-parent", "-m", "-p", "-U0", "-w", "-M",
+                "--no-color", "--no-ext-diff", "--src-prefix=a/",
+                "--dst-prefix=b/", "--format=%x00%H %P"])
+    if rev_start is None:
+        cmd.append(rev_end)
+    else:
+        cmd.append("{0}..{1}".format(rev_start, rev_end))
+    return cmd
+
+
+def _diff_path(path, prefix):
+    '''Return the file name of a path in a diff header, or None for
+    /dev/null'''
+    path = unquote_path(path)
+    if path == "/dev/null":
+        return None
+    if path.startswith(prefix):
+        return path[len(prefix):]
+    return path
+
+
+def _diff_git_path(line):
+    '''
+    Return the file name of a "diff --git a/<name> b/<name>" line (for
+    files that are not renamed, both names are identical)
+    '''
+    names = line[len("diff --git "):]
+    return _diff_path(names[:(len(names) - 1) // 2], "a/")
+
+
+class _FileDiff(object):
+    '''The diff of one file in a commit'''
+
+    def __init__(self, path):
+        self.old_path = path
+        self.new_path = path
+        self.binary = False
+        self.hunks = []
+
+
+class LineOwnership(object):
+    '''
+    Commits that last changed the lines of a set of files at revision rev
+
+    The owners are stored as indices into a table of commit ids, so that
+    the ownership of large code bases can be kept in memory and stored
+    compactly.
+    '''
+
+    def __init__(self, rev=None):
+        self.rev = rev
+        self._commits = []
+        self._commit_index = {}
+        self._files = {}
+        # Last commit of the replay that changed a file, and (if the
+        # history is kept) the owners of a file after every such commit
+        self._changed = {}
+        self._history = None
+
+    def __getstate__(self):
+        # Only the owners at rev are stored, with unused commits removed
+        used = sorted(set(idx for owners in self._files.itervalues()
+                          for idx in owners))
+        remap = dict((idx, new_idx) for (new_idx, idx) in enumerate(used))
+        return {"rev": self.rev,
+                "commits": [self._commits[idx] for idx in used],
+                "files": dict((filename, [remap[idx] for idx in owners])
+                              for (filename, owners)
+                              in self._files.iteritems())}
+
+    def __setstate__(self, state):
+        self.__init__(state["rev"])
+        self._commits = state["commits"]
+        self._commit_index = dict((cmt_id, idx) for (idx, cmt_id)
+                                  in enumerate(self._commits))
+        self._files = state["files"]
+
+    def __len__(self):
+        return len(self._files)
+
+    def __contains__(self, filename):
+        return filename in self._files
+
+    def _index(self, cmt_id):
+        idx = self._commit_index.get(cmt_id)
+        if idx is None:
+            idx = len(self._commits)
+            self._commits.append(cmt_id)
+            self._commit_index[cmt_id] = idx
+        return idx
+
+    def set_owners(self, filename, cmt_ids):
+        '''Set the owners of the lines of filename to the commits cmt_ids'''
+        self._files[filename] = [self._index(cmt_id) for cmt_id in cmt_ids]
+
+    def owners(self, filename):
+        '''Return the owners of all lines of filename at rev, or None'''
+        owners = self._files.get(filename)
+        if owners is None:
+            return None
+        return [self._commits[idx] for idx in owners]
+
+    def owners_at(self, cmt_id, filename):
+        '''
+        Return the owners of the lines of filename after commit cmt_id,
+        or None if they are not known. They are known for rev, for the
+        last commit of the replay that changed the file, and (if the
+        history is kept) for every replayed commit that changed the file.
+        '''
+        if cmt_id == self.rev or cmt_id == self._changed.get(filename):
+            return self.owners(filename)
+        if self._history is not None:
+            owners = self._history.get((cmt_id, filename))
+            if owners is not None:
+                return [self._commits[idx] for idx in owners]
+        return None
+
+    def replay(self, lines, track, seed, blame_merge, keep_history=False):
+        '''
+        Apply the diffs of a replay_command output (given as iterator over
+        its lines) to the ownership, which moves it from rev to the last
+        replayed commit.
+
+        track(filename): whether to follow a file that is not known yet
+        seed(filename, cmt_id): return the owners of the lines of a file
+            at commit cmt_id (e.g., from git blame), or None
+        blame_merge(cmt_id, filename, ranges): return a dictionary that
+            maps the line indices in the given ranges (pairs of first line
+            and number of lines, starting at 1) of a file that a merge
+            commit changed to their owners, or None
+        keep_history: record the owners of the files after every commit
+        '''
+        if keep_history:
+            self._history = {}
+
+        cmt_id = None
+        parents = None
+        diff = None
+        skip = 0
+        first = True
+
+        for line in lines:
+            if skip:
+                # Skip the removed and added lines of a hunk
+                if not line.startswith("\\"):
+                    skip -= 1
+                continue
+
+            if line.startswith("\0"):
+                self._finish(diff, cmt_id, parents, track, seed, blame_merge)
+                diff = None
+                ids = line[1:].split()
+                (cmt_id, parents) = (ids[0], ids[1:])
+                if first:
+                    first = False
+                    # The ownership only applies to the history of the
+                    # replay if the replay starts at rev
+                    if parents[:1] != [self.rev] and self._files:
+                        log.info("Replay does not start at {0}, discarding "
+                                 "the owners of {1} files".
+                                 format(self.rev, len(self._files)))
+                        self._files = {}
+            elif line.startswith("diff --git "):
+                self._finish(diff, cmt_id, parents, track, seed, blame_merge)
+                diff = _FileDiff(_diff_git_path(line))
+            elif diff is None:
+                continue
+            elif line.startswith("@@"):
+                match = _HUNK_PATTERN.match(line)
+                hunk = tuple(int(count) if count is not None else 1
+                             for count in match.groups())
+                diff.hunks.append(hunk)
+                skip = hunk[1] + hunk[3]
+            elif line.startswith("--- "):
+                diff.old_path = _diff_path(line[4:], "a/")
+            elif line.startswith("+++ "):
+                diff.new_path = _diff_path(line[4:], "b/")
+            elif line.startswith("rename from "):
+                diff.old_path = unquote_path(line[len("rename from "):])
+            elif line.startswith("rename to "):
+                diff.new_path = unquote_path(line[len("rename to "):])
+            elif line.startswith("new file mode"):
+                diff.old_path = None
+            elif line.startswith("deleted file mode"):
+                diff.new_path = None
+            elif line.startswith("Binary files"):
+                diff.binary = True
+
+        self._finish(diff, cmt_id, parents, track, seed, blame_merge)
+        if cmt_id is not None:
+            self.rev = cmt_id
+
+    def _finish(self, diff, cmt_id, parents, track, seed, blame_merge):
+        '''Apply the diff of one file of commit cmt_id'''
+        if diff is None:
+            return
+
+        old_path = diff.old_path
+        new_path = diff.new_path
+        if old_path is None:
+            owners = []
+        else:
+            owners = self._files.pop(old_path, None)
+            if owners is None and new_path is not None and \
+                    (track(old_path) or track(new_path)) and parents:
+                seeded = seed(old_path, parents[0])
+                if seeded is not None:
+                    owners = [self._index(owner) for owner in seeded]
+
+        self._changed.pop(old_path, None)
+        if new_path is None:
+            return
+        self._files.pop(new_path, None)
+        self._changed.pop(new_path, None)
+        if owners is None or diff.binary:
+            return
+
+        owners = self._apply(owners, diff.hunks, self._index(cmt_id))
+        if owners is None:
+            log.warning("Diff of {0} in {1} does not match the known "
+                        "owners".format(new_path, cmt_id))
+            return
+
+        # Lines that a merge adds to the first parent stem from the other
+        # parents, so they are attributed by blame
+        if len(parents) > 1:
+            ranges = [(new_start, new_count) for
+                      (_, _, new_start, new_count) in diff.hunks if new_count]
+            if ranges:
+                merged = blame_merge(cmt_id, new_path, ranges)
+                if merged is None:
+                    return
+                for (start, count) in ranges:
+                    for idx in range(start - 1, start - 1 + count):
+                        owner = merged.get(idx)
+                        if owner is None:
+                            return
+                        owners[idx] = self._index(owner)
+
+        self._files[new_path] = owners
+        self._changed[new_path] = cmt_id
+        if self._history is not None:
+            self._history[(cmt_id, new_path)] = owners
+
+    def _apply(self, owners, hunks, owner):
+        '''
+        Return the owners after applying the hunks (of a -U0 diff) whose
+        lines are owned by owner, or None if the hunks do not fit
+        '''
+        res = []
+        pos = 0
+        for (old_start, old_count, new_start, new_count) in hunks:
+            # Hunks that only add lines start after line old_start,
+            # all others at line old_start
+            end = old_start if old_count == 0 else old_start - 1
+            if end < pos or end + old_count > len(owners):
+                return None
+            res.extend(owners[pos:end])
+            if len(res) != (new_start - 1 if new_count else new_start):
+                return None
+            res.extend([owner] * new_count)
+            pos = end + old_count
+        res.extend(owners[pos:])
+        return res
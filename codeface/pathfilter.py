@@ -0,0 +1,90 @@
+## This file is part of Codeface. Codeface is free software: you can
+## redistribute it and/or modify it under the terms of the GNU General Public
+## License as published by the Free Software Foundation, version 2.
+##
+## This program is distributed in the hope that it will be useful, but WITHOUT
+## ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+## FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+## details.
+##
+## You should have received a copy of the GNU General Public License
+## along with this program; if not, write to the Free Software
+## Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+##
+## Copyright 2026 by agent <agent@local>
+## All Rights Reserved.
+'''
+Selection of the files that the file based analysis considers
+
+Vendored directories, generated sources or very large files distort the
+file based analysis and dominate its run time. A PathFilter restricts
+the analysed files by glob patterns, which are passed to git as
+pathspecs, and by the size of their blobs, which is looked up with git
+cat-file --batch-check.
+'''
+
+import logging; log = logging.getLogger(__name__)
+
+from codeface.configuration import ConfigurationError
+
+
+class PathFilter(object):
+    '''
+    Glob patterns and a maximum blob size for the analysed files
+
+    include: if given, only files that match one of these patterns are
+             analysed
+    exclude: files that match one of these patterns are never analysed
+    max_blob_size: files whose blob is larger (in bytes) are not analysed
+
+    Patterns follow the glob pathspec magic of git: "*" does not match
+    slashes, "**/" matches any number of directories (e.g.,
+    "vendor/**" or "**/*.pb.c").
+    '''
+
+    def __init__(self, include=None, exclude=None, max_blob_size=None):
+        # A single pattern may be given instead of a list
+        if isinstance(include, basestring):
+            include = [include]
+        if isinstance(exclude, basestring):
+            exclude = [exclude]
+        self.include = list(include or [])
+        self.exclude = list(exclude or [])
+        if max_blob_size is not None:
+            max_blob_size = int(max_blob_size)
+            if max_blob_size <= 0:
+                raise ValueError("Invalid maximum blob size: {0}".
+                                 format(max_blob_size))
+        self.max_blob_size = max_blob_size
+
+    @classmethod
+    def from_conf(cls, conf):
+        '''
+        Return the filter of the configuration keys file_include,
+        file_exclude and max_blob_size, e.g.
+
+            file_exclude:
+                - "vendor/**"
+                - "**/*.generated.c"
+            max_blob_size: 1000000
+        '''
+        try:
+            return cls(conf.get("file_include"), conf.get("file_exclude"),
+                       conf.get("max_blob_size"))
+        except (TypeError, ValueError) as e:
+            log.critical("Invalid file filter configuration: {0}".format(e))
+            raise ConfigurationError("Invalid file filter configuration.")
+
+    def pathspecs(self):
+        '''Return the git pathspecs that select the analysed files.'''
+        res = [":(glob)" + pattern for pattern in self.include]
+        res.extend(":(exclude,glob)" + pattern for pattern in self.exclude)
+        return res
+
+    def size_ok(self, size):
+        '''Return whether a blob of the given size is analysed.'''
+        return self.max_blob_size is None or size <= self.max_blob_size
+
+    def __repr__(self):
+        return "PathFilter({0!r}, {1!r}, {2!r})".format(
+            self.include, self.exclude, self.max_blob_size)
@@ -15,6 +15,7 @@
 # All Rights Reserved.
 
 from logging import getLogger; log = getLogger(__name__)
+from multiprocessing import cpu_count
 from pkg_resources import resource_filename
 from os.path import join as pathjoin, split as pathsplit, abspath
 
@@ -23,7 +24,8 @@ from .configuration import Configuration, ConfigurationError
 from .cluster.cluster import doProjectAnalysis, LinkType
 from .ts import dispatch_ts_analysis
 from .util import (execute_command, generate_reports, layout_graph,
-                   check4ctags, check4cppstats, BatchJobPool, generate_analysis_windows)
+                   check4ctags, check4cppstats, BatchJobPool, generate_analysis_windows,
+                   prepare_repository)
 
 def loginfo(msg):
     ''' Pickleable function for multiprocessing '''
@@ -52,7 +54,9 @@ def project_setup(conf, recreate):
 
 def project_analyse(resdir, gitdir, codeface_conf, project_conf,
                     no_report, loglevel, logfile, recreate, profile_r,
-                    n_jobs, tagging_type, reuse_db):
+                    n_jobs, tagging_type, reuse_db, blame_jobs=1,
+                    cache_dir=None, prepare_repo=False, repack=False,
+                    mirror_dir=None, no_cache=False):
     pool = BatchJobPool(int(n_jobs))
     conf = Configuration.load(codeface_conf, project_conf)
     tagging = conf["tagging"]
@@ -72,16 +76,26 @@ def project_analyse(resdir, gitdir, codeface_conf, project_conf,
     project = conf["project"]
     repo = pathjoin(gitdir, conf["repo"], ".git")
     project_resdir = pathjoin(resdir, project, tagging)
+    # Cached results only depend on the repository, so they can be
+    # shared between all taggings of a project
+    if no_cache:
+        cache_dir = None
+    elif cache_dir is None:
+        cache_dir = pathjoin(resdir, project, "cache")
     range_by_date = False
 
+    # Optional stage 0: Speed up the history queries of all later stages
+    if prepare_repo:
+        log.info("=> Preparing repository {0}".format(repo))
+        repo = prepare_repository(repo, repack, mirror_dir)
+
     # When revisions are not provided by the configuration file
     # generate the analysis window automatically
     if len(conf["revisions"]) < 2:
-        window_size_months = 3 # Window size in months
-        num_window = -1  # Number of ranges to analyse, -1 captures all ranges
-        revs, rcs = generate_analysis_windows(repo, window_size_months)
-        conf["revisions"] = revs[-num_window-1:]
-        conf["rcs"] = rcs[-num_window-1:]
+        revs, rcs = generate_analysis_windows(repo, conf["window_size"],
+                                              conf["num_windows"])
+        conf["revisions"] = revs
+        conf["rcs"] = rcs
         range_by_date = True
 
     # TODO: Sanity checks (ensure that git repo dir exists)
@@ -108,7 +122,8 @@ def project_analyse(resdir, gitdir, codeface_conf, project_conf,
         s1 = pool.add(
                 doProjectAnalysis,
                 (conf, start_rev, end_rev, rc_rev, range_resdir, repo,
-                    reuse_db, True, range_by_date),
+                    reuse_db, True, range_by_date, int(blame_jobs),
+                    cache_dir),
                 startmsg=prefix + "Analysing commits...",
                 endmsg=prefix + "Commit analysis done."
             )
@@ -138,10 +153,13 @@ def project_analyse(resdir, gitdir, codeface_conf, project_conf,
 
         #########
         # STAGE 3: Generate cluster graphs
+        # Up to n_jobs report jobs run at the same time, so they share
+        # the CPUs for their graph layouts
         if not no_report:
             pool.add(
                     generate_reports,
-                    (start_rev, end_rev, range_resdir),
+                    (start_rev, end_rev, range_resdir,
+                        max(1, cpu_count() // int(n_jobs))),
                     deps=[s2],
                     startmsg=prefix + "Generating reports...",
                     endmsg=prefix + "Report generation done."
@@ -0,0 +1,168 @@
+## This file is part of Codeface. Codeface is free software: you can
+## redistribute it and/or modify it under the terms of the GNU General Public
+## License as published by the Free Software Foundation, version 2.
+##
+## This program is distributed in the hope that it will be useful, but WITHOUT
+## ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+## FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+## details.
+##
+## You should have received a copy of the GNU General Public License
+## along with this program; if not, write to the Free Software
+## Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+##
+## Copyright 2026 by agent <agent@local>
+## All Rights Reserved.
+'''
+Scratch copies of the source files of a revision
+
+The structure analysers (ctags, doxygen, cppstats) work on files in the
+file system. A RevisionSnapshot extracts the analysed files of a
+revision range once into a scratch directory, where all analysers of
+the range can read them.
+'''
+
+import logging; log = logging.getLogger(__name__)
+import errno
+import os
+import shutil
+import tarfile
+import tempfile
+from subprocess import Popen, PIPE
+
+# Memory-backed file system for the scratch directories, if available
+_TMPFS = "/dev/shm"
+
+# Maximal number of pathspecs that are passed to one git archive run
+_ARCHIVE_BATCH = 1000
+
+
+def _scratch_dir():
+    if os.path.isdir(_TMPFS) and os.access(_TMPFS, os.W_OK | os.X_OK):
+        return _TMPFS
+    return None
+
+
+class SnapshotError(Exception):
+    '''Raised if a revision cannot be extracted'''
+    pass
+
+
+class RevisionSnapshot(object):
+    '''
+    Files of one or more revisions in a scratch directory
+
+    The files of the main revision rev that are listed in filenames are
+    extracted with git archive on first use, limited to these files by
+    pathspecs. Files of other
+    revisions, and files whose content differs from the archive (e.g.,
+    due to export-subst attributes), are written from the content that
+    is passed to path(). The files of every revision are stored below
+    <root>/<n>/source, so that the directory of a revision can be used
+    as cppstats project directory.
+    '''
+
+    def __init__(self, repo, rev, filenames, scratch_dir=None):
+        self.repo = repo
+        self.rev = rev
+        self.filenames = set(filenames)
+        if scratch_dir is None:
+            scratch_dir = _scratch_dir()
+        self.root = tempfile.mkdtemp(prefix="codeface-snapshot-",
+                                     dir=scratch_dir)
+        self._rev_dirs = {}
+        self._extracted = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.cleanup()
+
+    def rev_dir(self, rev):
+        '''Return the directory that holds the files of revision rev.'''
+        if rev not in self._rev_dirs:
+            self._rev_dirs[rev] = os.path.join(self.root,
+                                               str(len(self._rev_dirs)))
+        return self._rev_dirs[rev]
+
+    def source_dir(self, rev):
+        return os.path.join(self.rev_dir(rev), "source")
+
+    def _extract(self):
+        log.devinfo("Extracting {0} files of revision {1}".
+                    format(len(self.filenames), self.rev))
+        # Only the requested files are archived. The pathspecs are
+        # passed in batches to stay below the command line length limit
+        filenames = sorted(self.filenames)
+        for i in range(0, len(filenames), _ARCHIVE_BATCH):
+            self._archive(filenames[i:i+_ARCHIVE_BATCH])
+
+    def _archive(self, filenames):
+        cmd = ['git', '--git-dir={0}'.format(self.repo), 'archive',
+               '--format=tar', self.rev, '--']
+        cmd.extend(":(literal){0}".format(name) for name in filenames)
+        try:
+            proc = Popen(cmd, stdout=PIPE)
+        except OSError:
+            log.error("Error executing command {}!".format(
+                " ".join(cmd[:6])))
+            raise
+
+        target = self.source_dir(self.rev)
+        try:
+            archive = tarfile.open(fileobj=proc.stdout, mode="r|")
+            for member in archive:
+                if member.isfile() and member.name in self.filenames:
+                    archive.extract(member, target)
+            archive.close()
+        finally:
+            proc.stdout.close()
+            if proc.wait() != 0:
+                raise SnapshotError("Command '{0} ...' failed with exit "
+                                    "code {1}".format(" ".join(cmd[:6]),
+                                                      proc.returncode))
+
+    def path(self, rev, filename, content):
+        '''
+        Return the path of file filename of revision rev in the snapshot.
+        content is the content of the file in the repository, it is
+        written to the snapshot if the file is not part of the archive
+        of the main revision.
+        '''
+        if rev == self.rev and filename in self.filenames and \
+                not self._extracted:
+            self._extracted = True
+            try:
+                self._extract()
+            except SnapshotError as e:
+                # The files are written from their content instead
+                log.warning("Cannot extract revision {0}: {1}".
+                            format(self.rev, e))
+
+        path = os.path.join(self.source_dir(rev), filename)
+        if not os.path.isfile(path) or os.path.getsize(path) != len(content):
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            with open(path, "wb") as f:
+                f.write(content)
+
+        return path
+
+    def cleanup(self):
+        '''Remove the scratch directory'''
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+def link_file(src, dest):
+    '''
+    Make the file src available as dest, without copying it if possible
+    '''
+    if not os.path.isdir(os.path.dirname(dest)):
+        os.makedirs(os.path.dirname(dest))
+    try:
+        os.link(src, dest)
+    except OSError as e:
+        if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+            raise
+        shutil.copyfile(src, dest)
@@ -5,6 +5,29 @@ from subprocess import Popen, PIPE
 from os import path
 import sys
 
+# Characters that are removed from the XML files generated by doxygen:
+# everything except printable ASCII characters
+_XML_DELETE_CHARS = ''.join([chr(i) for i in range(256) if not 31 < i < 127])
+
+class CleanXMLReader:
+    '''
+    File-like wrapper that removes control characters from the XML
+    data while it is read in chunks, so that the files can be parsed
+    incrementally.
+    '''
+
+    def __init__(self, xml_file):
+        self.xml_file = xml_file
+
+    def read(self, size=-1):
+        while True:
+            data = self.xml_file.read(size)
+            xml_clean = data.translate(None, _XML_DELETE_CHARS)
+            # An empty result signals the end of the file to the parser,
+            # so skip chunks that only consist of control characters
+            if xml_clean or not data:
+                return xml_clean
+
 class FileAnalysis:
 
     ## List of source code elements we want to capture
@@ -16,32 +39,35 @@ class FileAnalysis:
         self.outdir = outdir
         self.src_elem_list = []
 
+    def _input_files(self):
+        return [self.filename]
+
     def gen_XML_files(self):
         # Run source code analysis and generate xml files
-        input_file = 'INPUT=' + self.filename
+        input_files = ' '.join(['"{0}"'.format(filename) for filename
+                                in self._input_files()])
+        input_file = 'INPUT=' + input_files
         output_dir = 'OUTPUT_DIRECTORY=' + self.outdir
-        cmd_1 = ['cat', self.conf]
-        p1 = Popen(cmd_1 ,stdout=PIPE)
-        doxy_conf = p1.communicate()[0]
-        doxy_conf = doxy_conf + input_file + '\n'
+        with open(self.conf, "r") as conf_file:
+            doxy_conf = conf_file.read()
+        doxy_conf = doxy_conf + '\n' + input_file + '\n'
         doxy_conf = doxy_conf + output_dir
 
         cmd = 'doxygen -'
         cmd_2 = cmd.split()
         p2 = Popen(cmd_2, stdin=PIPE, stdout=PIPE, stderr=PIPE)
-        p2.stdin.write(doxy_conf)
-        p2.communicate()
+        p2.communicate(doxy_conf)
 
     def _parse_XML_index(self):
         # Parse index file generate by deoxygen that contains the compound
         # elements
         comp_list = []
         index_file = path.join(self.outdir, 'xml', 'index.xml')
-        tree = ET.parse(index_file)
-        root = tree.getroot()
-        comp_elements = root.findall('compound')
 
-        for elem in comp_elements:
+        for (event, elem) in ET.iterparse(index_file):
+            if elem.tag != 'compound':
+                continue
+
             # Check if the element contains a child function
             member_kind = [child.get('kind') for child in elem.iter('member')]
             if any([src_elem in member_kind for src_elem in \
@@ -51,42 +77,75 @@ class FileAnalysis:
                 name = elem.find('name').text
                 comp_list.append({'refid':refid, 'kind':kind, 'name':name})
 
+            # The members of the compound are not needed any more
+            elem.clear()
+
         return(comp_list)
 
     def _parse_XML_compound(self, comp_list):
         for comp_elem in comp_list:
             comp_file = path.join(self.outdir, 'xml', comp_elem['refid'] + '.xml')
-            xml_string = self._prepare_clean_xml(comp_file)
-            root = ET.fromstring(xml_string)
-
-            for child in root.iter('memberdef'):
-                kind = child.get('kind')
-                if kind in FileAnalysis.SRC_ELEMS:
-                    loc = child.find('location')
-                    start = loc.get('bodystart')
-                    end = loc.get('bodyend')
-                    name = child.find('name').text
-                    # Some elements of function type are not assigned
-                    # start and end (e.g., definitions)
-                    if None not in [start, end, name]:
-                        self.src_elem_list.append({'bodystart':start,
-                                                   'bodyend':end,
-                                                   'name':name,
-                                                   'mem_kind': kind,
-                                                   'comp_kind': comp_elem['kind'],
-                                                   'comp_name': comp_elem['name']})
-
-    def _prepare_clean_xml(self, filename):
-        # Read file
-        with open (filename, "r") as file:
-            xml_string = file.read()
-
-        # Clean file of control characters
-        xml_clean = ''.join([i for i in xml_string if 31 < ord(i) < 127])
-
-        return xml_clean
+            with open(comp_file, "rb") as xml_file:
+                for (event, child) in ET.iterparse(CleanXMLReader(xml_file)):
+                    if child.tag != 'memberdef':
+                        continue
+
+                    kind = child.get('kind')
+                    if kind in FileAnalysis.SRC_ELEMS:
+                        loc = child.find('location')
+                        start = loc.get('bodystart')
+                        end = loc.get('bodyend')
+                        name = child.find('name').text
+                        # Some elements of function type are not assigned
+                        # start and end (e.g., definitions)
+                        if None not in [start, end, name]:
+                            self._add_src_elem(loc,
+                                               {'bodystart':start,
+                                                'bodyend':end,
+                                                'name':name,
+                                                'mem_kind': kind,
+                                                'comp_kind': comp_elem['kind'],
+                                                'comp_name': comp_elem['name']})
+                    child.clear()
+
+    def _add_src_elem(self, loc, src_elem):
+        self.src_elem_list.append(src_elem)
 
     def run_analysis(self):
         self.gen_XML_files()
         comp_list = self._parse_XML_index()
         self._parse_XML_compound(comp_list)
+
+class BatchAnalysis(FileAnalysis):
+    '''
+    Analyse a set of source files with a single doxygen run
+
+    The source code elements are assigned to the file that contains
+    their body and are stored in the dictionary src_elems, which maps
+    every input file name to its list of source code elements.
+    '''
+
+    def __init__(self, filenames, doxygen_conf, outdir):
+        FileAnalysis.__init__(self, None, doxygen_conf, outdir)
+        self.filenames = filenames
+        self.src_elems = {filename:[] for filename in filenames}
+        # doxygen reports absolute paths, possibly with symbolic
+        # links resolved
+        self._paths = {}
+        for filename in filenames:
+            self._paths[path.abspath(filename)] = filename
+            self._paths[path.realpath(filename)] = filename
+
+    def _input_files(self):
+        return self.filenames
+
+    def _add_src_elem(self, loc, src_elem):
+        src_file = loc.get('bodyfile') or loc.get('file')
+        if src_file is None:
+            return
+
+        filename = self._paths.get(src_file,
+                                   self._paths.get(path.realpath(src_file)))
+        if filename is not None:
+            self.src_elems[filename].append(src_elem)
+            self.src_elem_list.append(src_elem)
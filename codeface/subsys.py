@@ -0,0 +1,116 @@
+## This file is part of Codeface. Codeface is free software: you can
+## redistribute it and/or modify it under the terms of the GNU General Public
+## License as published by the Free Software Foundation, version 2.
+##
+## This program is distributed in the hope that it will be useful, but WITHOUT
+## ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+## FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+## details.
+##
+## You should have received a copy of the GNU General Public License
+## along with this program; if not, write to the Free Software
+## Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+##
+## Copyright 2026 by agent <agent@local>
+## All Rights Reserved.
+'''
+Classification of file paths into subsystems
+
+A subsystem description (see kerninfo.py) maps subsystem names to lists
+of directories. The directories are stored in a trie over the path
+components, so that the subsystems of a path can be determined in
+O(path depth) instead of by running a path-limited git log per subsystem.
+'''
+
+import re
+
+# Key for the subsystems stored at a trie node. Path components
+# cannot contain a slash, so this never clashes with a component.
+_SUBSYS = "/"
+
+# Paths of renamed files in numstat output, either "old => new", or
+# "prefix/{old => new}/suffix"
+_renamePattern = re.compile(r'^(.*)\{(.*) => (.*)\}(.*)$')
+
+
+def _split_path(path):
+    return [comp for comp in path.split("/") if comp not in ("", ".")]
+
+
+def _join_path(*parts):
+    return "/".join(_split_path("/".join(parts)))
+
+
+def unquote_path(path):
+    '''
+    Undo git's quoting of file names that contain special characters
+    '''
+    if len(path) > 1 and path.startswith('"') and path.endswith('"'):
+        return path[1:-1].decode("string_escape")
+    return path
+
+
+def parse_numstat_path(path):
+    '''
+    Return the list of file names contained in the path column of git's
+    numstat output. Renames and copies yield both the old and the new
+    file name, quoted names are unquoted.
+    '''
+    path = unquote_path(path)
+
+    if " => " not in path:
+        return [path]
+
+    match = _renamePattern.match(path)
+    if match:
+        (prefix, old, new, suffix) = match.groups()
+        return [_join_path(prefix, old, suffix),
+                _join_path(prefix, new, suffix)]
+
+    return path.split(" => ", 1)
+
+
+class SubsysTrie(object):
+    '''
+    Directory prefix trie built from a subsystem description
+
+    A path belongs to a subsystem if one of the subsystem's directories
+    is a leading directory of the path (or the path itself), which is
+    how git interprets the directories when they are used as pathspecs.
+    '''
+
+    def __init__(self, subsys_description):
+        self._root = {}
+        # Subsystems without a directory list comprise all files
+        self._global = set()
+
+        for (subsys, dir_list) in subsys_description.items():
+            if dir_list is None:
+                self._global.add(subsys)
+                continue
+
+            for directory in dir_list:
+                node = self._root
+                for comp in _split_path(directory):
+                    node = node.setdefault(comp, {})
+                node.setdefault(_SUBSYS, set()).add(subsys)
+
+    def lookup(self, path):
+        '''Return the set of subsystems the path belongs to.'''
+        node = self._root
+        res = set(node.get(_SUBSYS, ()))
+        for comp in _split_path(path):
+            node = node.get(comp)
+            if node is None:
+                break
+            res.update(node.get(_SUBSYS, ()))
+
+        return res
+
+    def classify(self, paths):
+        '''Return the set of subsystems touched by a list of paths.'''
+        res = set(self._global)
+        for path in paths:
+            res.update(self.lookup(path))
+
+        return res
@@ -0,0 +1,94 @@
+# This file is part of Codeface. Codeface is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+# Copyright 2026, by agent <agent@local>
+# All Rights Reserved.
+'''
+Temporary git repositories for the unit tests
+'''
+
+import os
+import shutil
+from subprocess import check_output
+from tempfile import mkdtemp
+
+
+class ScratchRepo(object):
+    '''
+    A git repository in a temporary directory, which is removed by
+    cleanup(). Tests typically create one in setUp() and register
+    cleanup() with addCleanup().
+    '''
+
+    def __init__(self):
+        self.work_tree = mkdtemp(prefix="codeface-test-repo-")
+        self.repo = os.path.join(self.work_tree, ".git")
+        self.git("init", "-q")
+
+    def cleanup(self):
+        shutil.rmtree(self.work_tree, ignore_errors=True)
+
+    def git(self, *args, **kwargs):
+        '''Run a git command in the work tree and return its output.'''
+        return check_output(["git"] + list(args), cwd=self.work_tree,
+                            env=kwargs.get("env"))
+
+    def write(self, files):
+        '''
+        Write the files (a dictionary of file names and contents) to the
+        work tree. Files whose content is None are removed.
+        '''
+        for (name, content) in files.items():
+            path = os.path.join(self.work_tree, name)
+            if content is None:
+                os.unlink(path)
+                continue
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            with open(path, "w") as f:
+                f.write(content)
+
+    def commit(self, files=None, msg="Change", author="Alice",
+               date=None):
+        '''
+        Write the files, commit all changes of the work tree and return
+        the id of the new commit. date (e.g. "2016-01-01 12:00:00 +0100")
+        sets the author and committer date.
+        '''
+        if files:
+            self.write(files)
+        self.git("add", "-A", ".")
+        self.git("commit", "-q", "--allow-empty", "-m", msg,
+                 env=self._env(author, date))
+        return self.rev_parse("HEAD")
+
+    def merge(self, branch, msg="Merge", author="Alice", date=None):
+        '''
+        Merge branch into the current branch with a merge commit and
+        return its id. The changes must not conflict.
+        '''
+        self.git("merge", "-q", "--no-ff", "-m", msg, branch,
+                 env=self._env(author, date))
+        return self.rev_parse("HEAD")
+
+    def _env(self, author, date):
+        env = dict(os.environ)
+        env["GIT_AUTHOR_NAME"] = env["GIT_COMMITTER_NAME"] = author
+        env["GIT_AUTHOR_EMAIL"] = env["GIT_COMMITTER_EMAIL"] = \
+            "{0}@example.com".format(author.lower())
+        if date is not None:
+            env["GIT_AUTHOR_DATE"] = env["GIT_COMMITTER_DATE"] = date
+        return env
+
+    def rev_parse(self, rev):
+        return self.git("rev-parse", rev).strip()
@@ -0,0 +1,59 @@
+# This file is part of Codeface. Codeface is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+# Copyright 2026, by agent <agent@local>
+# All Rights Reserved.
+
+import unittest
+from datetime import datetime, timedelta
+
+from codeface.util import CommitTimeline
+
+DAY = 24 * 3600
+# Commits in log order, commit "c" carries a skewed date
+EPOCH = 1451606400 # 2016-01-01 00:00:00 UTC
+COMMITS = [("f", EPOCH + 50 * DAY), ("e", EPOCH + 40 * DAY),
+           ("d", EPOCH + 30 * DAY), ("c", EPOCH + 45 * DAY),
+           ("b", EPOCH + 20 * DAY), ("a", EPOCH + 10 * DAY)]
+
+
+class TestCommitTimeline(unittest.TestCase):
+    """Tests for the date lookups of analysis windows"""
+
+    def setUp(self):
+        self.timeline = CommitTimeline(COMMITS)
+
+    def testLastBefore(self):
+        """Check that lookups behave like git log --max-count=1 --before"""
+        self.assertEqual(COMMITS[0], self.timeline.last_before(EPOCH + 60 * DAY))
+        self.assertEqual(COMMITS[1], self.timeline.last_before(EPOCH + 45 * DAY))
+        # The skewed commit is never the first one in log order
+        self.assertEqual(COMMITS[2], self.timeline.last_before(EPOCH + 35 * DAY))
+        self.assertEqual(COMMITS[4], self.timeline.last_before(EPOCH + 20 * DAY))
+        self.assertIsNone(self.timeline.last_before(EPOCH + 5 * DAY))
+        self.assertEqual(COMMITS[-1], self.timeline.first())
+
+    def testWindows(self):
+        """Check windows of arbitrary lengths"""
+        end_date = datetime(2016, 2, 25)
+        windows = self.timeline.windows(end_date, timedelta(days=10))
+        self.assertEqual([("a", "b"), ("b", "d"), ("d", "e"), ("e", "f")],
+                         [(start[0], end[0]) for (start, end) in windows])
+
+        windows = self.timeline.windows(end_date, timedelta(days=20))
+        self.assertEqual([("a", "d"), ("d", "f")],
+                         [(start[0], end[0]) for (start, end) in windows])
+
+        windows = self.timeline.windows(end_date, timedelta(days=10), count=2)
+        self.assertEqual([("d", "e"), ("e", "f")],
+                         [(start[0], end[0]) for (start, end) in windows])
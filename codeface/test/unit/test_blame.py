@@ -0,0 +1,107 @@
+# This file is part of Codeface. Codeface is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+# Copyright 2026, by agent <agent@local>
+# All Rights Reserved.
+
+import unittest
+import shutil
+from tempfile import mkdtemp
+
+import codeface.logger
+from codeface.blame import BlamePolicy, BLAME_TIERS, compare_blame_tiers
+from codeface.configuration import ConfigurationError
+from codeface.VCS import gitVCS
+from .scratchrepo import ScratchRepo
+
+FUNCTION = "".join("int line{0} = {0};\n".format(i) for i in range(10))
+
+
+class TestBlamePolicy(unittest.TestCase):
+    """Tests for the selection of blame tiers"""
+
+    def testTiers(self):
+        """Check that the tiers are chosen by file size"""
+        policy = BlamePolicy()
+        self.assertEqual(["-w", "-C", "-M"], policy.options())
+        self.assertFalse(policy.depends_on_size())
+
+        policy = BlamePolicy("deep-copy", {1000: "move", 100000: "plain"})
+        self.assertTrue(policy.depends_on_size())
+        self.assertEqual(BLAME_TIERS["deep-copy"], policy.options(999))
+        self.assertEqual(BLAME_TIERS["move"], policy.options(1000))
+        self.assertEqual(BLAME_TIERS["move"], policy.options(99999))
+        self.assertEqual(BLAME_TIERS["plain"], policy.options(100000))
+
+    def testConfiguration(self):
+        """Check the policy of a project configuration"""
+        policy = BlamePolicy.from_conf({"blame_tier": "plain",
+                                        "blame_size_tiers": {"10": "copy"}})
+        self.assertEqual(BLAME_TIERS["plain"], policy.options(9))
+        self.assertEqual(BLAME_TIERS["copy"], policy.options(10))
+        self.assertRaises(ConfigurationError, BlamePolicy.from_conf,
+                          {"blame_tier": "fast"})
+
+
+class TestCompareBlameTiers(unittest.TestCase):
+    """Tests for the comparison of blame tiers"""
+
+    def setUp(self):
+        scratch = ScratchRepo()
+        self.addCleanup(scratch.cleanup)
+        # The second commit moves the code of a.c to b.c
+        scratch.commit({"a.c": FUNCTION})
+        scratch.commit({"a.c": "int a;\n", "b.c": FUNCTION})
+        self.repo = scratch.repo
+
+    def testCompare(self):
+        """Check that moved code is only attributed by copy detection"""
+        res = compare_blame_tiers(self.repo, "plain", "copy", seed=1)
+        self.assertEqual(2, res["files"])
+        self.assertEqual(11, res["lines"])
+        self.assertEqual(10, res["differing"])
+
+        res = compare_blame_tiers(self.repo, "copy", "deep-copy")
+        self.assertEqual(0, res["differing"])
+
+
+class TestBlameCache(unittest.TestCase):
+    """Tests for the cached blame data"""
+
+    def setUp(self):
+        scratch = ScratchRepo()
+        self.addCleanup(scratch.cleanup)
+        scratch.commit({"a.c": FUNCTION})
+        self.head = scratch.commit({"a.c": FUNCTION + "int a;\r\nint b;"})
+        self.repo = scratch.repo
+        self.cache_dir = mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+
+    def testCachedBlame(self):
+        """Check that cached entries give the blame data of git blame"""
+        git = gitVCS()
+        git.setRepository(self.repo)
+        git.setCacheDir(self.cache_dir)
+        expected = git._parseBlameMsg(git._getBlameMsg("a.c", self.head))
+        self.assertEqual(expected, git._getBlame("a.c", self.head))
+        self.assertEqual(expected, git._getBlame("a.c", self.head))
+        cache = git._getBlameCache()
+        self.assertEqual((1, 1), (cache.hits, cache.misses))
+
+        # Only the owners of the lines are stored
+        key = (self.head, "a.c", tuple(git._getBlameOptions("a.c",
+                                                            self.head)))
+        (commits, owners) = cache.get(key)
+        self.assertEqual(2, len(commits))
+        self.assertEqual([0] * 10 + [1] * 2, owners)
+        git.closeObjectServer()
@@ -0,0 +1,72 @@
+# This file is part of Codeface. Codeface is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+# Copyright 2026, by agent <agent@local>
+# All Rights Reserved.
+
+import unittest
+import shutil
+from cPickle import dumps, loads
+from multiprocessing.pool import ThreadPool
+from tempfile import mkdtemp
+
+from codeface.cache import DiskCache
+from codeface.VCS import gitVCS
+
+
+class TestDiskCache(unittest.TestCase):
+    """Tests for the persistent result cache"""
+
+    def setUp(self):
+        self.cache_dir = mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def testRoundTrip(self):
+        """Check that stored values are found again and counted"""
+        cache = DiskCache(self.cache_dir, "blame")
+        key = ("6733ad008c89b638f598860a7da64a23384f6e05", "src/frob.c",
+               ("-w", "-C", "-M"))
+        self.assertIsNone(cache.get(key))
+        cache.put(key, (["6733ad0", "c362797"], ["int a;\n", "int b;\n"]))
+        self.assertEqual((["6733ad0", "c362797"], ["int a;\n", "int b;\n"]),
+                         cache.get(key))
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(1, cache.misses)
+
+        # A new instance sees the entries of the previous one
+        cache = DiskCache(self.cache_dir, "blame")
+        self.assertIsNotNone(cache.get(key))
+        self.assertIsNone(cache.get(key[:2] + (("-w",),)))
+
+    def testNamespaces(self):
+        """Check that namespaces do not share entries"""
+        DiskCache(self.cache_dir, "blame").put("key", 1)
+        self.assertIsNone(DiskCache(self.cache_dir, "structure").get("key"))
+
+    def testSharedBetweenWorkers(self):
+        """Check that concurrent blame workers share one cache instance"""
+        git = gitVCS()
+        git.setCacheDir(self.cache_dir)
+        pool = ThreadPool(8)
+        try:
+            caches = pool.map(lambda _: git._getBlameCache(), range(64))
+        finally:
+            pool.terminate()
+            pool.join()
+        self.assertEqual(1, len(set(id(cache) for cache in caches)))
+
+        # The lock is recreated when the object is restored
+        git = loads(dumps(git, -1))
+        self.assertIsNotNone(git._getBlameCache())
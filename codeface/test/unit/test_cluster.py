@@ -19,6 +19,8 @@ from tempfile import gettempdir
 import codeface.cluster.cluster as cluster
 import codeface.fileCommit as fileCommit
 import codeface.commit as commit
+from codeface.cluster.PersonInfo import PersonInfo
+from codeface.linktype import LinkType
 
 class TestCluster(unittest.TestCase):
     '''Test logical dependency functions'''
@@ -64,3 +66,81 @@ class TestCluster(unittest.TestCase):
         result = (computedLDs == correctLDs)
         msg = 'Computation for logical dependencies is broken'
         self.assertTrue(result, msg)
+
+
+class PersonManager(object):
+    '''Minimal stand-in for idManager that creates persons on demand'''
+    def __init__(self):
+        self.persons = {}
+
+    def getPI(self, ID):
+        if ID not in self.persons:
+            self.persons[ID] = PersonInfo([], ID)
+        return self.persons[ID]
+
+
+class TestFileTouchLinks(unittest.TestCase):
+    '''Test the networks of the file_touch link type'''
+    def setUp(self):
+        self.id_mgr = PersonManager()
+        self.cmt_dict = {}
+        # Commits in log order (most recent first), commit2 and commit3
+        # carry the same date
+        for (cmt_id, author, date) in (("commit4", 1, "300"),
+                                       ("commit3", 2, "200"),
+                                       ("commit2", 1, "200"),
+                                       ("commit1", 2, "100")):
+            cmt = commit.Commit()
+            cmt.id = cmt_id
+            cmt.setCdate(date)
+            cmt.setAuthorPI(self.id_mgr.getPI(author))
+            self.cmt_dict[cmt_id] = cmt
+        self.touches = {
+            "a.c": [("commit4", 1, 0), ("commit3", 2, 0),
+                    ("commit2", 4, 1), ("commit1", 8, 0)],
+            "b.c": [("commit3", 0, 3), ("unknown", 5, 0)]}
+
+    def test_computeFileTouchLinks(self):
+        '''
+        Tests that every commit is linked to the authors of the earlier
+        commits of a file
+        '''
+        cluster.computeFileTouchLinks(self.touches, self.cmt_dict,
+                                      self.id_mgr, LinkType.file_touch)
+        person1 = self.id_mgr.getPI(1)
+        person2 = self.id_mgr.getPI(2)
+        for person in (person1, person2):
+            person.computeRelationSums()
+
+        # Links received by person 2: commit2 -> commit1 (4 + 8),
+        # commit4 -> commit1 and commit3 (1 + 8 + 1 + 2)
+        weights = person2.getLinksReceivedByID(1, LinkType.file_touch)
+        self.assertEqual(24, weights.get_weight())
+        self.assertEqual([(["commit2"], ["commit1"]),
+                          (["commit4"], ["commit1", "commit3"])],
+                         [(w.get_commit_ids1(), w.get_commit_ids2())
+                          for w in weights])
+
+        # Links received by person 1: commit3 -> commit2 (2 + 4), but not
+        # commit2 -> commit3, although both have the same date
+        weights = person1.getLinksReceivedByID(2, LinkType.file_touch)
+        self.assertEqual(6, weights.get_weight())
+        self.assertEqual([(["commit3"], ["commit2"])],
+                         [(w.get_commit_ids1(), w.get_commit_ids2())
+                          for w in weights])
+        # Links to earlier commits of the same author: commit3 ->
+        # commit1 (2 + 8) and commit4 -> commit2 (1 + 4)
+        self.assertEqual(10, person2.getLinksReceivedByID(
+            2, LinkType.file_touch).get_weight())
+        self.assertEqual(5, person1.getLinksReceivedByID(
+            1, LinkType.file_touch).get_weight())
+
+    def test_computeFileTouchDepends(self):
+        '''
+        Tests that commits depend on the files to which they add lines
+        '''
+        depends = cluster.computeFileTouchDepends(self.touches, self.cmt_dict)
+        self.assertEqual({"commit4": [(("a.c", "File_Level"), 1)],
+                          "commit3": [(("a.c", "File_Level"), 2)],
+                          "commit2": [(("a.c", "File_Level"), 4)],
+                          "commit1": [(("a.c", "File_Level"), 8)]}, depends)
@@ -0,0 +1,127 @@
+# This file is part of Codeface. Codeface is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+# Copyright 2026, by agent <agent@local>
+# All Rights Reserved.
+
+import unittest
+
+import codeface.logger
+from codeface.commitindex import CommitIndex
+from codeface.util import execute_command
+from codeface.VCS import gitVCS
+from .scratchrepo import ScratchRepo
+
+# History used in the tests (dates in parentheses):
+#
+#   a(10) - b(20) - c(30) ------- m(60) - e(70)
+#             \                  /
+#              d1(40) - d2(50) -
+COMMITS = [("a", (), 10), ("b", ("a",), 20), ("c", ("b",), 30),
+           ("d1", ("b",), 40), ("d2", ("d1",), 50), ("m", ("c", "d2"), 60),
+           ("e", ("m",), 70)]
+
+
+class TestCommitIndex(unittest.TestCase):
+    """Tests for the in-memory commit graph index"""
+
+    def setUp(self):
+        self.index = CommitIndex(
+            [(cmt_id, parents, ct, str(ct), "2016-01-01 00:00:{0} +0100".
+              format(ct)) for (cmt_id, parents, ct) in COMMITS])
+
+    def testGeneration(self):
+        """Check that generation numbers follow the longest path"""
+        self.assertEqual(1, self.index.generation("a"))
+        self.assertEqual(3, self.index.generation("c"))
+        self.assertEqual(5, self.index.generation("m"))
+        self.assertTrue(self.index.is_merge("m"))
+        self.assertFalse(self.index.is_merge("e"))
+
+    def testRange(self):
+        """Check that ranges contain the commits reachable from the end only"""
+        self.assertEqual(set(["d1", "d2", "m", "e"]),
+                         set(self.index.range("e", "c")))
+        self.assertEqual(set(["c", "m", "e"]),
+                         set(self.index.range("e", "d2")))
+        self.assertEqual([], self.index.range("c", "e"))
+        self.assertEqual(set(["a", "b", "c"]), set(self.index.range("c")))
+
+    def testDates(self):
+        """Check the date queries"""
+        self.assertEqual(set(["c", "d1", "d2"]),
+                         set(self.index.date_range("e", 30, 50)))
+        self.assertEqual("e", self.index.latest_non_merge("e"))
+        self.assertEqual("d2", self.index.latest_non_merge("m"))
+        self.assertEqual("50 d2 50 2016-01-01 00:00:50 +0100",
+                         self.index.logstring("d2"))
+
+
+class TestRevDate(unittest.TestCase):
+    """Tests for the dates of the revision range boundaries"""
+
+    def setUp(self):
+        scratch = ScratchRepo()
+        self.addCleanup(scratch.cleanup)
+        scratch.commit({"a.c": "int a;\n"}, date="2016-01-01 00:00:10 +0000")
+        scratch.git("checkout", "-q", "-b", "side")
+        side = scratch.commit({"b.c": "int b;\n"},
+                              date="2016-01-01 00:00:30 +0000")
+        scratch.git("checkout", "-q", "-")
+        scratch.commit({"c.c": "int c;\n"}, date="2016-01-01 00:00:20 +0000")
+        self.merge = scratch.merge(side, date="2016-01-01 00:00:40 +0000")
+        self.repo = scratch.repo
+
+    def testMerge(self):
+        """Check that merges take the date of the latest non-merge commit"""
+        git = gitVCS()
+        git.setRepository(self.repo)
+        self.assertEqual("1451606430", git._getRevDate(self.merge))
+        # The lookup does not build the commit index ...
+        self.assertIsNone(git._commit_index)
+        # ... but uses it once it exists
+        git._getCommitIndex()
+        self.assertEqual("1451606430", git._getRevDate(self.merge))
+        git.closeObjectServer()
+
+
+class TestSkewedDates(unittest.TestCase):
+    """Tests for date ranges of histories with clock skew"""
+
+    def setUp(self):
+        scratch = ScratchRepo()
+        self.addCleanup(scratch.cleanup)
+        self.commits = []
+        for year in (2014, 2020, 2010, 2021, 2022):
+            self.commits.append(scratch.commit(
+                {"a.c": "int a{0};\n".format(year)},
+                date="{0}-01-01 00:00:00 +0000".format(year)))
+        self.repo = scratch.repo
+
+    def testDateRange(self):
+        """Check that date ranges stop at commits older than since"""
+        index = CommitIndex.build(self.repo)
+        head = self.commits[-1]
+        dates = sorted(index.commit_date(cmt_id) for cmt_id in self.commits)
+        for since in dates:
+            for before in dates:
+                cmd = ["git", "--git-dir=" + self.repo, "log",
+                       "--format=%H", "--since={0}".format(since),
+                       "--before={0}".format(before)]
+                self.assertEqual(set(execute_command(cmd).split()),
+                                 set(index.date_range(head, since, before)))
+
+        # The 2010 commit hides the two commits before it
+        since = index.commit_date(self.commits[0])
+        self.assertEqual(set(self.commits[3:]),
+                         set(index.date_range(head, since, dates[-1])))
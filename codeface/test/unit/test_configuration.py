@@ -82,6 +82,8 @@ tagging: tag
         self.assertEqual(c["rcs"],  ["v1rc0", "v2rc0", "v3rc0", "v4rc0", "v5rc0"])
         self.assertEqual(c["tagging"], "tag")
         self.assertEqual(c["new_tag"], "newvalue")
+        self.assertEqual(c["window_size"], 3)
+        self.assertEqual(c["num_windows"], -1)
         os.unlink(global_conf.name)
         os.unlink(project_conf.name)
         # Check that the configuration is valid YAML
@@ -0,0 +1,88 @@
+# This file is part of Codeface. Codeface is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+# Copyright 2026, by agent <agent@local>
+# All Rights Reserved.
+
+import unittest
+from time import time
+
+import codeface.logger
+from codeface.util import (CommandExecutor, CommandTimeout, execute_command,
+    execute_command_stream)
+
+
+class TestCommandExecutor(unittest.TestCase):
+    """Tests for the concurrent command executor"""
+
+    def testOrder(self):
+        """Check that results are delivered in submission order"""
+        cmds = [["sh", "-c", "sleep {0}; echo {1}".format(delay, i)]
+                for (i, delay) in enumerate((0.3, 0.1, 0.2, 0))]
+        start = time()
+        with CommandExecutor(4) as executor:
+            outputs = executor.map(cmds)
+        self.assertEqual(["0\n", "1\n", "2\n", "3\n"], outputs)
+        # The commands run concurrently
+        self.assertLess(time() - start, 0.55)
+
+    def testErrors(self):
+        """Check that failures are raised when the result is retrieved"""
+        with CommandExecutor(2) as executor:
+            ok = executor.submit(["echo", "ok"])
+            failed = executor.submit(["false"])
+            ignored = executor.submit(["false"], ignore_errors=True)
+            self.assertEqual("ok\n", ok.get())
+            self.assertRaises(Exception, failed.get)
+            self.assertEqual("", ignored.get())
+
+    def testTimeout(self):
+        """Check that commands are killed after their timeout"""
+        start = time()
+        self.assertRaises(CommandTimeout, execute_command, ["sleep", "5"],
+                          timeout=0.2)
+        self.assertLess(time() - start, 2)
+        self.assertEqual("done\n", execute_command(["echo", "done"],
+                                                   timeout=5))
+
+
+class TestCommandStream(unittest.TestCase):
+    """Tests for the streamed command output"""
+
+    def testLines(self):
+        """Check that the output is yielded line by line"""
+        output = execute_command_stream(["printf", "a\\nb\\n\\nc"])
+        self.assertEqual(["a", "b", "", "c"], list(output))
+        output = execute_command_stream(["cat"], input_data="x\ny\n")
+        self.assertEqual(["x", "y"], list(output))
+
+    def testChunks(self):
+        """Check that the raw output is yielded in chunks"""
+        output = execute_command_stream(["printf", "abcde\\n"], chunk_size=2)
+        self.assertEqual(["ab", "cd", "e\n"], list(output))
+
+    def testErrors(self):
+        """Check that failures are raised after the end of the output"""
+        output = execute_command_stream(["sh", "-c", "echo out; exit 1"])
+        self.assertEqual("out", next(output))
+        self.assertRaises(Exception, next, output)
+        output = execute_command_stream(["false"], ignore_errors=True)
+        self.assertEqual([], list(output))
+
+    def testEarlyStop(self):
+        """Check that the command is killed if the consumer stops"""
+        start = time()
+        output = execute_command_stream(["sh", "-c", "echo first; sleep 5"])
+        self.assertEqual("first", next(output))
+        output.close()
+        self.assertLess(time() - start, 2)
@@ -0,0 +1,165 @@
+# This file is part of Codeface. Codeface is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+# Copyright 2026, by agent <agent@local>
+# All Rights Reserved.
+
+import unittest
+
+import codeface.logger
+from codeface.extraction import ExtractionPlan, ALL_DIFF_VARIANTS
+from codeface.linktype import LinkType
+from codeface.util import execute_command
+from codeface.VCS import gitVCS
+from .scratchrepo import ScratchRepo
+
+
+class TestExtractionPlan(unittest.TestCase):
+    """Tests for the extraction plans of the link types"""
+
+    def testLinkTypes(self):
+        """Check which artefacts the link types require"""
+        for link_type in (LinkType.tag, LinkType.committer2author):
+            plan = ExtractionPlan.for_link_type(link_type)
+            self.assertFalse(plan.blame)
+            self.assertEqual(["blame", "function structure",
+                              "feature structure"], plan.skipped())
+
+        plan = ExtractionPlan.for_link_type(LinkType.file)
+        self.assertTrue(plan.blame)
+        self.assertFalse(plan.function_structure or plan.feature_structure)
+
+        plan = ExtractionPlan.for_link_type(LinkType.proximity, 1)
+        self.assertTrue(plan.function_structure)
+        self.assertFalse(plan.feature_structure)
+        self.assertEqual(["3 of 4 diff variants", "feature structure"],
+                         plan.skipped())
+
+        for link_type in (LinkType.feature, LinkType.feature_file):
+            plan = ExtractionPlan.for_link_type(link_type)
+            self.assertTrue(plan.feature_structure)
+            self.assertFalse(plan.function_structure)
+
+        # The file_touch link type needs no blame data
+        plan = ExtractionPlan.for_link_type(LinkType.file_touch)
+        self.assertTrue(plan.file_touches)
+        self.assertFalse(plan.blame)
+        for link_type in (LinkType.file, LinkType.proximity):
+            plan = ExtractionPlan.for_link_type(link_type)
+            self.assertFalse(plan.file_touches)
+
+    def testInvalidPlans(self):
+        """Check that inconsistent plans are rejected"""
+        self.assertRaises(ValueError, ExtractionPlan, 0)
+        self.assertRaises(ValueError, ExtractionPlan, ALL_DIFF_VARIANTS + 1)
+        self.assertRaises(ValueError, ExtractionPlan,
+                          function_structure=True)
+
+    def testDiffVariants(self):
+        """Check that only the planned diff variants are computed"""
+        git = gitVCS()
+        self.assertEqual(ALL_DIFF_VARIANTS, git.getDiffVariations())
+        git.setExtractionPlan(ExtractionPlan.for_link_type(LinkType.tag, 2))
+        self.assertEqual(2, git.getDiffVariations())
+        self.assertEqual(git.DIFF_VARIANTS[:2], git._getDiffVariants())
+
+
+class TestFileTouches(unittest.TestCase):
+    """Tests for the files touched by the commits of a range"""
+
+    def setUp(self):
+        scratch = ScratchRepo()
+        self.addCleanup(scratch.cleanup)
+        self.commits = [scratch.commit({"a.c": "int a;\n"}, "Initial commit")]
+        self.commits.append(scratch.commit(
+            {"b.c": "int b;\nint c;\n", "README": "Readme\n"}, "Add files"))
+        self.commits.append(scratch.commit(
+            {"a.c": None, "d.c": "int a;\nint d;\n"}, "Rename a.c"))
+        self.repo = scratch.repo
+
+    def testFileTouches(self):
+        """Check the touched files and changed lines of the commits"""
+        git = gitVCS()
+        git.setRepository(self.repo)
+        git.setRevisionRange(self.commits[0], self.commits[-1])
+        git._prepareFileTouchList()
+        self.assertEqual({"b.c": [(self.commits[1], 2, 0)],
+                          "d.c": [(self.commits[2], 1, 0)]},
+                         git.getFileTouchDict())
+
+    def testCutoffIndex(self):
+        """Check the last commits of the files until a date"""
+        git = gitVCS()
+        git.setRepository(self.repo)
+        files = ["a.c", "b.c", "d.c", "e.c"]
+        cutoff = git._buildCutoffIndex(files, "2099-01-01")
+        self.assertEqual({"a.c": self.commits[0], "b.c": self.commits[1],
+                          "d.c": self.commits[2]}, cutoff)
+
+        # Same as one git log --follow per file
+        for filename in files:
+            cmd = ["git", "--git-dir=" + self.repo, "log",
+                   "--until=2099-01-01", "--format=%H", "--follow",
+                   "--diff-filter=ACMRTB", "-1", "--", filename]
+            self.assertEqual(execute_command(cmd).strip() or None,
+                             cutoff.get(filename))
+
+
+class TestCutoffIndex(unittest.TestCase):
+    """Tests for the last commits of files renamed more than once"""
+
+    def setUp(self):
+        scratch = ScratchRepo()
+        self.addCleanup(scratch.cleanup)
+        content = "".join("int a{0};\n".format(i) for i in range(10))
+        self.commits = {}
+        for (name, files, date) in (
+                ("add", {"a.c": content, "x.c": "int x;\n"}, "2016-01-01"),
+                ("change", {"a.c": content + "int b;\n"}, "2016-02-01"),
+                ("rename", {"a.c": None, "b.c": content + "int b;\n"},
+                 "2016-03-01"),
+                ("change2", {"b.c": content + "int c;\n"}, "2016-04-01"),
+                ("rename2", {"b.c": None, "f.c": content + "int c;\n"},
+                 "2016-05-01"),
+                ("copy", {"g.c": content + "int c;\n"}, "2016-06-01")):
+            self.commits[name] = scratch.commit(
+                files, name, date="{0}T12:00:00 +0000".format(date))
+        self.repo = scratch.repo
+
+    def _follow(self, filename, date):
+        cmd = ["git", "--git-dir=" + self.repo, "log",
+               "--until={0}".format(date), "--format=%H", "--follow",
+               "--diff-filter=ACMRTB", "-1", "--", filename]
+        return execute_command(cmd).strip() or None
+
+    def testRenamedTwice(self):
+        """Check the last commits against git log --follow per file"""
+        git = gitVCS()
+        git.setRepository(self.repo)
+        files = ["a.c", "b.c", "f.c", "g.c", "x.c"]
+        dates = ["2016-01-15", "2016-02-15", "2016-03-15", "2016-04-15",
+                 "2016-05-15", "2016-06-15"]
+        for (i, date) in enumerate(dates):
+            for since in [None] + dates[:i + 1]:
+                cutoff = git._buildCutoffIndex(files, date, since)
+                for filename in files:
+                    self.assertEqual(self._follow(filename, date),
+                                     cutoff.get(filename))
+
+        # a.c and x.c are looked up with concurrent git log --follow calls
+        git.setBlameJobs(2)
+        cutoff = git._buildCutoffIndex(files, "2016-05-15", "2016-04-15")
+        self.assertEqual({"a.c": self.commits["change"],
+                          "b.c": self.commits["change2"],
+                          "f.c": self.commits["rename2"],
+                          "x.c": self.commits["add"]}, cutoff)
@@ -17,7 +17,8 @@
 import unittest
 
 from codeface.VCS import (get_feature_lines, parse_feature_line,
-                          parse_line, parse_sep_line, ParseError, LineType)
+                          parse_line, parse_sep_line, ParseError, LineType,
+                          parse_feature_locations, _feature_location_filename)
 from operator import eq
 import logging
 logging.basicConfig()
@@ -305,3 +306,34 @@ class TestFeatureLines(unittest.TestCase):
                             set(["(!(defined(A)) && (!(defined(B)) && defined(C)"]))
         self.assertSetEqual(fexpr_dict.get_line_info(7), set([]))
         pass
+
+    def testfeaturelocations(self):
+        """Check that the output of a cppstats project is split by file"""
+        results = iter([
+            "\"sep=,\"\r\n",
+            "FILENAME,LINE_START,LINE_END,TYPE,EXPRESSION,CONSTANTS\r\n",
+            "/tmp/p/_cppstats_featurelocations/a.c.xml,1,8,#if,defined(A),A\r\n",
+            "/tmp/p/_cppstats_featurelocations/lib/b.c.xml,941,943,#else,"
+            "\"!(GTK_CHECK_VERSION(3, 0, 0))\",\r\n",
+            "/tmp/p/_cppstats_featurelocations/a.c.xml,3,5,#if,"
+            "(defined(A)) && ((defined(C) || defined(D))),A;C;D\r\n"])
+        features = parse_feature_locations(results)
+        self.assertListEqual(
+            [(1, 8, LineType.IF, ["A"], "defined(A)"),
+             (3, 5, LineType.IF, ["A", "C", "D"],
+              "(defined(A)) && ((defined(C) || defined(D)))")],
+            features["/tmp/p/_cppstats_featurelocations/a.c.xml"])
+        self.assertListEqual(
+            [(941, 943, LineType.ELSE, [], "!(GTK_CHECK_VERSION(3, 0, 0))")],
+            features["/tmp/p/_cppstats_featurelocations/lib/b.c.xml"])
+
+        filenames = set(["a.c", "lib/b.c"])
+        self.assertEqual("lib/b.c", _feature_location_filename(
+            "/tmp/p/_cppstats_featurelocations/lib/b.c.xml", "/tmp/p",
+            filenames))
+        self.assertEqual("a.c", _feature_location_filename(
+            "source/a.c", "/tmp/p", filenames))
+        self.assertIsNone(_feature_location_filename(
+            "/tmp/p/_cppstats_featurelocations/c.c.xml", "/tmp/p",
+            filenames))
+        pass
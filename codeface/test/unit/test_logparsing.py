@@ -0,0 +1,193 @@
+# This file is part of Codeface. Codeface is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+# Copyright 2026, by agent <agent@local>
+# All Rights Reserved.
+
+import unittest
+
+import codeface.logger
+from codeface.VCS import gitVCS
+from codeface.commit import Commit
+from .scratchrepo import ScratchRepo
+import logging
+logging.basicConfig()
+
+# Note that git indents empty lines of the commit description as well.
+# The sign-off trailers are listed below the Commit: line (see
+# gitVCS._getLogFormat).
+LOG_OUTPUT = """commit 6733ad008c89b638f598860a7da64a23384f6e05
+Author: Alice <alice@example.com>
+Commit: Bob <bob@example.com>
+
+    An empty commit
+
+commit c3627973c909ac31df912391eccf9a79cb12c31c
+Author: Alice <alice@example.com>
+Commit: Alice <alice@example.com>
+Signed-off-by: Alice <alice@example.com>
+Acked-by: Bob <bob@example.com>
+
+    Fix the frobnicator
+    
+    Signed-off-by: Alice <alice@example.com>
+    Acked-by: Bob <bob@example.com>
+
+3	1	src/frob.c
+1	0	src/frob.h
+ 2 files changed, 4 insertions(+), 1 deletion(-)
+"""
+
+
+class TestLogParsing(unittest.TestCase):
+    """Tests for the streamed git log parser"""
+
+    def setUp(self):
+        self.git = gitVCS()
+
+    def testRecords(self):
+        """Check that the log output is split into per-commit messages"""
+        records = list(self.git._iterLogRecords(LOG_OUTPUT.splitlines()))
+        self.assertEqual(2, len(records))
+        self.assertTrue(records[0].startswith("commit 6733ad0"))
+        self.assertTrue(records[0].endswith("    An empty commit\n"))
+        self.assertTrue(records[1].startswith("commit c362797"))
+        self.assertTrue(records[1].endswith("1 deletion(-)\n"))
+
+    def testAnalyseRecord(self):
+        """Check that a record is analysed like git show output"""
+        records = list(self.git._iterLogRecords(LOG_OUTPUT.splitlines()))
+
+        cmt = Commit()
+        cmt.id = "6733ad008c89b638f598860a7da64a23384f6e05"
+        self.git._analyseDiffVariant(records[0], cmt)
+        self.git._analyseCommitMsg(records[0], cmt)
+        self.assertEqual([(0, 0, 0)], cmt.diff_info)
+        self.assertEqual("Alice <alice@example.com>", cmt.author)
+        self.assertEqual("Bob <bob@example.com>", cmt.committer)
+
+        cmt = Commit()
+        cmt.id = "c3627973c909ac31df912391eccf9a79cb12c31c"
+        self.git._analyseDiffVariant(records[1], cmt)
+        self.git._analyseCommitMsg(records[1], cmt)
+        self.assertEqual([(2, 4, 1)], cmt.diff_info)
+        self.assertEqual(["Alice <alice@example.com>"],
+                         cmt.getTagNames()["Signed-off-by"])
+        self.assertEqual(["Bob <bob@example.com>"],
+                         cmt.getTagNames()["Acked-by"])
+        self.assertTrue(cmt.is_corrective)
+        self.assertEqual((5, 94), cmt.commit_msg_info)
+
+    def testOldGit(self):
+        """Check that sign-offs are found without git trailer support"""
+        self.git._tool_versions["git"] = "git version 2.20.1"
+        self.assertNotIn("trailers", self.git._getLogFormat())
+        # git does not list the trailers below the Commit: line
+        record = "\n".join(line for line in LOG_OUTPUT.splitlines()
+                           if not line.startswith(("Signed", "Acked")))
+        records = list(self.git._iterLogRecords(record.splitlines()))
+
+        cmt = Commit()
+        cmt.id = "c3627973c909ac31df912391eccf9a79cb12c31c"
+        self.git._analyseCommitMsg(records[1], cmt)
+        self.assertEqual(["Alice <alice@example.com>"],
+                         cmt.getTagNames()["Signed-off-by"])
+        self.assertEqual(["Bob <bob@example.com>"],
+                         cmt.getTagNames()["Acked-by"])
+        self.assertEqual((5, 94), cmt.commit_msg_info)
+
+        self.git._tool_versions["git"] = "git version 2.22.0"
+        self.assertIn("key=Signed-off-by", self.git._getLogFormat())
+
+
+class TestCommitDiffs(unittest.TestCase):
+    """Tests for the analysis of commits outside the revision range"""
+
+    def setUp(self):
+        scratch = ScratchRepo()
+        self.addCleanup(scratch.cleanup)
+        self.commits = [scratch.commit({"a.c": "int a;\n"}, author="Alice"),
+                        scratch.commit({"a.c": "int b;\nint c;\n"},
+                                       author="Bob"),
+                        scratch.commit({"b.c": "int d;\n"})]
+        self.repo = scratch.repo
+
+    def _commit(self, cmt_id):
+        cmt = Commit()
+        cmt.id = cmt_id
+        return cmt
+
+    def testConcurrentDiffs(self):
+        """Check that concurrent git calls give the results of serial ones"""
+        git = gitVCS()
+        git.setRepository(self.repo)
+        git.setRevisionRange(self.commits[1], self.commits[2])
+        git.setBlameJobs(2)
+        git._prepareCommitLists()
+        for cmt_id in self.commits[:2]:
+            git._commit_dict[cmt_id] = self._commit(cmt_id)
+        git._parseCommitsStreamed()
+
+        for cmt_id in self.commits[:2]:
+            expected = self._commit(cmt_id)
+            git._parseCommitDiffs(expected)
+            cmt = git._commit_dict[cmt_id]
+            self.assertEqual(len(git._getDiffVariants()),
+                             len(cmt.diff_info))
+            self.assertEqual(expected.diff_info, cmt.diff_info)
+            self.assertEqual(expected.author, cmt.author)
+        self.assertEqual("Bob <bob@example.com>",
+                         git._commit_dict[self.commits[1]].author)
+        git.closeObjectServer()
+
+
+BLAME_OUTPUT = """6733ad008c89b638f598860a7da64a23384f6e05 1 1 2
+author Alice
+author-mail <alice@example.com>
+summary Add the frobnicator
+filename src/frob.c
+\tint frob(void)
+6733ad008c89b638f598860a7da64a23384f6e05 2 2
+\t{
+c3627973c909ac31df912391eccf9a79cb12c31c 2 3 1
+author Bob
+author-mail <bob@example.com>
+previous 6733ad008c89b638f598860a7da64a23384f6e05 src/frob.c
+filename src/frob.c
+\t\treturn 42; \r
+"""
+
+
+class TestBlameParsing(unittest.TestCase):
+    """Tests for the porcelain blame parser"""
+
+    def testBlameEntries(self):
+        """Check that every source line is attributed to its commit"""
+        git = gitVCS()
+        entries = list(git._iterBlameEntries(iter(BLAME_OUTPUT.split("\n"))))
+        self.assertEqual(3, len(entries))
+        self.assertEqual((0, "6733ad008c89b638f598860a7da64a23384f6e05",
+                          "int frob(void)\n"), entries[0])
+        self.assertEqual((1, "6733ad008c89b638f598860a7da64a23384f6e05",
+                          "{\n"), entries[1])
+        self.assertEqual((2, "c3627973c909ac31df912391eccf9a79cb12c31c",
+                          "\treturn 42; \r\n"), entries[2])
+
+        (cmt_lines, src_lines) = \
+            git._parseBlameMsg(BLAME_OUTPUT.split("\n"))
+        self.assertEqual({"0": "6733ad008c89b638f598860a7da64a23384f6e05",
+                          "1": "6733ad008c89b638f598860a7da64a23384f6e05",
+                          "2": "c3627973c909ac31df912391eccf9a79cb12c31c"},
+                         cmt_lines)
+        self.assertEqual(["int frob(void)\n", "{\n", "\treturn 42; \r\n"],
+                         src_lines)
@@ -0,0 +1,209 @@
+# This file is part of Codeface. Codeface is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+# Copyright 2026, by agent <agent@local>
+# All Rights Reserved.
+
+import unittest
+from cPickle import dumps, loads
+
+import codeface.logger
+from codeface.blame import BlamePolicy
+from codeface.ownership import LineOwnership
+from codeface.VCS import gitVCS
+from .scratchrepo import ScratchRepo
+
+# Output of replay_command for a range with the commits c1 to c4: c1
+# changes a.c and adds new.c, c2 renames a.c to b.c and deletes a line,
+# c3 changes a line of b.c and merges m1, which adds a line to b.c
+REPLAY_LOG = """\
+\0c1 c0
+diff --git a/a.c b/a.c
+index 1111111..2222222 100644
+--- a/a.c
++++ b/a.c
+@@ -2 +2,2 @@
+-two
++TWO
++two and a half
+diff --git a/new.c b/new.c
+new file mode 100644
+index 0000000..3333333
+--- /dev/null
++++ b/new.c
+@@ -0,0 +1,2 @@
++new one
++new two
+\0c2 c1
+diff --git a/a.c b/b.c
+similarity index 90%
+rename from a.c
+rename to b.c
+index 2222222..4444444 100644
+--- a/a.c
++++ b/b.c
+@@ -1 +0,0 @@
+-one
+\0c3 c2 m1
+diff --git a/b.c b/b.c
+index 4444444..5555555 100644
+--- a/b.c
++++ b/b.c
+@@ -3,0 +4 @@ two and a half
++merged
+\\ No newline at end of file
+""".splitlines()
+
+
+class TestLineOwnership(unittest.TestCase):
+    """Tests for replaying the line ownership of files"""
+
+    def setUp(self):
+        self.seeded = []
+        self.merges = []
+
+    def seed(self, filename, cmt_id):
+        self.seeded.append((filename, cmt_id))
+        return ["c0", "c0", "old"]
+
+    def blame_merge(self, cmt_id, filename, ranges):
+        self.merges.append((cmt_id, filename, ranges))
+        return {3: "m1"}
+
+    def replay(self, ownership, keep_history=False):
+        ownership.replay(iter(REPLAY_LOG), lambda filename: True, self.seed,
+                         self.blame_merge, keep_history)
+
+    def testReplay(self):
+        """Check the owners of the lines after a replay"""
+        ownership = LineOwnership("c0")
+        self.replay(ownership)
+        self.assertEqual("c3", ownership.rev)
+        self.assertEqual([("a.c", "c0")], self.seeded)
+        self.assertEqual([("c3", "b.c", [(4, 1)])], self.merges)
+        self.assertEqual(2, len(ownership))
+        self.assertFalse("a.c" in ownership)
+        self.assertEqual(["c1", "c1", "old", "m1"], ownership.owners("b.c"))
+        self.assertEqual(["c1", "c1"], ownership.owners("new.c"))
+
+        # The files are known after the last commits that changed them
+        self.assertEqual(["c1", "c1"], ownership.owners_at("c1", "new.c"))
+        self.assertEqual(None, ownership.owners_at("c1", "b.c"))
+
+    def testHistory(self):
+        """Check the owners after every commit of the replay"""
+        ownership = LineOwnership("c0")
+        self.replay(ownership, keep_history=True)
+        self.assertEqual(["c1", "c1", "old"], ownership.owners_at("c2", "b.c"))
+        self.assertEqual(None, ownership.owners_at("c1", "b.c"))
+
+    def testSeedFromState(self):
+        """Check that a known state is used instead of seeding"""
+        ownership = LineOwnership("c0")
+        ownership.set_owners("a.c", ["s1", "s2", "s3"])
+        ownership.set_owners("other.c", ["s4"])
+        self.replay(ownership)
+        self.assertEqual([], self.seeded)
+        self.assertEqual(["c1", "c1", "s3", "m1"], ownership.owners("b.c"))
+        self.assertEqual(["s4"], ownership.owners("other.c"))
+
+        # The stored state only contains the owners at the end of the
+        # replay, with the commits that own lines
+        restored = loads(dumps(ownership, -1))
+        self.assertEqual("c3", restored.rev)
+        self.assertEqual(ownership.owners("b.c"), restored.owners("b.c"))
+        self.assertEqual(["s4"], restored.owners("other.c"))
+        self.assertEqual(set(["c1", "s3", "m1", "s4"]),
+                         set(restored._commits))
+
+    def testStateOfOtherRevision(self):
+        """Check that a state that does not precede the replay is dropped"""
+        ownership = LineOwnership("x0")
+        ownership.set_owners("other.c", ["s4"])
+        self.replay(ownership)
+        self.assertFalse("other.c" in ownership)
+        self.assertEqual([("a.c", "c0")], self.seeded)
+
+    def testMismatch(self):
+        """Check that files whose diffs do not fit are dropped"""
+        ownership = LineOwnership("c0")
+        ownership.set_owners("a.c", ["s1"])
+        self.replay(ownership)
+        self.assertFalse("b.c" in ownership)
+        self.assertEqual(["c1", "c1"], ownership.owners("new.c"))
+
+
+class TestReplayedBlame(unittest.TestCase):
+    """Tests for the replayed line ownership of a repository"""
+
+    def setUp(self):
+        scratch = ScratchRepo()
+        self.addCleanup(scratch.cleanup)
+        lines = ["int f{0}(void);\n".format(i) for i in range(8)]
+        self.start = scratch.commit({"a.c": "".join(lines),
+                                     "util.c": "int u;\n"}, "Initial commit")
+        lines[1] = "int g1(void);\n"
+        scratch.commit({"a.c": "".join(lines)}, "Change a.c", "Bob")
+
+        # A side branch changes a.c and adds a file ...
+        scratch.git("checkout", "-q", "-b", "side")
+        side_lines = list(lines)
+        side_lines[6] = "int h6(void);\n"
+        side_lines.append("int h8(void);\n")
+        scratch.commit({"a.c": "".join(side_lines), "s.c": "int s;\n"},
+                       "Change a.c on a branch", "Carol")
+
+        # ... while a.c is renamed on the main branch
+        scratch.git("checkout", "-q", "-")
+        lines[0] = "int g0(void);\n"
+        scratch.commit({"a.c": None, "b.c": "".join(lines)}, "Rename a.c")
+        scratch.merge("side", author="Dave")
+
+        # Whitespace changes are ignored
+        lines = scratch.git("show", "HEAD:b.c").splitlines(True)
+        lines[3] = "  " + lines[3]
+        lines[4] = "int g4(void);\n"
+        scratch.commit({"b.c": "".join(lines), "util.c": "int  u;\n"},
+                       "Change b.c", "Bob")
+        self.end = scratch.rev_parse("HEAD")
+        self.repo = scratch.repo
+
+    def _git(self, blame_policy):
+        git = gitVCS()
+        git.setRepository(self.repo)
+        git.setRevisionRange(self.start, self.end)
+        git.setBlamePolicy(blame_policy)
+        git.setLineOwnership("replay")
+        self.addCleanup(git.closeObjectServer)
+        return git
+
+    def testSameAsBlame(self):
+        """Check that the replay attributes lines like git blame -w"""
+        git = self._git(BlamePolicy("plain"))
+        files = ["b.c", "s.c", "util.c"]
+        git._replayOwnership(files)
+        # The whitespace change of util.c leaves no diff to replay, so
+        # util.c is blamed
+        self.assertIsNone(git._getReplayedBlame("util.c", self.end))
+        for filename in files:
+            (cmt_lines, _) = git._getBlame(filename, self.end)
+            self.assertEqual(
+                git.getBlameCommits(filename, self.end, ["-w"]),
+                [cmt_lines[str(i)] for i in range(len(cmt_lines))])
+        self.assertEqual(set(["b.c", "s.c"]), set(git._ownership._files))
+
+    def testOtherTiers(self):
+        """Check that blame tiers that the replay cannot match are rejected"""
+        for policy in (BlamePolicy(), BlamePolicy("plain", {1000: "move"})):
+            git = self._git(policy)
+            self.assertRaises(ValueError, git._replayOwnership, ["b.c"])
@@ -0,0 +1,90 @@
+# This file is part of Codeface. Codeface is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+# Copyright 2026, by agent <agent@local>
+# All Rights Reserved.
+
+import unittest
+
+import codeface.logger
+from codeface.configuration import ConfigurationError
+from codeface.pathfilter import PathFilter
+from codeface.VCS import gitVCS
+from .scratchrepo import ScratchRepo
+
+FILES = {"src/a.c": "int a;\n",
+         "src/big.c": "int big;\n" * 100,
+         "src/gen/a.pb.c": "int pb;\n",
+         "vendor/lib/v.c": "int v;\n",
+         "lib/x.py": "x = 1\n",
+         "README": "Readme\n"}
+
+
+class TestPathFilter(unittest.TestCase):
+    """Tests for the selection of the analysed files"""
+
+    def setUp(self):
+        scratch = ScratchRepo()
+        self.addCleanup(scratch.cleanup)
+        # diff-tree does not list the files of root commits
+        scratch.commit(msg="Initial commit")
+        self.head = scratch.commit(FILES, "Add files")
+        self.repo = scratch.repo
+
+    def _analysedFiles(self, path_filter):
+        git = gitVCS()
+        git.setRepository(self.repo)
+        git.setRevisionRange(None, self.head)
+        git.setPathFilter(path_filter)
+        git.addFiles4Analysis([self.head])
+        git.closeObjectServer()
+        return git._fileNames
+
+    def testNoFilter(self):
+        """Check that all implementation files are analysed by default"""
+        self.assertEqual(["lib/x.py", "src/a.c", "src/big.c",
+                          "src/gen/a.pb.c", "vendor/lib/v.c"],
+                         self._analysedFiles(None))
+        self.assertEqual([], PathFilter().pathspecs())
+
+    def testPatterns(self):
+        """Check that the patterns select the files"""
+        path_filter = PathFilter(exclude=["vendor/**", "**/*.pb.c"])
+        self.assertEqual([":(exclude,glob)vendor/**",
+                          ":(exclude,glob)**/*.pb.c"],
+                         path_filter.pathspecs())
+        self.assertEqual(["lib/x.py", "src/a.c", "src/big.c"],
+                         self._analysedFiles(path_filter))
+
+        path_filter = PathFilter(include="src/**", exclude="src/gen/**")
+        self.assertEqual(["src/a.c", "src/big.c"],
+                         self._analysedFiles(path_filter))
+
+    def testBlobSize(self):
+        """Check that large files are skipped"""
+        path_filter = PathFilter(max_blob_size=100)
+        self.assertEqual(["lib/x.py", "src/a.c", "src/gen/a.pb.c",
+                          "vendor/lib/v.c"],
+                         self._analysedFiles(path_filter))
+
+    def testConfiguration(self):
+        """Check the configuration keys of the filter"""
+        path_filter = PathFilter.from_conf({"file_exclude": ["vendor/**"],
+                                            "max_blob_size": "1000"})
+        self.assertEqual([], path_filter.include)
+        self.assertEqual(["vendor/**"], path_filter.exclude)
+        self.assertEqual(1000, path_filter.max_blob_size)
+        self.assertRaises(ConfigurationError, PathFilter.from_conf,
+                          {"max_blob_size": "large"})
+        self.assertRaises(ConfigurationError, PathFilter.from_conf,
+                          {"max_blob_size": 0})
@@ -0,0 +1,57 @@
+# This file is part of Codeface. Codeface is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+# Copyright 2026, by agent <agent@local>
+# All Rights Reserved.
+
+import unittest
+import os
+
+import codeface.logger
+from codeface.util import execute_command, prepare_repository
+from .scratchrepo import ScratchRepo
+
+
+class TestPrepareRepository(unittest.TestCase):
+    """Tests for the repository preparation stage"""
+
+    def setUp(self):
+        self.scratch = ScratchRepo()
+        self.addCleanup(self.scratch.cleanup)
+        self.scratch.commit({"a.c": "int a;\n"}, "Initial commit")
+        self.repo = self.scratch.repo
+
+    def _hasCommitGraph(self, repo):
+        info = os.path.join(repo, "objects", "info")
+        return os.path.isfile(os.path.join(info, "commit-graph")) or \
+            os.path.isdir(os.path.join(info, "commit-graphs"))
+
+    def testPrepare(self):
+        """Check that the commit-graph is written"""
+        self.assertEqual(self.repo, prepare_repository(self.repo,
+                                                       repack=True))
+        self.assertTrue(self._hasCommitGraph(self.repo))
+
+    def testMirror(self):
+        """Check that a prepared mirror replaces the repository"""
+        mirror = os.path.join(self.scratch.work_tree, "mirror.git")
+        self.assertEqual(mirror, prepare_repository(self.repo,
+                                                    mirror_dir=mirror))
+        self.assertTrue(self._hasCommitGraph(mirror))
+        # Existing mirrors are updated
+        self.assertEqual(mirror, prepare_repository(self.repo,
+                                                    mirror_dir=mirror))
+        head = execute_command(["git", "--git-dir=" + mirror, "rev-parse",
+                                "HEAD"])
+        self.assertEqual(execute_command(["git", "--git-dir=" + self.repo,
+                                          "rev-parse", "HEAD"]), head)
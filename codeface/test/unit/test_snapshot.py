@@ -0,0 +1,64 @@
+# This file is part of Codeface. Codeface is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+# Copyright 2026, by agent <agent@local>
+# All Rights Reserved.
+
+import unittest
+import os
+
+import codeface.logger
+from codeface.snapshot import RevisionSnapshot
+from .scratchrepo import ScratchRepo
+
+
+class TestRevisionSnapshot(unittest.TestCase):
+    """Tests for the scratch copies of revisions"""
+
+    def setUp(self):
+        scratch = ScratchRepo()
+        self.addCleanup(scratch.cleanup)
+        scratch.commit({"src/a.c": "int a;\n", "src/b.c": "int b;\n",
+                        "README": "Example\n"}, "Initial commit")
+        self.repo = scratch.repo
+
+    def testArchive(self):
+        """Check that the files of the main revision are extracted"""
+        snapshot = RevisionSnapshot(self.repo, "HEAD", ["src/a.c", "src/b.c"])
+        try:
+            path = snapshot.path("HEAD", "src/a.c", "int a;\n")
+            self.assertEqual(os.path.join(snapshot.source_dir("HEAD"),
+                                          "src/a.c"), path)
+            self.assertTrue(os.path.isfile(os.path.join(
+                snapshot.source_dir("HEAD"), "src/b.c")))
+            # Only the requested files are extracted
+            self.assertFalse(os.path.exists(os.path.join(
+                snapshot.source_dir("HEAD"), "README")))
+
+            # Files of other revisions are written from their content
+            path = snapshot.path("HEAD~0", "src/a.c", "int c;\n")
+            with open(path) as f:
+                self.assertEqual("int c;\n", f.read())
+        finally:
+            snapshot.cleanup()
+        self.assertFalse(os.path.exists(snapshot.root))
+
+    def testMissingFile(self):
+        """Check that files missing from the revision are written anyway"""
+        snapshot = RevisionSnapshot(self.repo, "HEAD", ["src/a.c", "src/x.c"])
+        try:
+            path = snapshot.path("HEAD", "src/x.c", "int x;\n")
+            with open(path) as f:
+                self.assertEqual("int x;\n", f.read())
+        finally:
+            snapshot.cleanup()
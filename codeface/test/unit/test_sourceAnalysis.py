@@ -0,0 +1,109 @@
+# This file is part of Codeface. Codeface is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+# Copyright 2026, by agent <agent@local>
+# All Rights Reserved.
+
+import unittest
+import os
+import shutil
+from tempfile import mkdtemp
+
+from codeface.sourceAnalysis import BatchAnalysis
+
+INDEX_XML = """<?xml version='1.0' encoding='UTF-8' standalone='no'?>
+<doxygenindex version="1.8.6">
+  <compound refid="a_8c" kind="file"><name>a.c</name>
+    <member refid="a_8c_1f" kind="function"><name>frob</name></member>
+  </compound>
+  <compound refid="b_8h" kind="file"><name>b.h</name>
+    <member refid="b_8h_1d" kind="define"><name>B_H</name></member>
+  </compound>
+  <compound refid="class_x" kind="class"><name>X</name>
+    <member refid="class_x_1f" kind="function"><name>run</name></member>
+  </compound>
+</doxygenindex>
+"""
+
+A_XML = """<?xml version='1.0' encoding='UTF-8' standalone='no'?>
+<doxygen version="1.8.6">
+  <compounddef id="a_8c" kind="file">
+    <compoundname>a.c</compoundname>
+    <sectiondef kind="func">
+      <memberdef kind="function" id="a_8c_1f">
+        <name>frob</name>
+        <briefdescription><para>Frob\x01nicate \x1b</para></briefdescription>
+        <location file="{0}/a.c" line="3" bodyfile="{0}/a.c"
+                  bodystart="3" bodyend="7"/>
+      </memberdef>
+      <memberdef kind="function" id="a_8c_1g">
+        <name>decl</name>
+        <location file="{0}/a.c" line="9"/>
+      </memberdef>
+    </sectiondef>
+  </compounddef>
+</doxygen>
+"""
+
+CLASS_XML = """<?xml version='1.0' encoding='UTF-8' standalone='no'?>
+<doxygen version="1.8.6">
+  <compounddef id="class_x" kind="class">
+    <compoundname>X</compoundname>
+    <sectiondef kind="public-func">
+      <memberdef kind="function" id="class_x_1f">
+        <name>run</name>
+        <location file="{0}/b.h" line="2" bodyfile="{0}/b.cpp"
+                  bodystart="10" bodyend="12"/>
+      </memberdef>
+    </sectiondef>
+  </compounddef>
+</doxygen>
+"""
+
+
+class TestBatchAnalysis(unittest.TestCase):
+    """Tests for the parser of the XML output of a batched doxygen run"""
+
+    def setUp(self):
+        self.src_dir = mkdtemp()
+        self.out_dir = mkdtemp()
+        xml_dir = os.path.join(self.out_dir, "xml")
+        os.mkdir(xml_dir)
+        for (name, content) in (("index.xml", INDEX_XML), ("a_8c.xml", A_XML),
+                                ("class_x.xml", CLASS_XML)):
+            with open(os.path.join(xml_dir, name), "w") as f:
+                f.write(content.format(self.src_dir))
+
+    def tearDown(self):
+        shutil.rmtree(self.src_dir)
+        shutil.rmtree(self.out_dir)
+
+    def testDistribution(self):
+        """Check that the functions are assigned to the files of their body"""
+        src_files = [os.path.join(self.src_dir, name)
+                     for name in ("a.c", "b.h", "b.cpp")]
+        analysis = BatchAnalysis(src_files, None, self.out_dir)
+        comp_list = analysis._parse_XML_index()
+        self.assertEqual(["a_8c", "class_x"],
+                         [comp["refid"] for comp in comp_list])
+
+        analysis._parse_XML_compound(comp_list)
+        self.assertEqual([{'bodystart':'3', 'bodyend':'7', 'name':'frob',
+                           'mem_kind':'function', 'comp_kind':'file',
+                           'comp_name':'a.c'}],
+                         analysis.src_elems[src_files[0]])
+        self.assertEqual([], analysis.src_elems[src_files[1]])
+        self.assertEqual([{'bodystart':'10', 'bodyend':'12', 'name':'run',
+                           'mem_kind':'function', 'comp_kind':'class',
+                           'comp_name':'X'}],
+                         analysis.src_elems[src_files[2]])
@@ -0,0 +1,60 @@
+# This file is part of Codeface. Codeface is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+# Copyright 2026, by agent <agent@local>
+# All Rights Reserved.
+
+import unittest
+
+from codeface.kerninfo import subsysDescrLinux
+from codeface.subsys import SubsysTrie, parse_numstat_path
+
+
+class TestSubsysTrie(unittest.TestCase):
+    """Tests for the path based subsystem classification"""
+
+    def testLookup(self):
+        """Check that directories match as leading path components"""
+        trie = SubsysTrie(subsysDescrLinux)
+        self.assertSetEqual(set(["core"]), trie.lookup("kernel/fork.c"))
+        self.assertSetEqual(set(["core", "virt"]),
+                            trie.lookup("virt/kvm/kvm_main.c"))
+        self.assertSetEqual(set(["core", "security"]),
+                            trie.lookup("security/commoncap.c"))
+        self.assertSetEqual(set(), trie.lookup("kernelx/fork.c"))
+        self.assertSetEqual(set(), trie.lookup("Makefile"))
+        self.assertSetEqual(set(["fs"]), trie.lookup("fs"))
+
+    def testNestedDirectories(self):
+        """Check subsystems that are given by nested directories"""
+        trie = SubsysTrie({"drv": ["drivers/"], "usb": ["drivers/usb"],
+                           "all": None})
+        self.assertSetEqual(set(["all", "drv", "usb"]),
+                            trie.classify(["drivers/usb/core/hub.c"]))
+        self.assertSetEqual(set(["all", "drv"]),
+                            trie.classify(["drivers/net/e1000.c",
+                                           "README"]))
+        self.assertSetEqual(set(["all"]), trie.classify([]))
+
+    def testNumstatPaths(self):
+        """Check that renamed and quoted paths are decomposed"""
+        self.assertListEqual(["fs/ext4/inode.c"],
+                             parse_numstat_path("fs/ext4/inode.c"))
+        self.assertListEqual(["a/b.c", "c/d.c"],
+                             parse_numstat_path("a/b.c => c/d.c"))
+        self.assertListEqual(["fs/ext3/inode.c", "fs/ext4/inode.c"],
+                             parse_numstat_path("fs/{ext3 => ext4}/inode.c"))
+        self.assertListEqual(["lib/x.c", "lib/new/x.c"],
+                             parse_numstat_path("lib/{ => new}/x.c"))
+        self.assertListEqual(["dir/\xc3\xa4.c"],
+                             parse_numstat_path('"dir/\\303\\244.c"'))
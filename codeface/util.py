@@ -27,15 +27,18 @@ import traceback
 from collections import OrderedDict, namedtuple
 from glob import glob
 from math import sqrt
-from multiprocessing import Process, Queue, JoinableQueue, Lock
+from multiprocessing import Process, Queue, JoinableQueue, Lock, cpu_count
+from multiprocessing.pool import ThreadPool
 from pickle import dumps, PicklingError
 from pkg_resources import resource_filename
 from subprocess import Popen, PIPE
 from tempfile import NamedTemporaryFile, mkdtemp
-from time import sleep
-from threading import enumerate as threading_enumerate
+from time import sleep, time
+from threading import enumerate as threading_enumerate, Thread, Timer
 from Queue import Empty
 from datetime import timedelta, datetime
+from bisect import bisect_left
+from calendar import timegm
 
 # Represents a job submitted to the batch pool.
 BatchJobTuple = namedtuple('BatchJobTuple', ['id', 'func', 'args', 'kwargs',
@@ -240,26 +243,58 @@ signal.signal(signal.SIGTERM, handle_sigterm)
 # Also dump on sigusr1, but do not terminate
 signal.signal(signal.SIGUSR1, handle_sigusr1)
 
-def execute_command(cmd, ignore_errors=False, direct_io=False, cwd=None):
+class CommandTimeout(Exception):
+    '''Raised if a command does not finish within its time limit'''
+    pass
+
+def _kill_expired(pipe, expired):
+    expired.append(True)
+    try:
+        pipe.kill()
+    except OSError:
+        # The command finished in the meantime
+        pass
+
+def execute_command(cmd, ignore_errors=False, direct_io=False, cwd=None,
+                    input_data=None, timeout=None):
     '''
     Execute the command `cmd` specified as a list of ['program', 'arg', ...]
     If ignore_errors is true, a non-zero exit code will be ignored, otherwise
     an exception is raised.
     If direct_io is True, do not capture the stdin and stdout of the command
+    If input_data is given, it is written to the stdin of the command.
+    If timeout is given, the command is killed after timeout seconds, and
+    CommandTimeout is raised.
     Returns the stdout of the command.
     '''
     jcmd = " ".join(cmd)
     log.debug("Running command: {}".format(jcmd))
+    stdin = None if input_data is None else PIPE
+    expired = []
     try:
         if direct_io:
-            pipe = Popen(cmd, cwd=cwd)
+            pipe = Popen(cmd, stdin=stdin, cwd=cwd)
         else:
-            pipe = Popen(cmd, stdout=PIPE, stderr=PIPE, cwd=cwd)
-        stdout, stderr = pipe.communicate()
+            pipe = Popen(cmd, stdin=stdin, stdout=PIPE, stderr=PIPE, cwd=cwd)
+        timer = None
+        if timeout is not None:
+            timer = Timer(timeout, _kill_expired, (pipe, expired))
+            timer.start()
+        try:
+            stdout, stderr = pipe.communicate(input_data)
+        finally:
+            if timer is not None:
+                timer.cancel()
     except OSError:
         log.error("Error executing command {}!".format(jcmd))
         raise
 
+    if expired:
+        msg = "Command '{}' did not finish within {} seconds".format(jcmd,
+                                                                     timeout)
+        log.error(msg)
+        raise CommandTimeout(msg)
+
     if pipe.returncode != 0:
         if ignore_errors:
             log.warning("Command '{}' failed with exit code {}. Ignored.".
@@ -279,6 +314,146 @@ def execute_command(cmd, ignore_errors=False, direct_io=False, cwd=None):
             raise Exception(msg)
     return stdout
 
+def _feed_stdin(pipe, input_data):
+    try:
+        pipe.stdin.write(input_data)
+    except IOError:
+        # The command terminated without reading all of its input
+        pass
+    finally:
+        try:
+            pipe.stdin.close()
+        except IOError:
+            pass
+
+def _drain_stderr(pipe, chunks):
+    chunks.append(pipe.stderr.read())
+
+def execute_command_stream(cmd, ignore_errors=False, cwd=None,
+                           input_data=None, chunk_size=None):
+    '''
+    Same as execute_command, but returns an iterator over the output of
+    the command, which yields the output while the command is running
+    instead of collecting it in memory.
+    By default, the lines of the output are yielded (without line
+    terminators); if chunk_size is given, the raw output is yielded in
+    chunks of at most chunk_size bytes.
+    Like execute_command, an exception is raised (after the end of the
+    output) if the command fails, unless ignore_errors is true. If the
+    consumer stops iterating early, the command is killed.
+    '''
+    jcmd = " ".join(cmd)
+    log.debug("Running command: {}".format(jcmd))
+    stdin = None if input_data is None else PIPE
+    try:
+        pipe = Popen(cmd, stdin=stdin, stdout=PIPE, stderr=PIPE, cwd=cwd)
+    except OSError:
+        log.error("Error executing command {}!".format(jcmd))
+        raise
+
+    # stdin and stderr are served by helper threads, so that the command
+    # cannot block on a full pipe while we are reading its stdout
+    helpers = []
+    stderr = []
+    if input_data is not None:
+        helpers.append(Thread(target=_feed_stdin, args=(pipe, input_data)))
+    helpers.append(Thread(target=_drain_stderr, args=(pipe, stderr)))
+    for helper in helpers:
+        helper.daemon = True
+        helper.start()
+
+    try:
+        if chunk_size is None:
+            # Iterating over the file object directly would read ahead
+            # and delay the lines until its buffer is full
+            for line in iter(pipe.stdout.readline, ""):
+                if line.endswith("\n"):
+                    line = line[:-1]
+                yield line
+        else:
+            for chunk in iter(lambda: pipe.stdout.read(chunk_size), ""):
+                yield chunk
+        pipe.wait()
+    finally:
+        # Do not leave the command behind if the consumer gives up. Its
+        # children may still hold the pipes open, so the helpers are only
+        # waited for if the command terminated on its own.
+        if pipe.poll() is None:
+            pipe.kill()
+            pipe.wait()
+        else:
+            for helper in helpers:
+                helper.join()
+        pipe.stdout.close()
+
+    if pipe.returncode != 0:
+        if ignore_errors:
+            log.warning("Command '{}' failed with exit code {}. Ignored.".
+                    format(jcmd, pipe.returncode))
+        else:
+            msg = "Command '{}' failed with exit code {}. \n" \
+                  "(stderr: {})".format(jcmd, pipe.returncode, "".join(stderr))
+            log.error(msg)
+            raise Exception(msg)
+
+class CommandExecutor(object):
+    '''
+    Run independent external commands concurrently
+
+    Commands are executed by execute_command in a pool of threads, so at
+    most max_jobs commands run at the same time. Since the threads only
+    wait for the commands, this is much cheaper than a BatchJobPool.
+    Results are delivered in the order in which the commands were
+    submitted, and failures of a command are raised when its result is
+    retrieved.
+
+    Inside a batch job, max_jobs must take the concurrent jobs into
+    account: the default (number of CPUs) in every job oversubscribes
+    the machine when several jobs run at the same time.
+
+    Typical use:
+        with CommandExecutor(4) as executor:
+            outputs = executor.map([cmd1, cmd2, cmd3], timeout=60)
+    '''
+
+    def __init__(self, max_jobs=None):
+        if max_jobs is None:
+            max_jobs = cpu_count()
+        self.max_jobs = max(1, max_jobs)
+        self._pool = ThreadPool(self.max_jobs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def submit(self, cmd, **kwargs):
+        '''
+        Start the command cmd; kwargs are passed on to execute_command.
+        Returns a handle whose get() method waits for the command and
+        returns its output.
+        '''
+        return self._pool.apply_async(execute_command, (cmd,), kwargs)
+
+    def imap(self, cmds, **kwargs):
+        '''
+        Run all commands of cmds with the same execute_command arguments
+        and yield their outputs in the order of cmds
+        '''
+        handles = [self.submit(cmd, **kwargs) for cmd in cmds]
+        for handle in handles:
+            yield handle.get()
+
+    def map(self, cmds, **kwargs):
+        '''Same as imap, but returns the list of outputs'''
+        return list(self.imap(cmds, **kwargs))
+
+    def close(self):
+        '''Wait for all submitted commands and stop the threads'''
+        self._pool.close()
+        self._pool.join()
+
 def _convert_dot_file(dotfile):
     '''
     Convert duplicate edges in the given dot file into edges with
@@ -314,7 +489,11 @@ def _convert_dot_file(dotfile):
     res.append("}\n")
     return res
 
-def layout_graph(filename):
+def _layout_graph_cmd(filename):
+    '''
+    Prepare the layout of a dot file. Returns the command that creates
+    the layout and the name of the temporary input file of the command.
+    '''
     out = NamedTemporaryFile(mode="w", delete=False)
     out.writelines(_convert_dot_file(filename))
     out.close() # flushes the cache
@@ -325,9 +504,28 @@ def layout_graph(filename):
     cmd.append("-Gcharset=utf-8")
     cmd.append("-o{0}.pdf".format(os.path.splitext(filename)[0]))
     cmd.append(out.name)
-    execute_command(cmd)
-    # Manually remove the temporary file
-    os.unlink(out.name)
+    return cmd, out.name
+
+def layout_graph(filename):
+    cmd, tmpname = _layout_graph_cmd(filename)
+    try:
+        execute_command(cmd)
+    finally:
+        # Manually remove the temporary file
+        os.unlink(tmpname)
+
+def layout_graphs(filenames, max_jobs=None):
+    '''
+    Same as layout_graph for a list of files, with up to max_jobs
+    layouts computed at the same time
+    '''
+    layouts = [_layout_graph_cmd(filename) for filename in filenames]
+    try:
+        with CommandExecutor(max_jobs) as executor:
+            executor.map([cmd for (cmd, _) in layouts])
+    finally:
+        for (_, tmpname) in layouts:
+            os.unlink(tmpname)
 
 def generate_report(start_rev, end_rev, resdir):
     log.devinfo("  -> Generating report")
@@ -363,12 +561,13 @@ def generate_report(start_rev, end_rev, resdir):
     os.chdir(orig_wd)
     shutil.rmtree(tmpdir)
 
-def generate_reports(start_rev, end_rev, range_resdir):
+def generate_reports(start_rev, end_rev, range_resdir, max_jobs=1):
+    # The reports of several ranges are generated by concurrent batch
+    # jobs, so the number of layouts per range is limited by the caller
     files = glob(os.path.join(range_resdir, "*.dot"))
     log.info("  -> Analysing revision range {0}..{1}: Generating Reports...".
         format(start_rev, end_rev))
-    for file in files:
-        layout_graph(file)
+    layout_graphs(files, max_jobs)
     generate_report(start_rev, end_rev, range_resdir)
 
 def check4ctags():
@@ -428,64 +627,187 @@ def parse_iso_git_date(date_string):
     return parsed_date
 
 
-def generate_analysis_windows(repo, window_size_months):
+class CommitTimeline(object):
+    '''
+    The non-merge commits of a repository in the order of git log,
+    searchable by commit date
+
+    git log --no-merges --max-count=1 --before=<date> reports the first
+    commit in log order whose commit date is not later than <date>.
+    Since the commit dates in log order are not strictly decreasing (the
+    clocks of committers can be skewed), the search bisects the running
+    minimum of the commit dates, which yields the same commit.
+    '''
+
+    def __init__(self, commits):
+        '''
+        commits is a list of (hash, commit timestamp) tuples in the
+        order of git log
+        '''
+        self.commits = commits
+        # Negated running minimum of the commit dates, non-decreasing
+        self._neg_min_dates = []
+        min_date = None
+        for (_, date) in commits:
+            if min_date is None or date < min_date:
+                min_date = date
+            self._neg_min_dates.append(-min_date)
+
+    @classmethod
+    def from_repo(cls, repo):
+        cmd = 'git --git-dir={0} log --no-merges --format=%H,%ct'\
+            .format(repo).split()
+        commits = []
+        for line in execute_command_stream(cmd):
+            (rev, date) = line.split(",")
+            commits.append((rev, int(date)))
+        return cls(commits)
+
+    def last_before(self, timestamp):
+        '''
+        Return the (hash, timestamp) tuple of the commit that git log
+        --no-merges --max-count=1 --before=<timestamp> reports, or None
+        '''
+        i = bisect_left(self._neg_min_dates, -timestamp)
+        if i == len(self.commits):
+            return None
+        return self.commits[i]
+
+    def first(self):
+        '''Return the oldest commit in log order (or None)'''
+        if not self.commits:
+            return None
+        return self.commits[-1]
+
+    def windows(self, end_date, length, count=-1):
+        '''
+        Return a list of (start, end) commit tuples of adjacent analysis
+        windows of the given length (a timedelta) that end at end_date (a
+        naive UTC datetime), going back in time until the first commit is
+        reached, or count windows have been generated (-1 for no limit).
+        The windows are sorted from the oldest to the most recent one;
+        windows without commits are left out, so every window starts
+        with the end commit of its predecessor.
+        '''
+        res = []
+        while count != 0:
+            end = self.last_before(_utc_timestamp(end_date))
+            if end is None:
+                break
+            start = self.last_before(_utc_timestamp(end_date - length))
+            if start is None:
+                start = self.first()
+            if start != end:
+                res.append((start, end))
+                count -= 1
+            end_date -= length
+
+        res.reverse()
+        return res
+
+
+def _utc_timestamp(date):
+    return timegm(date.timetuple())
+
+
+def generate_analysis_windows(repo, window_size_months, num_windows=-1):
     """
     Generates a list of revisions (commit hash) in increments of the window_size
     parameter. The window_size parameter specifies the number of months between
     revisions. This function is useful when the git repository has no tags
-    referencing releases.
+    referencing releases. At most num_windows windows (-1 for all) that
+    lead up to the most recent commit are generated.
+
+    All revisions are looked up in a single listing of the commits (see
+    CommitTimeline).
     """
     cmd_date = 'git --git-dir={0} show --format=%ad  --date=iso8601'\
         .format(repo).split()
     latest_date_result = execute_command(cmd_date).splitlines()[0]
     latest_commit = parse_iso_git_date(latest_date_result)
 
-    print_fmt = "%Y-%m-%dT%H:%M:%S+0000"
     month = timedelta(days=30)
-
-    def get_before_arg(num_months):
-        date = latest_commit - num_months * month
-        return '--before=' + date.strftime(print_fmt)
-
-    revs = []
-    start = window_size_months  # Window size time ago
-    end = 0  # Present time
-    cmd_base = 'git --git-dir={0} log --no-merges --format=%H,%ct'\
-        .format(repo).split()
-    cmd_base_max1 = cmd_base + ['--max-count=1']
-    cmd = cmd_base_max1 + [get_before_arg(end)]
-    rev_end = execute_command(cmd).splitlines()
-    revs.extend(rev_end)
-
-    while start != end:
-        cmd = cmd_base_max1 + [get_before_arg(start)]
-        rev_start = execute_command(cmd).splitlines()
-
-        if len(rev_start) == 0:
-            start = end
-            cmd = cmd_base + ['--reverse']
-            rev_start = [execute_command(cmd).splitlines()[0]]
-        else:
-            end = start
-            start = end + window_size_months
-
-        # Check if any commits occurred since the last analysis window
-        if rev_start[0] != revs[0]:
-            revs = rev_start + revs
-        # else: no commit happened since last window, don't add duplicate
-        #       revisions
-    # End while
+    timeline = CommitTimeline.from_repo(repo)
+    windows = timeline.windows(latest_commit, window_size_months * month)
+    revs = [start for (start, _) in windows[:1]]
+    revs.extend(end for (_, end) in windows)
 
     # Check that commit dates are monotonic, in some cases the earliest
     # first commit does not carry the earliest commit date
-    revs = [rev.split(",") for rev in revs]
-    rev_len = len(revs)
-    if int(revs[0][1]) > int(revs[1][1]):
+    if len(revs) > 1 and revs[0][1] > revs[1][1]:
       del revs[0]
 
     # Extract hash
-    revs = [rev[0] for rev in revs]
+    revs = [rev[0] for rev in revs[-num_windows-1:]]
 
     rcs = [None for x in range(len(revs))]
 
     return revs, rcs
+
+
+def _time_path_query(repo):
+    """
+    Return the wall time (in seconds) of a path-limited history query
+    on repo, the kind of query that commit-graphs with changed-path
+    Bloom filters speed up, or None if the repository has no files
+    """
+    cmd = 'git --git-dir={0} ls-tree -r --name-only HEAD'.format(repo).split()
+    paths = execute_command(cmd, ignore_errors=True).splitlines()
+    if not paths:
+        return None
+
+    cmd = 'git --git-dir={0} log --format=%H HEAD --'.format(repo).split()
+    cmd.append(paths[len(paths) // 2])
+    start = time()
+    execute_command(cmd)
+    return time() - start
+
+
+def prepare_repository(repo, repack=False, mirror_dir=None):
+    """
+    Prepare the repository repo for the analysis: write a commit-graph
+    with changed-path Bloom filters (and optionally repack the objects)
+    so that path-limited git log and git blame calls need not inspect
+    the trees of all commits.
+
+    If mirror_dir is given, the preparation is performed on a bare
+    mirror of repo in mirror_dir (created on first use, fetched
+    otherwise) instead of repo itself. Returns the git directory that
+    should be analysed. The time of a path-limited probe query before
+    and after the preparation is reported in the log.
+    """
+    if mirror_dir is not None:
+        if os.path.isdir(mirror_dir):
+            log.info("Updating mirror {0}".format(mirror_dir))
+            cmd = 'git --git-dir={0} remote update --prune'.\
+                format(mirror_dir).split()
+        else:
+            log.info("Creating mirror of {0} in {1}".format(repo, mirror_dir))
+            cmd = ['git', 'clone', '--mirror', '--quiet', repo, mirror_dir]
+        execute_command(cmd)
+        repo = mirror_dir
+
+    before = _time_path_query(repo)
+
+    try:
+        if repack:
+            log.info("Repacking {0}".format(repo))
+            cmd = 'git --git-dir={0} repack -a -d -q'.format(repo).split()
+            execute_command(cmd)
+        log.info("Writing commit-graph of {0}".format(repo))
+        cmd = 'git --git-dir={0} commit-graph write --reachable '\
+            '--changed-paths'.format(repo).split()
+        execute_command(cmd)
+    except Exception:
+        # The preparation only speeds up the analysis, which works on
+        # unprepared repositories as well (e.g., with git < 2.27)
+        log.warning("Could not prepare repository {0}, continuing without "
+                    "commit-graph".format(repo))
+        return repo
+
+    after = _time_path_query(repo)
+    if before is not None:
+        log.info("Path-limited history query took {0:.3f}s before and "
+                 "{1:.3f}s after the repository preparation".
+                 format(before, after))
+    return repo